@@ -0,0 +1,70 @@
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.controllers.task_controller import get_tasks
+from app.db.connection import init_pool, close_pool
+
+
+async def run(user_codes: list, requests: int, concurrency: int) -> list:
+    """get_tasks'ı en fazla concurrency kadar eşzamanlı çağırır, her çağrının süresini döndürür."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    failures = 0
+
+    async def one(i: int):
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            result = await get_tasks(user_codes[i % len(user_codes)])
+            latencies.append(time.perf_counter() - started)
+            if result is False:
+                failures += 1
+
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    if failures:
+        print(f"⚠️ {failures} çağrı başarısız oldu.")
+    return latencies
+
+
+def _report(label: str, requests: int, elapsed: float, latencies: list) -> float:
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    throughput = requests / elapsed
+    print(f"{label}: {requests} istek, {elapsed:.2f} sn, {throughput:.1f} istek/sn")
+    print(f"  gecikme p50 {statistics.median(latencies) * 1000:.1f} ms, p95 {p95 * 1000:.1f} ms, en fazla {latencies[-1] * 1000:.1f} ms")
+    return throughput
+
+
+async def _timed(user_codes: list, requests: int, concurrency: int):
+    started = time.perf_counter()
+    latencies = await run(user_codes, requests, concurrency)
+    return time.perf_counter() - started, latencies
+
+
+async def main(user_codes: list, requests: int, concurrency: int, pool_size: int):
+    """Aynı istek sayısını önce sırayla, sonra eşzamanlı çalıştırıp havuzun kazancını raporlar."""
+    await init_pool(min_size=pool_size, max_size=pool_size)
+    try:
+        # Havuzu ve sorgu planlarını ısıtmak için ölçüm dışı birkaç çağrı yapılır.
+        await run(user_codes, min(requests, pool_size), pool_size)
+
+        serial = await _timed(user_codes, requests, 1)
+        concurrent = await _timed(user_codes, requests, concurrency)
+    finally:
+        await close_pool()
+
+    serial_throughput = _report("sıralı (1)", requests, *serial)
+    concurrent_throughput = _report(f"eşzamanlı ({concurrency}, havuz {pool_size})", requests, *concurrent)
+    print(f"hızlanma: {concurrent_throughput / serial_throughput:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Asenkron bağlantı havuzu altında eşzamanlı get_tasks çağrılarını ölçer.")
+    parser.add_argument("--user", dest="users", action="append", required=True, help="Görevleri listelenecek kullanıcı kodu; birden fazla verilebilir.")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--pool-size", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.requests, args.concurrency, args.pool_size))
@@ -0,0 +1,187 @@
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.cache.connection import init_cache, close_cache
+from app.cache.dashboard import invalidate_dashboards
+from app.controllers.authentication_controller import hash_password
+from app.controllers.general_controller import get_dashboard
+from app.db.connection import init_pool, close_pool, get_connection
+from psycopg import sql
+
+PROJECT_CODE = "bench_dashboard"
+USER_PREFIX = "bench_u"
+CONSTANT_TABLES = ("task_status", "task_priorities", "task_type")
+
+
+async def cleanup():
+    """Daha önce eklenen benchmark verisini siler."""
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            raise RuntimeError("Veritabanı bağlantısı alınamadı")
+
+        users = f"{USER_PREFIX}%"
+        await cur.execute("DELETE FROM logs WHERE owner_code LIKE %s", (users,))
+        await cur.execute("""
+            DELETE FROM tasks_assignment
+            WHERE task_id IN (SELECT id FROM tasks WHERE project_code = %s)
+        """, (PROJECT_CODE,))
+        await cur.execute("DELETE FROM tasks WHERE project_code = %s", (PROJECT_CODE,))
+        for table in CONSTANT_TABLES:
+            await cur.execute(
+                sql.SQL("DELETE FROM {table} WHERE project_code = %s").format(table=sql.Identifier(table)),
+                (PROJECT_CODE,)
+            )
+        await cur.execute("DELETE FROM members WHERE project_code = %s", (PROJECT_CODE,))
+        await cur.execute("DELETE FROM projects WHERE code = %s", (PROJECT_CODE,))
+        await cur.execute("DELETE FROM users WHERE code LIKE %s", (users,))
+        await conn.commit()
+
+
+async def seed(users: int, tasks: int, assignments_per_task: int, logs_per_user: int):
+    """Kullanıcı, görev, atama ve log verisini tekrarlanabilir şekilde ekler.
+
+    Tarihler görev id'sinden türetilir; aynı parametrelerle her seferinde aynı dağılım oluşur.
+    """
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            raise RuntimeError("Veritabanı bağlantısı alınamadı")
+
+        try:
+            await cur.execute("SELECT 1 FROM projects WHERE code = %s", (PROJECT_CODE,))
+            if await cur.fetchone():
+                print("ℹ️ Benchmark verisi zaten var, tekrar eklenmedi (--reseed ile yenilenir).")
+                return
+
+            await cur.execute("""
+                INSERT INTO users (code, name, surname, email, password, phone_number, is_admin)
+                SELECT %(prefix)s || g, 'Bench', 'User ' || g, %(prefix)s || g || '@example.com', %(password)s, '', false
+                FROM generate_series(1, %(users)s) g
+            """, {"prefix": USER_PREFIX, "users": users, "password": hash_password("bench")})
+
+            await cur.execute("""
+                INSERT INTO projects (code, date_start, date_end, manager_code, definition, status)
+                VALUES (%s, CURRENT_DATE - 90, CURRENT_DATE + 90, %s, 'Dashboard benchmark', 'reseraching')
+            """, (PROJECT_CODE, f"{USER_PREFIX}1"))
+            await cur.execute("""
+                INSERT INTO members (project_code, user_code, project_role)
+                SELECT %(project)s, %(prefix)s || g, 'viewer'
+                FROM generate_series(1, %(users)s) g
+            """, {"project": PROJECT_CODE, "prefix": USER_PREFIX, "users": users})
+
+            constant_ids = []
+            for table in CONSTANT_TABLES:
+                await cur.execute(sql.SQL("""
+                    INSERT INTO {table} (project_code, definition)
+                    VALUES (%s, 'Bench')
+                    RETURNING id
+                """).format(table=sql.Identifier(table)), (PROJECT_CODE,))
+                constant_ids.append((await cur.fetchone())[0])
+            status_id, priority_id, type_id = constant_ids
+
+            # Görevler bugünün 60 gün öncesi ile 60 gün sonrası arasına dağıtılır.
+            await cur.execute("""
+                INSERT INTO tasks (
+                    project_code, title, description, last_status, type,
+                    created_time, created_by, start_date, end_date, priority
+                )
+                SELECT
+                    %(project)s, 'Bench task ' || g, '', %(status)s, %(type)s,
+                    now() - g * INTERVAL '1 minute',
+                    %(prefix)s || (1 + g %% %(users)s),
+                    CURRENT_DATE + ((g * 37) %% 120 - 60),
+                    CURRENT_DATE + ((g * 37) %% 120 - 60) + g %% 14,
+                    %(priority)s
+                FROM generate_series(1, %(tasks)s) g
+            """, {
+                "project": PROJECT_CODE,
+                "prefix": USER_PREFIX,
+                "users": users,
+                "tasks": tasks,
+                "status": status_id,
+                "priority": priority_id,
+                "type": type_id
+            })
+
+            await cur.execute("""
+                INSERT INTO tasks_assignment (task_id, user_code, assigned_at, assigned_by)
+                SELECT t.id, %(prefix)s || (1 + (t.id + k) %% %(users)s), now(), t.created_by
+                FROM tasks t
+                CROSS JOIN generate_series(1, %(per_task)s) k
+                WHERE t.project_code = %(project)s
+            """, {
+                "project": PROJECT_CODE,
+                "prefix": USER_PREFIX,
+                "users": users,
+                "per_task": min(assignments_per_task, users)
+            })
+
+            await cur.execute("""
+                INSERT INTO logs (message, owner_code, created_at)
+                SELECT 'Bench log ' || g, %(prefix)s || (1 + g %% %(users)s), now() - g * INTERVAL '1 second'
+                FROM generate_series(1, %(logs)s) g
+            """, {"prefix": USER_PREFIX, "users": users, "logs": users * logs_per_user})
+
+            await conn.commit()
+            print(f"✅ {users} kullanıcı, {tasks} görev ve {users * logs_per_user} log eklendi.")
+
+        except Exception:
+            await conn.rollback()
+            raise
+
+
+def _summary(label: str, latencies: list):
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{label}: {len(latencies)} çağrı, p50 {statistics.median(latencies) * 1000:.1f} ms, "
+          f"p95 {p95 * 1000:.1f} ms, en fazla {latencies[-1] * 1000:.1f} ms")
+
+
+async def measure(users: int, samples: int):
+    """Her örnek kullanıcı için önce önbelleği silip (soğuk), sonra tekrar (sıcak) dashboard ister."""
+    cold = []
+    warm = []
+    for i in range(samples):
+        user_code = f"{USER_PREFIX}{1 + i % users}"
+        await invalidate_dashboards([user_code])
+
+        started = time.perf_counter()
+        if await get_dashboard(user_code) is False:
+            raise RuntimeError(f"{user_code} için dashboard alınamadı")
+        cold.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await get_dashboard(user_code)
+        warm.append(time.perf_counter() - started)
+
+    _summary("soğuk önbellek", cold)
+    _summary("sıcak önbellek", warm)
+
+
+async def main(users: int, tasks: int, assignments_per_task: int, logs_per_user: int, samples: int, reseed: bool, keep: bool):
+    await init_pool(min_size=1, max_size=2)
+    init_cache()
+    try:
+        if reseed:
+            await cleanup()
+        await seed(users, tasks, assignments_per_task, logs_per_user)
+        await measure(users, samples)
+        if not keep:
+            await cleanup()
+    finally:
+        await close_cache()
+        await close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Örnek veriyle get_dashboard gecikmesini soğuk ve sıcak önbellekte ölçer.")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--assignments-per-task", type=int, default=3)
+    parser.add_argument("--logs-per-user", type=int, default=50)
+    parser.add_argument("--samples", type=int, default=100)
+    parser.add_argument("--reseed", action="store_true", help="Önceki benchmark verisini silip yeniden ekler.")
+    parser.add_argument("--keep", action="store_true", help="Ölçümden sonra benchmark verisini silmez.")
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.tasks, args.assignments_per_task, args.logs_per_user, args.samples, args.reseed, args.keep))
@@ -1,41 +1,104 @@
+import os
+
 import redis
+import redis.asyncio as aioredis
+
+REDIS_HOST = "localhost"
+REDIS_PORT = 6379
+REDIS_PASSWORD = None
+REDIS_DB = 0
+
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", 2))
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", 2))
+
+SESSION_TTL_SECONDS = 10800
+
+_pool: redis.ConnectionPool | None = None
+_client: redis.Redis | None = None
+_async_pool: aioredis.ConnectionPool | None = None
+_async_client: aioredis.Redis | None = None
+
+
+def _pool_options() -> dict:
+    return {
+        "host": REDIS_HOST,
+        "port": REDIS_PORT,
+        "password": REDIS_PASSWORD,
+        "db": REDIS_DB,
+        "max_connections": REDIS_MAX_CONNECTIONS,
+        "socket_timeout": REDIS_SOCKET_TIMEOUT,
+        "socket_connect_timeout": REDIS_CONNECT_TIMEOUT,
+        "health_check_interval": 30,
+        "decode_responses": True,  # Verileri string olarak almak için
+    }
+
+
+def init_cache():
+    global _pool, _client, _async_pool, _async_client
+    if _pool is None:
+        _pool = redis.ConnectionPool(**_pool_options())
+        _client = redis.Redis(connection_pool=_pool)
+    if _async_pool is None:
+        _async_pool = aioredis.ConnectionPool(**_pool_options())
+        _async_client = aioredis.Redis(connection_pool=_async_pool)
+    print("✅ Redis bağlantı havuzu oluşturuldu.")
+
+
+async def close_cache():
+    global _pool, _client, _async_pool, _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        await _async_pool.disconnect()
+        _async_client = None
+        _async_pool = None
+    if _client is not None:
+        _client.close()
+        _pool.disconnect()
+        _client = None
+        _pool = None
+    print("✅ Redis bağlantı havuzu kapatıldı.")
+
+
+def get_redis_connection() -> redis.Redis:
+    if _client is None:
+        init_cache()
+    return _client
+
+
+def get_async_redis_connection() -> aioredis.Redis:
+    if _async_client is None:
+        init_cache()
+    return _async_client
 
-def get_redis_connection():
-    try:
-        # Redis bağlantısını oluştur
-        r = redis.Redis(
-            host='localhost',      # Redis sunucu adresi
-            port=6379,             # Varsayılan port
-            password=None,         # Şifre varsa buraya yaz
-            db=0,                  # Kullanılacak veritabanı numarası
-            decode_responses=True  # Verileri string olarak almak için
-        )
-
-        # Bağlantıyı test et
-        r.ping()
-        print("✅ Redis bağlantısı başarılı!")
-        return r
-
-    except redis.ConnectionError as e:
-        print("❌ Redis bağlantı hatası:", e)
-        return None
 
 def set_cache(cache_key: str, uuid: str) -> bool:
-    redis_client = get_redis_connection()
-    if redis_client:
-        try:
-            return redis_client.set(cache_key, uuid, ex=10800)
-        except Exception as e:
-            print("Redis set hatası:", e)
-            return False
-    return False
+    try:
+        return bool(get_redis_connection().set(cache_key, uuid, ex=SESSION_TTL_SECONDS))
+    except redis.RedisError as e:
+        print("Redis set hatası:", e)
+        return False
+
 
 def get_cache(cache_key: str):
-    redis_client = get_redis_connection()
-    if redis_client:
-        try:
-            value = redis_client.get(cache_key)
-            return value
-        except Exception as e:
-            print("Redis get hatası:", e)
-            return None
\ No newline at end of file
+    try:
+        return get_redis_connection().get(cache_key)
+    except redis.RedisError as e:
+        print("Redis get hatası:", e)
+        return None
+
+
+async def set_cache_async(cache_key: str, uuid: str) -> bool:
+    try:
+        return bool(await get_async_redis_connection().set(cache_key, uuid, ex=SESSION_TTL_SECONDS))
+    except redis.RedisError as e:
+        print("Redis set hatası:", e)
+        return False
+
+
+async def get_cache_async(cache_key: str):
+    try:
+        return await get_async_redis_connection().get(cache_key)
+    except redis.RedisError as e:
+        print("Redis get hatası:", e)
+        return None
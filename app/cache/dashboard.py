@@ -0,0 +1,63 @@
+import json
+import os
+
+import redis
+
+from app.cache.connection import get_async_redis_connection
+
+DASHBOARD_TTL_SECONDS = int(os.getenv("DASHBOARD_TTL_SECONDS", 60))
+
+_HITS_KEY = "dashboard:stats:hits"
+_MISSES_KEY = "dashboard:stats:misses"
+
+
+def _dashboard_key(user_code: str) -> str:
+    return f"dashboard:{user_code}"
+
+
+async def get_cached_dashboard(user_code: str):
+    """Önbellekteki dashboard verisini döndürür; yoksa ya da Redis'e ulaşılamazsa None."""
+    try:
+        client = get_async_redis_connection()
+        cached = await client.get(_dashboard_key(user_code))
+        await client.incr(_HITS_KEY if cached is not None else _MISSES_KEY)
+    except redis.RedisError as e:
+        print("Redis get hatası:", e)
+        return None
+
+    return json.loads(cached) if cached is not None else None
+
+
+async def set_cached_dashboard(user_code: str, data: dict) -> bool:
+    try:
+        return bool(await get_async_redis_connection().set(
+            _dashboard_key(user_code),
+            json.dumps(data, default=str),
+            ex=DASHBOARD_TTL_SECONDS
+        ))
+    except redis.RedisError as e:
+        print("Redis set hatası:", e)
+        return False
+
+
+async def invalidate_dashboards(user_codes):
+    """Verilen kullanıcıların dashboard önbelleğini siler."""
+    keys = [_dashboard_key(code) for code in set(user_codes) if code]
+    if not keys:
+        return
+
+    try:
+        await get_async_redis_connection().delete(*keys)
+    except redis.RedisError as e:
+        # Silinemeyen kayıt en geç TTL sonunda yenilenir.
+        print("Redis delete hatası:", e)
+
+
+async def get_dashboard_cache_stats() -> dict:
+    try:
+        hits, misses = await get_async_redis_connection().mget(_HITS_KEY, _MISSES_KEY)
+    except redis.RedisError as e:
+        print("Redis get hatası:", e)
+        return {"hits": None, "misses": None}
+
+    return {"hits": int(hits or 0), "misses": int(misses or 0)}
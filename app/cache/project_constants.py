@@ -0,0 +1,166 @@
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+
+import redis
+
+from app.cache.connection import get_async_redis_connection
+
+PROJECT_CONSTANTS_LRU_SIZE = int(os.getenv("PROJECT_CONSTANTS_LRU_SIZE", 256))
+PROJECT_CONSTANTS_LOCAL_TTL_SECONDS = float(os.getenv("PROJECT_CONSTANTS_LOCAL_TTL_SECONDS", 300))
+PROJECT_CONSTANTS_TTL_SECONDS = int(os.getenv("PROJECT_CONSTANTS_TTL_SECONDS", 3600))
+
+_CHANNEL = "project_constants:invalidate"
+
+# project_code -> (son geçerlilik zamanı, sabitler); en son kullanılan sonda tutulur.
+_local: OrderedDict = OrderedDict()
+_listener_task: asyncio.Task | None = None
+
+
+def _constants_key(project_code: str) -> str:
+    return f"project_constants:{project_code}"
+
+
+def _get_local(project_code: str):
+    entry = _local.get(project_code)
+    if entry is None:
+        return None
+    expires_at, constants = entry
+    if expires_at < time.monotonic():
+        _local.pop(project_code, None)
+        return None
+    _local.move_to_end(project_code)
+    return constants
+
+
+def _set_local(project_code: str, constants: dict):
+    _local[project_code] = (time.monotonic() + PROJECT_CONSTANTS_LOCAL_TTL_SECONDS, constants)
+    _local.move_to_end(project_code)
+    while len(_local) > PROJECT_CONSTANTS_LRU_SIZE:
+        _local.popitem(last=False)
+
+
+def _generation_key(project_code: str) -> str:
+    return f"project_constants:gen:{project_code}"
+
+
+# Sabitler sadece okuma başlamadan önceki nesil hâlâ geçerliyse yazılır; arada gelen bir
+# silme nesli artırdığı için eski veri önbelleğe geri konmaz.
+_SET_IF_GENERATION = """
+if (redis.call('GET', KEYS[2]) or '') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+
+async def get_cached_project_constants(project_code: str):
+    """Önce işlem içi LRU'ya, sonra Redis'e bakar.
+
+    (sabitler, nesil) döner; sabitler bulunamazsa None'dır. Nesil, veritabanından
+    okunan sonucu set_cached_project_constants ile yazarken verilmelidir; Redis'e
+    ulaşılamazsa None olur ve sonuç önbelleğe yazılmaz.
+    """
+    constants = _get_local(project_code)
+    if constants is not None:
+        return constants, None
+
+    try:
+        cached, generation = await get_async_redis_connection().mget(
+            _constants_key(project_code), _generation_key(project_code)
+        )
+    except redis.RedisError as e:
+        print("Redis get hatası:", e)
+        return None, None
+
+    if cached is None:
+        return None, generation or ""
+    constants = json.loads(cached)
+    _set_local(project_code, constants)
+    return constants, generation or ""
+
+
+async def get_project_constants_generation(project_code: str):
+    try:
+        return await get_async_redis_connection().get(_generation_key(project_code)) or ""
+    except redis.RedisError as e:
+        print("Redis get hatası:", e)
+        return None
+
+
+async def set_cached_project_constants(project_code: str, constants: dict, generation: str | None):
+    if generation is None:
+        return
+
+    try:
+        stored = await get_async_redis_connection().eval(
+            _SET_IF_GENERATION,
+            2,
+            _constants_key(project_code),
+            _generation_key(project_code),
+            generation,
+            json.dumps(constants),
+            PROJECT_CONSTANTS_TTL_SECONDS
+        )
+    except redis.RedisError as e:
+        print("Redis set hatası:", e)
+        return
+
+    if stored:
+        _set_local(project_code, constants)
+
+
+async def invalidate_project_constants(project_code: str):
+    """Sabitleri bu işlemden, Redis'ten ve yayınla diğer worker'lardan siler."""
+    _local.pop(project_code, None)
+    try:
+        client = get_async_redis_connection()
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.incr(_generation_key(project_code))
+            pipe.delete(_constants_key(project_code))
+            await pipe.execute()
+        await client.publish(_CHANNEL, project_code)
+    except redis.RedisError as e:
+        # Yayın ulaşmazsa diğer worker'lardaki kopya en geç yerel TTL sonunda düşer.
+        print("Redis invalidation hatası:", e)
+
+
+def start_project_constants_listener():
+    global _listener_task
+    if _listener_task is not None:
+        return
+    _listener_task = asyncio.get_running_loop().create_task(_listen())
+
+
+async def stop_project_constants_listener():
+    global _listener_task
+    if _listener_task is None:
+        return
+    _listener_task.cancel()
+    try:
+        await _listener_task
+    except asyncio.CancelledError:
+        pass
+    _listener_task = None
+
+
+async def _listen():
+    while True:
+        pubsub = get_async_redis_connection().pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(_CHANNEL)
+            # Abonelik kopmuşken kaçırılan silmeler olabileceği için yerel kopya boşaltılır.
+            _local.clear()
+            while True:
+                # Havuzdaki socket_timeout'a takılmamak için bekleme süresi açıkça verilir.
+                message = await pubsub.get_message(timeout=1.0)
+                if message is not None:
+                    _local.pop(message["data"], None)
+        except redis.RedisError as e:
+            print("Redis pub/sub hatası:", e)
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.aclose()
@@ -0,0 +1,115 @@
+import hashlib
+from app.storage.connection import get_storage
+from app.utils.attachment_metadata import describe_attachment
+from app.utils.generate_uuid import generate_uuid
+
+
+def blob_key(sha256: str) -> str:
+    # Her blob satırı kendi anahtarını alır; aynı içerik silinip yeniden yüklense de
+    # eski satırın commit sonrası silinen nesnesi yeni satırınkiyle çakışmaz.
+    return f"blobs/{sha256[:2]}/{sha256}/{generate_uuid()}"
+
+
+async def acquire_blob(cur, sha256: str, size: int):
+    """Blob'un referans sayısını bir artırır, yoksa oluşturur.
+
+    (storage_key, created) döner; created True ise içerik depoya yazılmalıdır.
+    """
+    await cur.execute("""
+        INSERT INTO attachment_blobs (sha256, storage_key, file_size, ref_count)
+        VALUES (%s, %s, %s, 1)
+        ON CONFLICT (sha256) DO UPDATE
+        SET ref_count = attachment_blobs.ref_count + 1
+        RETURNING storage_key, (xmax = 0) AS created
+    """, (sha256, blob_key(sha256), size))
+    row = await cur.fetchone()
+    return row[0], row[1]
+
+
+async def store_blob_bytes(cur, file_name: str, data: bytes, meta: dict | None = None):
+    """İçeriği blob olarak kaydeder; aynı içerik zaten varsa sadece referans sayısı artar.
+
+    (meta, created_key) döner; created_key yalnızca içerik bu çağrıda yazıldıysa doludur.
+    """
+    meta = meta or describe_attachment(file_name, data)
+    storage_key, created = await acquire_blob(cur, meta["sha256"], meta["size"])
+    meta["storage_key"] = storage_key
+    if not created:
+        return meta, None
+
+    await get_storage().write_bytes(storage_key, data)
+    return meta, storage_key
+
+
+async def write_temp_blob(chunks, on_chunk=None):
+    """Akışı geçici bir anahtara yazar, SHA-256 ve boyutu yazarken hesaplar.
+
+    (tmp_key, sha256, size) döner; ardından commit_temp_blob çağrılmalıdır.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    tmp_key = f"tmp/{generate_uuid()}"
+
+    async def hashed_chunks():
+        nonlocal size
+        async for chunk in chunks:
+            size += len(chunk)
+            if on_chunk is not None:
+                on_chunk(size)
+            digest.update(chunk)
+            yield chunk
+
+    await get_storage().write(tmp_key, hashed_chunks())
+    return tmp_key, digest.hexdigest(), size
+
+
+async def commit_temp_blob(cur, tmp_key: str, sha256: str, size: int):
+    """Geçici içeriği blob anahtarına taşır ya da aynı blob varsa geçici kopyayı siler.
+
+    (storage_key, created_key) döner.
+    """
+    storage = get_storage()
+    try:
+        storage_key, created = await acquire_blob(cur, sha256, size)
+        if created:
+            await storage.move(tmp_key, storage_key)
+            return storage_key, storage_key
+        await storage.delete(tmp_key)
+        return storage_key, None
+    except Exception:
+        await discard_blobs([tmp_key])
+        raise
+
+
+async def release_blobs(cur, sha256_list) -> list:
+    """Verilen blob referanslarını düşer, referansı kalmayan blob'ları siler.
+
+    Depodan silinmesi gereken anahtarlar döner; commit'ten sonra discard_blobs ile silinmelidir.
+    """
+    if not sha256_list:
+        return []
+
+    await cur.execute("""
+        UPDATE attachment_blobs b
+        SET ref_count = b.ref_count - r.refs
+        FROM (
+            SELECT sha256, COUNT(*) AS refs
+            FROM unnest(%s::text[]) AS sha256
+            GROUP BY sha256
+        ) r
+        WHERE b.sha256 = r.sha256
+    """, (list(sha256_list),))
+    await cur.execute("""
+        DELETE FROM attachment_blobs
+        WHERE sha256 = ANY(%s) AND ref_count <= 0
+        RETURNING storage_key
+    """, (list(set(sha256_list)),))
+    return [row[0] for row in await cur.fetchall()]
+
+
+async def discard_blobs(storage_keys):
+    for key in storage_keys:
+        try:
+            await get_storage().delete(key)
+        except Exception as e:
+            print("Storage delete error:", e)
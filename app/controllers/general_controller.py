@@ -1,368 +1,547 @@
 from app.controllers.authentication_controller import hash_password
 from app.db.connection import get_connection
-from psycopg2 import sql
+from psycopg import sql
 from app.model.user_model import UpdateUserModel
+from app.utils.cursor import decode_cursor, encode_cursor
+from app.cache.dashboard import get_cached_dashboard, set_cached_dashboard
+from datetime import date, datetime, timedelta
+
+MAX_LOG_PAGE_SIZE = 500
+MAX_ADMIN_USER_PAGE_SIZE = 200
+MAX_USER_SEARCH_SIZE = 50
+
+MAX_CALENDAR_WINDOW_DAYS = 92
+
+# Takvim olayları: tarih aralığı pencereyle kesişen görevlerin pencere içindeki başlangıç/bitiş günleri.
+# daterange ifadesi 008 migration'ındaki GiST indeksiyle birebir aynı olmalı.
+_CALENDAR_CTES = sql.SQL("""
+    window_tasks AS (
+        SELECT t.title, t.start_date, t.end_date
+        FROM tasks t
+        WHERE daterange(LEAST(t.start_date, t.end_date), GREATEST(t.start_date, t.end_date), '[]')
+              && daterange(%(date_from)s::date, %(date_to)s::date, '[]')
+          AND (
+              t.created_by = %(user_code)s
+              OR EXISTS (
+                  SELECT 1 FROM tasks_assignment ta
+                  WHERE ta.task_id = t.id AND ta.user_code = %(user_code)s
+              )
+          )
+    ),
+    events AS (
+        SELECT DISTINCT start_date AS event_date, title || ' görevinin başlangıç tarihi' AS description
+        FROM window_tasks
+        WHERE start_date BETWEEN %(date_from)s AND %(date_to)s
+        UNION ALL
+        SELECT DISTINCT end_date AS event_date, title || ' görevinin bitiş tarihi' AS description
+        FROM window_tasks
+        WHERE end_date BETWEEN %(date_from)s AND %(date_to)s
+    ),
+    events_by_date AS (
+        SELECT
+            event_date,
+            ARRAY_AGG(description ORDER BY description) AS tasks
+        FROM events
+        GROUP BY event_date
+    )
+""")
+
+# Sıralama anahtarları; code eklenerek her sıralama tekil hale getirilir.
+ADMIN_USER_SORTS = {
+    "name": ("name", "surname", "code"),
+    "surname": ("surname", "name", "code"),
+    "email": ("email", "code"),
+}
+
+def calendar_window(date_from: date | None, date_to: date | None):
+    """Verilmeyen uçları verilen ucun, ikisi de yoksa içinde bulunulan ayın sınırlarıyla tamamlar."""
+    month_start = (date_from or date_to or date.today()).replace(day=1)
+    next_month = (month_start + timedelta(days=32)).replace(day=1)
+    return date_from or month_start, date_to or next_month - timedelta(days=1)
+
+async def get_user_logs(
+    user_code: str,
+    cursor: str | None = None,
+    limit: int = 100,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    search: str | None = None
+):
+    limit = max(1, min(limit, MAX_LOG_PAGE_SIZE))
+    after = None
+    if cursor:
+        # Geçersiz cursor ValueError olarak çağırana iletilir.
+        values = decode_cursor(cursor)
+        try:
+            after = (datetime.fromisoformat(values[0]), int(values[1]))
+        except (IndexError, TypeError):
+            raise ValueError("Invalid cursor")
+
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return False
 
-def get_user_logs(user_code: str):
-    conn, cur = get_connection()
-    if conn is None:
-        return False
-
-    try:
-        query = """
-            SELECT 
-                l.id,
-                l.message,
-                u.name || ' ' || u.surname AS owner_name,
-                l.created_at
-            FROM logs l
-            LEFT JOIN users u ON l.owner_code = u.code
-            WHERE l.owner_code = %s
-            ORDER BY l.created_at DESC
-            LIMIT 100;
-        """
-
-        cur.execute(query, (user_code,))
-        users = cur.fetchall()
-
-        result = [
-            {
-                "id": row[0],
-                "message": row[1],
-                "owner_name": row[2],
-                "created_at": row[3]
+        try:
+            conditions = [sql.SQL("l.owner_code = %s")]
+            params = [user_code]
+
+            if date_from:
+                conditions.append(sql.SQL("l.created_at >= %s"))
+                params.append(date_from)
+            if date_to:
+                conditions.append(sql.SQL("l.created_at < %s"))
+                params.append(date_to)
+            if search:
+                escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                conditions.append(sql.SQL("l.message ILIKE %s"))
+                params.append(f"%{escaped}%")
+            if after:
+                conditions.append(sql.SQL("(l.created_at, l.id) < (%s, %s)"))
+                params.extend(after)
+
+            query = sql.SQL("""
+                SELECT 
+                    l.id,
+                    l.message,
+                    u.name || ' ' || u.surname AS owner_name,
+                    l.created_at
+                FROM logs l
+                LEFT JOIN users u ON l.owner_code = u.code
+                WHERE {conditions}
+                ORDER BY l.created_at DESC, l.id DESC
+                LIMIT %s;
+            """).format(conditions=sql.SQL(" AND ").join(conditions))
+
+            # Bir fazla satır çekilerek sonraki sayfanın olup olmadığı anlaşılır.
+            await cur.execute(query, (*params, limit + 1))
+            rows = await cur.fetchall()
+
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = encode_cursor(rows[-1][3], rows[-1][0])
+
+            logs = [
+                {
+                    "id": row[0],
+                    "message": row[1],
+                    "owner_name": row[2],
+                    "created_at": row[3]
+                }
+                for row in rows
+            ]
+            return {
+                "logs": logs,
+                "next_cursor": next_cursor
             }
-            for row in users
-        ]
-        return result
-
-    except Exception as e:
-        print("Query error:", e)
-        return False
-
-    finally:
-        cur.close()
-        conn.close()
-
-def get_all_users_for_project():
-    conn, cur = get_connection()
-    if conn is None:
-        return False
-
-    try:
-        query = sql.SQL("""
-            SELECT name || ' ' || surname AS full_name, code
-            FROM public.users
-        """)
-
-        cur.execute(query, ())
-        users = cur.fetchall()
-
-        result = [{"full_name": row[0], "code": row[1]} for row in users]
-        return result
-
-    except Exception as e:
-        print("Query error:", e)
-        return False
-
-    finally:
-        cur.close()
-        conn.close()
-
-def get_all_users_for_admin():
-    conn, cur = get_connection()
-    if conn is None:
-        return False
-
-    try:
-        query = sql.SQL("""
-            SELECT 
-                ROW_NUMBER() OVER (ORDER BY name, surname) AS id,
-                name,
-                surname,
-                email,
-                phone_number,
-                code,
-                is_active
-            FROM public.users;
-        """)
-
-        cur.execute(query, ())
-        users = cur.fetchall()
-        result = [
-            {
-                "id": row[0],
-                "name": row[1],
-                "surname": row[2],
-                "email": row[3],
-                "phone": row[4],
-                "code": row[5],
-                "active": row[6],
+
+        except Exception as e:
+            print("Query error:", e)
+            return False
+
+async def get_all_users_for_project():
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return False
+
+        try:
+            query = sql.SQL("""
+                SELECT name || ' ' || surname AS full_name, code
+                FROM public.users
+            """)
+
+            await cur.execute(query, ())
+            users = await cur.fetchall()
+
+            result = [{"full_name": row[0], "code": row[1]} for row in users]
+            return result
+
+        except Exception as e:
+            print("Query error:", e)
+            return False
+
+async def search_users(query: str, limit: int = 20, exclude_project: str | None = None):
+    limit = max(1, min(limit, MAX_USER_SEARCH_SIZE))
+    prefix = query.strip().lower()
+    if not prefix:
+        return []
+
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return False
+
+        try:
+            escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            pattern = f"{escaped}%"
+            # İfadeler migration'daki indekslerle birebir aynı olmalı.
+            conditions = [sql.SQL("(lower(u.name || ' ' || u.surname) LIKE %s OR lower(u.surname) LIKE %s)")]
+            params = [pattern, pattern]
+
+            if exclude_project:
+                # Proje yöneticisi members'ta olmasa da projeye zaten dahildir.
+                conditions.append(sql.SQL(
+                    "NOT EXISTS (SELECT 1 FROM members m WHERE m.user_code = u.code AND m.project_code = %s)"
+                ))
+                conditions.append(sql.SQL(
+                    "NOT EXISTS (SELECT 1 FROM projects p WHERE p.manager_code = u.code AND p.code = %s)"
+                ))
+                params.extend([exclude_project, exclude_project])
+
+            sql_query = sql.SQL("""
+                SELECT u.name || ' ' || u.surname AS full_name, u.code
+                FROM public.users u
+                WHERE {conditions}
+                ORDER BY lower(u.name || ' ' || u.surname), u.code
+                LIMIT %s
+            """).format(conditions=sql.SQL(" AND ").join(conditions))
+
+            await cur.execute(sql_query, (*params, limit))
+            users = await cur.fetchall()
+
+            return [{"full_name": row[0], "code": row[1]} for row in users]
+
+        except Exception as e:
+            print("Query error:", e)
+            return False
+
+async def get_all_users_for_admin(
+    cursor: str | None = None,
+    limit: int = 50,
+    sort: str = "name",
+    direction: str = "asc",
+    search: str | None = None
+):
+    if sort not in ADMIN_USER_SORTS or direction not in ("asc", "desc"):
+        raise ValueError("Invalid sort")
+    sort_columns = ADMIN_USER_SORTS[sort]
+    limit = max(1, min(limit, MAX_ADMIN_USER_PAGE_SIZE))
+
+    # Cursor son satırın sıralama değerlerini ve liste içindeki sırasını taşır.
+    after = None
+    position = 0
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(sort_columns) + 1 or not isinstance(values[-1], int):
+            raise ValueError("Invalid cursor")
+        after = values[:-1]
+        position = values[-1]
+
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return False
+
+        try:
+            conditions = []
+            params = []
+
+            if search:
+                escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                pattern = f"%{escaped}%"
+                conditions.append(sql.SQL(
+                    "(name ILIKE %s OR surname ILIKE %s OR email ILIKE %s OR phone_number ILIKE %s)"
+                ))
+                params.extend([pattern] * 4)
+            if after:
+                conditions.append(sql.SQL("({columns}) {op} ({values})").format(
+                    columns=sql.SQL(", ").join(map(sql.Identifier, sort_columns)),
+                    op=sql.SQL(">" if direction == "asc" else "<"),
+                    values=sql.SQL(", ").join(sql.Placeholder() * len(sort_columns))
+                ))
+                params.extend(after)
+
+            query = sql.SQL("""
+                SELECT 
+                    name,
+                    surname,
+                    email,
+                    phone_number,
+                    code,
+                    is_active
+                FROM public.users
+                {where}
+                ORDER BY {order}
+                LIMIT %s;
+            """).format(
+                where=sql.SQL("WHERE ") + sql.SQL(" AND ").join(conditions) if conditions else sql.SQL(""),
+                order=sql.SQL(", ").join(
+                    sql.SQL("{} {}").format(sql.Identifier(column), sql.SQL(direction.upper()))
+                    for column in sort_columns
+                )
+            )
+
+            # Bir fazla satır çekilerek sonraki sayfanın olup olmadığı anlaşılır.
+            await cur.execute(query, (*params, limit + 1))
+            users = await cur.fetchall()
+
+            next_cursor = None
+            if len(users) > limit:
+                users = users[:limit]
+                last = dict(zip(("name", "surname", "email", "phone_number", "code"), users[-1]))
+                next_cursor = encode_cursor(*(last[column] for column in sort_columns), position + limit)
+
+            result = [
+                {
+                    "id": position + index,
+                    "name": row[0],
+                    "surname": row[1],
+                    "email": row[2],
+                    "phone": row[3],
+                    "code": row[4],
+                    "active": row[5],
+                }
+                for index, row in enumerate(users, start=1)
+            ]
+            return {
+                "users": result,
+                "next_cursor": next_cursor
             }
-            for row in users
-        ]
-        return result
-
-    except Exception as e:
-        print("Query error:", e)
-        return False
-
-    finally:
-        cur.close()
-        conn.close()
-
-def delete_user(code: str):
-    conn, cur = get_connection()
-    if conn is None:
-        return False
-
-    try:
-        query = sql.SQL("""
-            DELETE FROM users
-            WHERE code = %s
-        """)
-
-        cur.execute(query, (code,))
-        conn.commit()
-
-        return True
-
-    except Exception as e:
-        print("Query error:", e)
-        return False
-
-    finally:
-        cur.close()
-        conn.close()
-
-def edit_activation_user(code: str):
-    conn, cur = get_connection()
-    if conn is None:
-        return False
-
-    try:
-        query = sql.SQL("""
-            UPDATE users
-            SET is_active = NOT is_active
-            WHERE code = %s
-        """)
-
-        cur.execute(query, (code,))
-        conn.commit()
-
-        return True
-
-    except Exception as e:
-        print("Query error:", e)
-        return False
-
-    finally:
-        cur.close()
-        conn.close()
-
-def update_user(data: UpdateUserModel):
-    conn, cur = get_connection()
-    if conn is None:
-        return False
-
-    try:
-        fields = [
-            sql.SQL("name = %s"),
-            sql.SQL("surname = %s"),
-            sql.SQL("email = %s"),
-        ]
-        values = [data.name, data.surname, data.email]
-
-        if getattr(data, "password", None) is not None:
-            fields.append(sql.SQL("password = %s"))
-            values.append(hash_password(password=data.password));
-
-        if getattr(data, "phone_number", None) is not None:
-            fields.append(sql.SQL("phone_number = %s"))
-            values.append(data.phone_number)
-
-        if not fields:
+
+        except Exception as e:
+            print("Query error:", e)
+            return False
+
+async def delete_user(code: str):
+    async with get_connection() as (conn, cur):
+        if conn is None:
             return False
 
-        query = sql.SQL("UPDATE users SET ") + sql.SQL(", ").join(fields) + sql.SQL(" WHERE code = %s")
-        values.append(data.code)
+        try:
+            query = sql.SQL("""
+                DELETE FROM users
+                WHERE code = %s
+            """)
+
+            await cur.execute(query, (code,))
+            await conn.commit()
 
-        cur.execute(query, values)
-        conn.commit()
+            return True
+
+        except Exception as e:
+            print("Query error:", e)
+            return False
 
-        return cur.rowcount > 0
+async def edit_activation_user(code: str):
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return False
 
-    except Exception as e:
         try:
-            conn.rollback()
-        except Exception:
-            pass
-        print("Query error:", e)
-        return False
+            query = sql.SQL("""
+                UPDATE users
+                SET is_active = NOT is_active
+                WHERE code = %s
+            """)
+
+            await cur.execute(query, (code,))
+            await conn.commit()
+
+            return True
+
+        except Exception as e:
+            print("Query error:", e)
+            return False
+
+async def update_user(data: UpdateUserModel):
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return False
 
-    finally:
         try:
-            cur.close()
-            conn.close()
-        except Exception:
-            pass
-
-def get_dashboard(user_code: str):
-    conn, cur = get_connection()
-    if conn is None:
-        return False
-
-    try:
-        # Kullanıcı adı
-        cur.execute("""
-            SELECT name || ' ' || surname AS full_name
-            FROM users
-            WHERE code = %s
-        """, (user_code,))
-        user_row = cur.fetchone()
-        full_name = user_row[0] if user_row else "Bilinmeyen Kullanıcı"
-
-        # Son 5 log
-        cur.execute("""
-            SELECT message
-            FROM logs
-            WHERE owner_code = %s
-            ORDER BY created_at DESC
-            LIMIT 5
-        """, (user_code,))
-        logs_rows = cur.fetchall()
-        logs = [row[0] for row in logs_rows]
-
-        cur.execute("""
-        WITH user_tasks AS (
-            SELECT DISTINCT
-                t.id,
-                t.title,
-                t.start_date,
-                t.end_date
-            FROM tasks t
-            LEFT JOIN tasks_assignment ta ON t.id = ta.task_id
-            WHERE t.created_by = %s
-            OR ta.user_code = %s
-        )
-        SELECT
-            title,
-            (start_date - CURRENT_DATE) AS days_left
-        FROM user_tasks
-        WHERE start_date > CURRENT_DATE
-        AND start_date <= CURRENT_DATE + INTERVAL '7 days'
-        ORDER BY start_date ASC
-        LIMIT 10;
-        """, (user_code, user_code))
-
-        near_tasks_rows = cur.fetchall()
-        near_tasks = [
-            {
-                "title": row[0],
-                "days_left": int(row[1])
+            fields = [
+                sql.SQL("name = %s"),
+                sql.SQL("surname = %s"),
+                sql.SQL("email = %s"),
+            ]
+            values = [data.name, data.surname, data.email]
+
+            if getattr(data, "password", None) is not None:
+                fields.append(sql.SQL("password = %s"))
+                values.append(hash_password(password=data.password));
+
+            if getattr(data, "phone_number", None) is not None:
+                fields.append(sql.SQL("phone_number = %s"))
+                values.append(data.phone_number)
+
+            if not fields:
+                return False
+
+            query = sql.SQL("UPDATE users SET ") + sql.SQL(", ").join(fields) + sql.SQL(" WHERE code = %s")
+            values.append(data.code)
+
+            await cur.execute(query, values)
+            await conn.commit()
+
+            return cur.rowcount > 0
+
+        except Exception as e:
+            try:
+                await conn.rollback()
+            except Exception:
+                pass
+            print("Query error:", e)
+            return False
+
+async def get_dashboard(user_code: str, date_from: date | None = None, date_to: date | None = None):
+    # Sadece varsayılan pencere (içinde bulunulan ay) önbelleğe alınır.
+    default_window = date_from is None and date_to is None
+    if default_window:
+        cached = await get_cached_dashboard(user_code)
+        if cached is not None:
+            return cached
+    date_from, date_to = calendar_window(date_from, date_to)
+
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return False
+
+        try:
+            # Kullanıcı adı ve son 5 log tek sorguda
+            await cur.execute("""
+                SELECT
+                    (SELECT name || ' ' || surname FROM users WHERE code = %s) AS full_name,
+                    ARRAY(
+                        SELECT message
+                        FROM logs
+                        WHERE owner_code = %s
+                        ORDER BY created_at DESC, id DESC
+                        LIMIT 5
+                    ) AS logs
+            """, (user_code, user_code))
+            user_row = await cur.fetchone()
+            full_name = user_row[0] or "Bilinmeyen Kullanıcı"
+            logs = list(user_row[1] or [])
+
+            # Kullanıcının görevleri bir kez okunur; sayılar ve yaklaşan görevler aynı
+            # küme üzerinden, takvim ise sadece pencereyle kesişen görevlerden hesaplanır.
+            await cur.execute(sql.SQL("""
+                WITH user_tasks AS MATERIALIZED (
+                    SELECT
+                        t.id,
+                        t.title,
+                        t.start_date,
+                        t.end_date
+                    FROM tasks t
+                    WHERE t.created_by = %(user_code)s
+                       OR EXISTS (
+                           SELECT 1 FROM tasks_assignment ta
+                           WHERE ta.task_id = t.id AND ta.user_code = %(user_code)s
+                       )
+                ),
+                counts AS (
+                    SELECT
+                        COUNT(*) AS all_count,
+                        COUNT(*) FILTER (WHERE end_date < CURRENT_DATE) AS finished_count,
+                        COUNT(*) FILTER (
+                            WHERE start_date > CURRENT_DATE
+                              AND start_date <= CURRENT_DATE + INTERVAL '7 days'
+                        ) AS nearly_count,
+                        COUNT(*) FILTER (
+                            WHERE start_date <= CURRENT_DATE
+                              AND end_date >= CURRENT_DATE
+                        ) AS ongoing_count
+                    FROM user_tasks
+                ),
+                near AS (
+                    SELECT
+                        title,
+                        start_date,
+                        (start_date - CURRENT_DATE) AS days_left
+                    FROM user_tasks
+                    WHERE start_date > CURRENT_DATE
+                      AND start_date <= CURRENT_DATE + INTERVAL '7 days'
+                    ORDER BY start_date ASC
+                    LIMIT 10
+                ),
+                {calendar}
+                SELECT
+                    c.all_count,
+                    c.finished_count,
+                    c.nearly_count,
+                    c.ongoing_count,
+                    (
+                        SELECT COALESCE(json_agg(json_build_array(title, days_left) ORDER BY start_date), '[]'::json)
+                        FROM near
+                    ) AS near_tasks,
+                    (
+                        SELECT COALESCE(
+                            json_agg(json_build_array(to_char(event_date, 'YYYY-MM-DD'), tasks) ORDER BY event_date),
+                            '[]'::json
+                        )
+                        FROM events_by_date
+                    ) AS tasks_by_date
+                FROM counts c;
+            """).format(calendar=_CALENDAR_CTES), {
+                "user_code": user_code,
+                "date_from": date_from,
+                "date_to": date_to
+            })
+            row = await cur.fetchone()
+
+            tasks_counts = {
+                "all_count": row[0],
+                "finished_count": row[1],
+                "nearly_count": row[2],
+                "ongoing_count": row[3]
             }
-            for row in near_tasks_rows
-        ]
-
-        # Görev sayıları
-        cur.execute("""
-            WITH user_tasks AS (
-                SELECT DISTINCT
-                    t.id,
-                    t.start_date,
-                    t.end_date
-                FROM tasks t
-                LEFT JOIN tasks_assignment ta ON t.id = ta.task_id
-                WHERE t.created_by = %s
-                   OR ta.user_code = %s
-            )
-            SELECT
-                'all_count' AS kategori,
-                COUNT(*) AS sayi
-            FROM user_tasks
-
-            UNION ALL
-
-            SELECT
-                'finished_count' AS kategori,
-                COUNT(*) AS sayi
-            FROM user_tasks
-            WHERE end_date < CURRENT_DATE
-
-            UNION ALL
-
-            SELECT
-                'nearly_count' AS kategori,
-                COUNT(*) AS sayi
-            FROM user_tasks
-            WHERE start_date > CURRENT_DATE
-              AND start_date <= CURRENT_DATE + INTERVAL '7 days'
-
-            UNION ALL
-
-            SELECT
-                'ongoing_count' AS kategori,
-                COUNT(*) AS sayi
-            FROM user_tasks
-            WHERE start_date <= CURRENT_DATE
-              AND end_date >= CURRENT_DATE;
-        """, (user_code, user_code))
-        tasks_rows = cur.fetchall()
-        tasks_counts = {row[0]: row[1] for row in tasks_rows}
-
-        # Tarihe göre görev listesi
-        cur.execute("""
-            WITH user_tasks AS (
-                SELECT DISTINCT
-                    t.id,
-                    t.title,
-                    t.start_date,
-                    t.end_date
-                FROM tasks t
-                LEFT JOIN tasks_assignment ta ON t.id = ta.task_id
-                WHERE t.created_by = %s
-                   OR ta.user_code = %s
-            ),
-            events AS (
-                SELECT DISTINCT start_date AS event_date, title || ' görevinin başlangıç tarihi' AS description
-                FROM user_tasks
-                WHERE start_date IS NOT NULL
-                UNION ALL
-                SELECT DISTINCT end_date AS event_date, title || ' görevinin bitiş tarihi' AS description
-                FROM user_tasks
-                WHERE end_date IS NOT NULL
-            )
-            SELECT
-                event_date,
-                ARRAY_AGG(description ORDER BY description) AS tasks
-            FROM events
-            GROUP BY event_date
-            ORDER BY event_date;
-        """, (user_code, user_code))
-        tasks_by_date_rows = cur.fetchall()
-
-        # Tarihe göre dict oluştur
-        from collections import OrderedDict
-        tasks_by_date = OrderedDict()
-        for row in tasks_by_date_rows:
-            date_str = row[0].strftime("%Y-%m-%d")
-            tasks_by_date[date_str] = row[1]
-
-        # Dashboard verisi
-        dashboard_data = {
-            "full_name": full_name,
-            "logs": logs,
-            "tasks_counts": tasks_counts,
-            "tasks_by_date": tasks_by_date,
-            "near_tasks": near_tasks
-        }
-
-        return dashboard_data
-
-    except Exception as e:
-        print("Query error:", e)
-        return False
-
-    finally:
-        cur.close()
-        conn.close()
\ No newline at end of file
+            near_tasks = [
+                {
+                    "title": title,
+                    "days_left": int(days_left)
+                }
+                for title, days_left in row[4]
+            ]
+
+            # Tarihe göre dict oluştur
+            from collections import OrderedDict
+            tasks_by_date = OrderedDict()
+            for date_str, tasks in row[5]:
+                tasks_by_date[date_str] = tasks
+
+            # Dashboard verisi
+            dashboard_data = {
+                "full_name": full_name,
+                "logs": logs,
+                "tasks_counts": tasks_counts,
+                "tasks_by_date": tasks_by_date,
+                "calendar_window": {
+                    "date_from": date_from.isoformat(),
+                    "date_to": date_to.isoformat()
+                },
+                "near_tasks": near_tasks
+            }
+
+            if default_window:
+                await set_cached_dashboard(user_code, dashboard_data)
+            return dashboard_data
+
+        except Exception as e:
+            print("Query error:", e)
+            return False
+
+async def get_calendar(user_code: str, date_from: date, date_to: date):
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return False
+
+        try:
+            await cur.execute(sql.SQL("""
+                WITH {calendar}
+                SELECT event_date, tasks
+                FROM events_by_date
+                ORDER BY event_date;
+            """).format(calendar=_CALENDAR_CTES), {
+                "user_code": user_code,
+                "date_from": date_from,
+                "date_to": date_to
+            })
+            rows = await cur.fetchall()
+
+            return {
+                "date_from": date_from.isoformat(),
+                "date_to": date_to.isoformat(),
+                "tasks_by_date": {row[0].strftime("%Y-%m-%d"): row[1] for row in rows}
+            }
+
+        except Exception as e:
+            print("Query error:", e)
+            return False
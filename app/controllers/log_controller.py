@@ -1,29 +1,169 @@
+import asyncio
+import os
 from app.db.connection import get_connection
+from app.cache.dashboard import invalidate_dashboards
 from datetime import datetime
-from psycopg2 import sql
+
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", 500))
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", 1.0))
+LOG_QUEUE_MAX_SIZE = int(os.getenv("LOG_QUEUE_MAX_SIZE", 10000))
+# Kapanışta yazıcının kuyruğu boşaltması için en fazla bu kadar saniye beklenir.
+LOG_STOP_TIMEOUT = float(os.getenv("LOG_STOP_TIMEOUT", 10))
+
+_STOP = object()
+
+_queue: asyncio.Queue | None = None
+_writer_task: asyncio.Task | None = None
+
 
 def log_message(user_code: str, message: str):
+    # İstek sadece kuyruğa ekleme maliyetini öder, yazma işini arka plandaki yazıcı yapar.
+    if _writer_task is None or _writer_task.done():
+        start_log_writer()
+
     try:
-        conn, cur = get_connection()
-        if conn is None:
+        _queue.put_nowait((message, user_code, datetime.now()))
+    except asyncio.QueueFull:
+        print("Log kuyruğu dolu, kayıt atlandı:", message)
+
+
+def start_log_writer():
+    """Yazıcıyı başlatır; önceki yazıcı beklenmedik şekilde durduysa aynı kuyrukla yeniden başlatır."""
+    global _queue, _writer_task
+    if _writer_task is not None:
+        if not _writer_task.done():
             return
+        if not _writer_task.cancelled() and _writer_task.exception() is not None:
+            print("Log yazıcısı durmuştu, yeniden başlatılıyor:", _writer_task.exception())
 
-        query = sql.SQL("""
-            INSERT INTO logs (message, owner_code, created_at)
-            VALUES (%s, %s, %s)
-        """)
-        cur.execute(query, (message, user_code, datetime.now()))
-        conn.commit()
+    if _queue is None:
+        _queue = asyncio.Queue(maxsize=LOG_QUEUE_MAX_SIZE)
+    _writer_task = asyncio.get_running_loop().create_task(_run_writer())
 
-    except Exception as e:
-        print("Log kaydı sırasında hata:", e)
 
+async def stop_log_writer():
+    global _queue, _writer_task
+    if _writer_task is None:
+        return
+
+    # Kuyruktaki kayıtlar yazılmadan kapanılmaz; durmuş bir yazıcı önce yeniden başlatılır.
+    start_log_writer()
+    try:
+        await asyncio.wait_for(_queue.put(_STOP), LOG_STOP_TIMEOUT)
+        await asyncio.wait_for(_writer_task, LOG_STOP_TIMEOUT)
+    except asyncio.TimeoutError:
+        _writer_task.cancel()
+        print("Log yazıcısı zamanında kapanmadı, kayıtlar atlandı:", _queue.qsize())
+    except Exception as e:
+        print("Log yazıcısı hatayla sonlandı:", e)
     finally:
+        _queue = None
+        _writer_task = None
+
+
+async def _run_writer():
+    loop = asyncio.get_running_loop()
+    stopping = False
+
+    while not stopping:
+        item = await _queue.get()
+        if item is _STOP:
+            break
+
+        batch = [item]
+        deadline = loop.time() + LOG_FLUSH_INTERVAL
+        while len(batch) < LOG_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(_queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is _STOP:
+                stopping = True
+                break
+            batch.append(item)
+
+        await _safe_write(batch)
+
+    # Kapanışta kuyrukta kalanları da yaz.
+    remaining = []
+    while not _queue.empty():
+        item = _queue.get_nowait()
+        if item is not _STOP:
+            remaining.append(item)
+    for start in range(0, len(remaining), LOG_BATCH_SIZE):
+        await _safe_write(remaining[start:start + LOG_BATCH_SIZE])
+
+
+async def _safe_write(batch: list):
+    # Beklenmeyen bir hata yazıcı görevini sonlandırmamalıdır.
+    try:
+        await _write_batch(batch)
+    except Exception as e:
+        print("Log kaydı sırasında hata, kayıtlar atlandı:", len(batch), e)
+
+
+async def _write_batch(batch: list):
+    """Grubu tek bir COPY ile yazar; COPY başarısız olursa kayıtları tek tek yazmayı dener.
+
+    Hata fırlatmaz; yazıcı görevinin bir hata yüzünden durmaması gerekir.
+    """
+    try:
+        written = await _copy_rows(batch)
+    except Exception as e:
+        # Tek bir bozuk kayıt ya da kopan bağlantı yüzünden tüm grup kaybolmaz.
+        print("Log grubu yazılamadı, kayıtlar tek tek yazılıyor:", e)
+        written = await _insert_rows(batch)
+
+    if written:
         try:
-            cur.close()
-        except:
-            pass
+            # Dashboard son logları gösterdiği için yazılan kullanıcıların önbelleği toplu silinir.
+            await invalidate_dashboards(row[1] for row in written)
+        except Exception as e:
+            print("Dashboard önbelleği silinemedi:", e)
+
+
+async def _rollback(conn):
+    try:
+        await conn.rollback()
+    except Exception as e:
+        print("Log kaydı geri alınamadı:", e)
+
+
+async def _copy_rows(batch: list) -> list:
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            raise ConnectionError("Veritabanı bağlantısı alınamadı")
+
         try:
-            conn.close()
-        except:
-            pass
+            async with cur.copy("COPY logs (message, owner_code, created_at) FROM STDIN") as copy:
+                for row in batch:
+                    await copy.write_row(row)
+            await conn.commit()
+            return batch
+        except Exception:
+            await _rollback(conn)
+            raise
+
+
+async def _insert_rows(batch: list) -> list:
+    written = []
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            print("Log kaydı sırasında bağlantı hatası, kayıtlar atlandı:", len(batch))
+            return written
+
+        for row in batch:
+            try:
+                await cur.execute("""
+                    INSERT INTO logs (message, owner_code, created_at)
+                    VALUES (%s, %s, %s)
+                """, row)
+                await conn.commit()
+                written.append(row)
+            except Exception as e:
+                print("Log kaydı atlandı:", e)
+                await _rollback(conn)
+    return written
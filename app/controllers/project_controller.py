@@ -1,614 +1,584 @@
+import json
 from app.model.project_model import EditProjectModel, SetProjectModel, ChangeRoleModel, UnAuthorizeUserModel
 from app.db.connection import get_connection
-from psycopg2 import sql
-
-def set_project(model: SetProjectModel) -> bool:
-    conn, cur = get_connection()
-    if conn is None:
-        return False
-
-    try:
-        insert_project_query = sql.SQL("""
-            INSERT INTO projects (code, date_start, date_end, manager_code, definition, status)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """)
-        cur.execute(
-            insert_project_query,
-            (
-                model.project_code,
-                model.date_start,
-                model.date_end,
-                model.manager_code,
-                model.definition,
-                model.status
-            )
-        )
+from app.cache.dashboard import invalidate_dashboards
+from app.cache.project_constants import get_cached_project_constants, get_project_constants_generation, set_cached_project_constants, invalidate_project_constants
+from psycopg import sql
+
+async def load_project_constants(cur, project_code: str, refresh: bool = False) -> dict:
+    """Projenin durum, öncelik ve tür tanımlarını ve tanım -> id eşlemelerini döndürür.
+
+    Önce önbelleğe bakılır; refresh verilirse veritabanından yeniden okunur.
+    """
+    # Nesil sorgudan önce okunur; sorgu sürerken gelen bir silme eski sonucun yazılmasını engeller.
+    if refresh:
+        generation = await get_project_constants_generation(project_code)
+    else:
+        constants, generation = await get_cached_project_constants(project_code)
+        if constants is not None:
+            return constants
+
+    await cur.execute("""
+        SELECT
+            (SELECT json_agg(json_build_array(id, definition) ORDER BY id)
+             FROM task_status
+             WHERE project_code = %s) AS statuses,
+
+            (SELECT json_agg(json_build_array(id, definition) ORDER BY id)
+             FROM task_priorities
+             WHERE project_code = %s) AS priorities,
+
+            (SELECT json_agg(json_build_array(id, definition) ORDER BY id)
+             FROM task_type
+             WHERE project_code = %s) AS types
+    """, (project_code, project_code, project_code))
+    row = await cur.fetchone()
+
+    constants = {}
+    for kind, pairs in zip(("statuses", "priorities", "types"), row):
+        pairs = pairs or []
+        ids = {}
+        for constant_id, definition in pairs:
+            # Aynı tanım birden fazla satırda olabilir; en küçük id kullanılır.
+            ids.setdefault(definition, constant_id)
+        constants[kind] = [definition for _, definition in pairs]
+        constants[f"{kind}_ids"] = ids
+
+    await set_cached_project_constants(project_code, constants, generation)
+    return constants
+
+async def set_project(model: SetProjectModel) -> bool:
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return False
 
-        if model.extra_users:
-            insert_member_query = sql.SQL("""
-                INSERT INTO members (project_code, user_code, project_role)
-                VALUES (%s, %s, %s)
+        try:
+            insert_project_query = sql.SQL("""
+                INSERT INTO projects (code, date_start, date_end, manager_code, definition, status)
+                VALUES (%s, %s, %s, %s, %s, %s)
             """)
-            for member in model.extra_users:
-                cur.execute(
-                    insert_member_query,
-                    (
-                        model.project_code,
-                        member.code,
-                        member.role or "viewer"
-                    )
+            await cur.execute(
+                insert_project_query,
+                (
+                    model.project_code,
+                    model.date_start,
+                    model.date_end,
+                    model.manager_code,
+                    model.definition,
+                    model.status
                 )
+            )
+
+            # Her koleksiyon tek bir çok satırlı INSERT ile yazılır.
+            if model.extra_users:
+                # project_role tipli bir sütun olabileceği için değerler dizi yerine
+                # tipsiz parametrelerle çok satırlı VALUES olarak gönderilir.
+                await cur.execute(sql.SQL("""
+                    INSERT INTO members (project_code, user_code, project_role)
+                    VALUES {rows}
+                """).format(rows=sql.SQL(", ").join(
+                    sql.SQL("(%s, %s, %s)") for _ in model.extra_users
+                )), [
+                    value
+                    for member in model.extra_users
+                    for value in (model.project_code, member.code, member.role or "viewer")
+                ])
+
+            for table, items in (
+                ("task_type", model.types),
+                ("task_priorities", model.priorities),
+                ("task_status", model.statuses)
+            ):
+                if not items:
+                    continue
+                await cur.execute(sql.SQL("""
+                    INSERT INTO {table} (project_code, definition)
+                    SELECT %s, d.definition
+                    FROM unnest(%s::text[]) WITH ORDINALITY AS d(definition, ord)
+                    ORDER BY d.ord
+                """).format(table=sql.Identifier(table)), (
+                    model.project_code,
+                    [item.name for item in items]
+                ))
+
+            await conn.commit()
+            await invalidate_project_constants(model.project_code)
+            return True
+
+        except Exception as e:
+            print("Insert error:", e)
+            await conn.rollback()
+            return False
+
+async def change_role(model: ChangeRoleModel) -> bool:
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return False
 
-        if model.types:
-            insert_type_query = sql.SQL("""
-                INSERT INTO task_type (project_code, definition)
-                VALUES (%s, %s)
+        try:
+            query = sql.SQL("""
+                UPDATE members
+                SET project_role = %s
+                WHERE user_code = %s AND project_code = %s
             """)
-            for t in model.types:
-                cur.execute(insert_type_query, (model.project_code, t.name))
 
-        if model.priorities:
-            insert_priority_query = sql.SQL("""
-                INSERT INTO task_priorities (project_code, definition)
-                VALUES (%s, %s)
+            await cur.execute(query, (
+                model.project_role,
+                model.user_code,
+                model.project_code
+            ))
+
+            await conn.commit()
+            await invalidate_dashboards([model.user_code])
+            return True
+
+        except Exception as e:
+            print("UPDATE error:", e)
+            await conn.rollback()
+            return False
+
+
+async def unauthorize_user(model: UnAuthorizeUserModel) -> bool:
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return False
+
+        try:
+            query = sql.SQL("""
+                DELETE FROM members
+                WHERE user_code = %s AND project_code = %s
             """)
-            for p in model.priorities:
-                cur.execute(insert_priority_query, (model.project_code, p.name))
 
-        if model.statuses:
-            insert_status_query = sql.SQL("""
-                INSERT INTO task_status (project_code, definition)
-                VALUES (%s, %s)
+            await cur.execute(query, (
+                model.user_code,
+                model.project_code
+            ))
+
+            await conn.commit()
+            await invalidate_dashboards([model.user_code])
+            return True
+
+        except Exception as e:
+            print("Delete error:", e)
+            await conn.rollback()
+            return False
+
+
+async def delete_project(project_code: str) -> bool:
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return False
+
+        try:
+            # Silinen projenin görevlerini dashboard'unda gören kullanıcılar
+            await cur.execute("""
+                SELECT user_code FROM members WHERE project_code = %s
+                UNION
+                SELECT created_by FROM tasks WHERE project_code = %s
+                UNION
+                SELECT ta.user_code
+                FROM tasks_assignment ta
+                JOIN tasks t ON t.id = ta.task_id
+                WHERE t.project_code = %s
+            """, (project_code, project_code, project_code))
+            affected_users = [row[0] for row in await cur.fetchall()]
+
+            query = sql.SQL("""
+                DELETE FROM projects
+                WHERE code = %s
             """)
-            for s in model.statuses:
-                cur.execute(insert_status_query, (model.project_code, s.name))
 
-        conn.commit()
-        return True
+            await cur.execute(query, (project_code,))
+
+            await conn.commit()
+            await invalidate_dashboards(affected_users)
+            await invalidate_project_constants(project_code)
+            return True
+
+        except Exception as e:
+            print("Delete error:", e)
+            await conn.rollback()
+            return False
 
-    except Exception as e:
-        print("Insert error:", e)
-        conn.rollback()
-        return False
 
-    finally:
+async def get_members(project_code: str):
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return False
+
+        try:
+            query = sql.SQL("""
+                SELECT 
+                    u."name" || ' ' || u."surname" AS full_name,
+                    CASE 
+                        WHEN u.code = (
+                            SELECT p.manager_code
+                            FROM PROJECTS p
+                            WHERE p.code = %s
+                        ) THEN 'manager'
+                        ELSE m.project_role
+                    END AS role
+                FROM USERS u
+                LEFT JOIN MEMBERS m 
+                    ON u.code = m.user_code 
+                    AND m.project_code = %s
+                WHERE u.code = (
+                    SELECT p.manager_code
+                    FROM PROJECTS p
+                    WHERE p.code = %s
+                )
+                OR u.code IN (
+                    SELECT m.user_code
+                    FROM MEMBERS m
+                    WHERE m.project_code = %s
+                );
+            """)
+
+            await cur.execute(query, (project_code, project_code, project_code, project_code))
+            members = await cur.fetchall()
+
+            result = [{"full_name": row[0], "role": row[1]} for row in members]
+            return result
+
+        except Exception as e:
+            print("Query error:", e)
+            return False
+
+
+async def change_status(project_code: str, new_status: str) -> bool:
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return False
+
+        try:
+            query = sql.SQL("""
+                UPDATE projects
+                SET status = %s
+                WHERE code = %s
+            """)
+
+            await cur.execute(query, (
+                new_status,
+                project_code
+            ))
+
+            await conn.commit()
+            return True
+
+        except Exception as e:
+            print("UPDATE error:", e)
+            await conn.rollback()
+            return False
+
+
+async def get_projects(user_code: str):
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return False
+
         try:
-            cur.close()
-            conn.close()
-        except Exception:
-            pass
-
-def change_role(model: ChangeRoleModel) -> bool:
-    conn, cur = get_connection()
-    if conn is None:
-        return False
-
-    try:
-        query = sql.SQL("""
-            UPDATE members
-            SET project_role = %s
-            WHERE user_code = %s AND project_code = %s
-        """)
-
-        cur.execute(query, (
-            model.project_role,
-            model.user_code,
-            model.project_code
-        ))
-
-        conn.commit()
-        return True
-
-    except Exception as e:
-        print("UPDATE error:", e)
-        conn.rollback()
-        return False
-
-    finally:
-        cur.close()
-        conn.close()
-
-
-def unauthorize_user(model: UnAuthorizeUserModel) -> bool:
-    conn, cur = get_connection()
-    if conn is None:
-        return False
-
-    try:
-        query = sql.SQL("""
-            DELETE FROM members
-            WHERE user_code = %s AND project_code = %s
-        """)
-
-        cur.execute(query, (
-            model.user_code,
-            model.project_code
-        ))
-
-        conn.commit()
-        return True
-
-    except Exception as e:
-        print("Delete error:", e)
-        conn.rollback()
-        return False
-
-    finally:
-        cur.close()
-        conn.close()
-
-
-def delete_project(project_code: str) -> bool:
-    conn, cur = get_connection()
-    if conn is None:
-        return False
-
-    try:
-        query = sql.SQL("""
-            DELETE FROM projects
-            WHERE code = %s
-        """)
-
-        cur.execute(query, (project_code,))
-
-        conn.commit()
-        return True
-
-    except Exception as e:
-        print("Delete error:", e)
-        conn.rollback()
-        return False
-
-    finally:
-        cur.close()
-        conn.close()
-
-
-def get_members(project_code: str):
-    conn, cur = get_connection()
-    if conn is None:
-        return False
-
-    try:
-        query = sql.SQL("""
-            SELECT 
-                u."name" || ' ' || u."surname" AS full_name,
-                CASE 
-                    WHEN u.code = (
-                        SELECT p.manager_code
-                        FROM PROJECTS p
-                        WHERE p.code = %s
-                    ) THEN 'manager'
-                    ELSE m.project_role
-                END AS role
-            FROM USERS u
-            LEFT JOIN MEMBERS m 
-                ON u.code = m.user_code 
-                AND m.project_code = %s
-            WHERE u.code = (
-                SELECT p.manager_code
-                FROM PROJECTS p
+            query = sql.SQL("""
+                SELECT DISTINCT 
+                    p.code,
+                    p.date_start,
+                    p.date_end,
+                    p.definition,
+                    p.status,
+                    u.name || ' ' || u.surname AS manager_name
+                FROM public.projects p
+                LEFT JOIN public.members m 
+                    ON m.project_code = p.code
+                LEFT JOIN public.users u 
+                    ON u.code = p.manager_code
+                WHERE p.manager_code = %s
+                OR m.user_code = %s;
+            """)
+
+            await cur.execute(query, (user_code, user_code))
+            rows = await cur.fetchall()
+
+            result = [
+                {
+                    "code": row[0],
+                    "date_start": row[1],
+                    "date_end": row[2],
+                    "definition": row[3],
+                    "status": row[4],
+                    "manager_name": row[5],
+                }
+                for row in rows
+            ]
+
+            return result
+
+        except Exception as e:
+            print("Query error:", e)
+            return False
+
+async def get_project_detail(project_code: str):
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return False
+
+        try:
+            await cur.execute("""
+                SELECT 
+                    p.definition AS name,
+                    p.date_start,
+                    p.date_end,
+                    p.status,
+                    CONCAT(u.name, ' ', u.surname) AS manager_name,
+                    COALESCE(ps.member_count, 0) + 1 AS member_count,
+                    COALESCE(ps.task_count, 0) AS task_count,
+                    p.manager_code
+                FROM public.projects p
+                LEFT JOIN public.users u ON u.code = p.manager_code
+                LEFT JOIN public.project_stats ps ON ps.project_code = p.code
                 WHERE p.code = %s
-            )
-            OR u.code IN (
-                SELECT m.user_code
-                FROM MEMBERS m
-                WHERE m.project_code = %s
-            );
-        """)
-
-        cur.execute(query, (project_code, project_code, project_code, project_code))
-        members = cur.fetchall()
-
-        result = [{"full_name": row[0], "role": row[1]} for row in members]
-        return result
-
-    except Exception as e:
-        print("Query error:", e)
-        return False
-
-    finally:
-        cur.close()
-        conn.close()
-
-
-def change_status(project_code: str, new_status: str) -> bool:
-    conn, cur = get_connection()
-    if conn is None:
-        return False
-
-    try:
-        query = sql.SQL("""
-            UPDATE projects
-            SET status = %s
-            WHERE code = %s
-        """)
-
-        cur.execute(query, (
-            new_status,
-            project_code
-        ))
-
-        conn.commit()
-        return True
-
-    except Exception as e:
-        print("UPDATE error:", e)
-        conn.rollback()
-        return False
-
-    finally:
-        cur.close()
-        conn.close()
-
-
-def get_projects(user_code: str):
-    conn, cur = get_connection()
-    if conn is None:
-        return False
-
-    try:
-        query = sql.SQL("""
-            SELECT DISTINCT 
-                p.code,
-                p.date_start,
-                p.date_end,
-                p.definition,
-                p.status,
-                u.name || ' ' || u.surname AS manager_name
-            FROM public.projects p
-            LEFT JOIN public.members m 
-                ON m.project_code = p.code
-            LEFT JOIN public.users u 
-                ON u.code = p.manager_code
-            WHERE p.manager_code = %s
-            OR m.user_code = %s;
-        """)
-        
-        cur.execute(query, (user_code, user_code))
-        rows = cur.fetchall()
-
-        result = [
-            {
-                "code": row[0],
+            """, (project_code,))
+            row = await cur.fetchone()
+            project_detail = {
+                "name": row[0],
                 "date_start": row[1],
                 "date_end": row[2],
-                "definition": row[3],
-                "status": row[4],
-                "manager_name": row[5],
+                "status": row[3],
+                "manager_name": row[4],
+                "member_count": row[5],
+                "task_count": row[6],
+                "manager_code": row[7]
+            } if row else {}
+
+            await cur.execute("""
+                SELECT name, role, code
+                FROM (
+                    SELECT
+                        p.manager_code AS code,
+                        pm.name || ' ' || pm.surname AS name,
+                        'manager' AS role,
+                        0 AS sort_order
+                    FROM public.projects p
+                    LEFT JOIN public.users pm ON p.manager_code = pm.code
+                    WHERE p.code = %s
+                    UNION ALL
+                    SELECT
+                        m.user_code AS code,
+                        u.name || ' ' || u.surname AS name,
+                        m.project_role AS role,
+                        1 AS sort_order
+                    FROM public.members m
+                    LEFT JOIN public.users u ON m.user_code = u.code
+                    WHERE m.project_code = %s
+                ) t
+                ORDER BY sort_order, name
+            """, (project_code, project_code))
+            # Düzenleme ekranı mevcut üyeleri kodlarıyla geri gönderir.
+            project_members = [{"name": r[0], "role": r[1], "code": r[2]} for r in await cur.fetchall()]
+
+            constants = await load_project_constants(cur, project_code)
+            project_meta = {
+                "priorities": constants["priorities"],
+                "statuses": constants["statuses"],
+                "types": constants["types"]
+            }
+
+            return {
+                "project_detail": project_detail,
+                "project_members": project_members,
+                "project_meta": project_meta
+            }
+
+        except Exception as e:
+            print("Error:", e)
+            return False
+
+
+async def get_project_constants(project_code: str):
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return False
+
+        try:
+            constants = await load_project_constants(cur, project_code)
+            return {
+                "priorities": constants["priorities"],
+                "statuses": constants["statuses"],
+                "types": constants["types"]
             }
-            for row in rows
-        ]
-
-        return result
-
-    except Exception as e:
-        print("Query error:", e)
-        return False
-
-    finally:
-        cur.close()
-        conn.close()
-
-def get_project_detail(project_code: str):
-    conn, cur = get_connection()
-    if conn is None:
-        return False
-
-    try:
-        cur.execute("""
-            SELECT 
-                p.definition AS name,
-                p.date_start,
-                p.date_end,
-                p.status,
-                CONCAT(u.name, ' ', u.surname) AS manager_name,
-                COUNT(m.id)+1 AS member_count,
-                COUNT(t.id) AS task_count
+
+        except Exception as e:
+            print("Error:", e)
+            return False
+
+
+async def load_project_user_directory(cur, project_code: str) -> dict:
+    """Projenin yöneticisi ve üyelerinden oluşan kullanıcı dizinini sürümüyle döndürür.
+
+    Sürüm, dizin içeriğinin md5 özetidir; içerik değişmedikçe aynı kalır.
+    """
+    await cur.execute("""
+        WITH directory AS (
+            SELECT u.code, u.name || ' ' || u.surname AS name
             FROM public.projects p
-            LEFT JOIN public.users u ON u.code = p.manager_code
-            LEFT JOIN public.members m ON m.project_code = p.code
-            LEFT JOIN public.tasks t ON t.project_code = p.code
+            JOIN public.users u ON u.code = p.manager_code
             WHERE p.code = %s
-            GROUP BY 
-                p.code, 
-                p.definition, 
-                p.date_start, 
-                p.date_end, 
-                p.status, 
-                u.name, 
-                u.surname
-        """, (project_code,))
-        row = cur.fetchone()
-        project_detail = {
-            "name": row[0],
-            "date_start": row[1],
-            "date_end": row[2],
-            "status": row[3],
-            "manager_name": row[4],
-            "member_count": row[5],
-            "task_count": row[6]
-        } if row else {}
-
-        cur.execute("""
-            SELECT name, role
-            FROM (
-                SELECT
-                    pm.name || ' ' || pm.surname AS name,
-                    'manager' AS role,
-                    0 AS sort_order
+            UNION
+            SELECT u.code, u.name || ' ' || u.surname AS name
+            FROM public.members m
+            JOIN public.users u ON u.code = m.user_code
+            WHERE m.project_code = %s
+        )
+        SELECT
+            md5(COALESCE(string_agg(code || ':' || name, ',' ORDER BY code), '')),
+            COALESCE(json_agg(json_build_object('code', code, 'name', name) ORDER BY name, code), '[]'::json)
+        FROM directory
+    """, (project_code, project_code))
+    row = await cur.fetchone()
+    return {"version": row[0], "users": row[1]}
+
+async def get_project_user_directory(project_code: str):
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return False
+
+        try:
+            return await load_project_user_directory(cur, project_code)
+
+        except Exception as e:
+            print("Error:", e)
+            return False
+
+async def get_project_users(project_code: str):
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return False
+
+        try:
+            await cur.execute("""
+                SELECT u.code AS id, u.name || ' ' || u.surname AS name
                 FROM public.projects p
-                LEFT JOIN public.users pm ON p.manager_code = pm.code
+                LEFT JOIN public.users u ON u.code = p.manager_code
                 WHERE p.code = %s
-                UNION ALL
-                SELECT
-                    u.name || ' ' || u.surname AS name,
-                    m.project_role AS role,
-                    1 AS sort_order
+                UNION
+                SELECT u.code AS id, u.name || ' ' || u.surname AS name
                 FROM public.members m
-                LEFT JOIN public.users u ON m.user_code = u.code
+                LEFT JOIN public.users u ON u.code = m.user_code
                 WHERE m.project_code = %s
-            ) t
-            ORDER BY sort_order, name
-        """, (project_code, project_code))
-        project_members = [{"name": r[0], "role": r[1]} for r in cur.fetchall()]
-
-        cur.execute("""
-            SELECT
-                (SELECT array_agg(definition) 
-                 FROM task_priorities 
-                 WHERE project_code=%s) AS priorities,
-                 
-                (SELECT array_agg(definition) 
-                 FROM task_status 
-                 WHERE project_code=%s) AS statuses,
-                 
-                (SELECT array_agg(definition) 
-                 FROM task_type 
-                 WHERE project_code=%s) AS types
-        """, (project_code, project_code, project_code))
-        row = cur.fetchone()
-        project_meta = {
-            "priorities": row[0] or [],
-            "statuses": row[1] or [],
-            "types": row[2] or []
-        } if row else {"priorities": [], "statuses": [], "types": []}
-
-        return {
-            "project_detail": project_detail,
-            "project_members": project_members,
-            "project_meta": project_meta
-        }
-        
-    except Exception as e:
-        print("Error:", e)
-        return False
-
-    finally:
-        if conn:
-            conn.close()
-
-
-def get_project_constants(project_code: str):
-    conn, cur = get_connection()
-    if conn is None:
-        return False
-
-    try:
-        cur.execute("""
-            SELECT
-                (SELECT array_agg(definition) 
-                 FROM task_priorities 
-                 WHERE project_code=%s) AS priorities,
-                 
-                (SELECT array_agg(definition) 
-                 FROM task_status 
-                 WHERE project_code=%s) AS statuses,
-                 
-                (SELECT array_agg(definition) 
-                 FROM task_type 
-                 WHERE project_code=%s) AS types
-        """, (project_code, project_code, project_code))
-        row = cur.fetchone()
-        project_meta = {
-            "priorities": row[0] or [],
-            "statuses": row[1] or [],
-            "types": row[2] or []
-        } if row else {"priorities": [], "statuses": [], "types": []}
-
-        return project_meta;
-        
-    except Exception as e:
-        print("Error:", e)
-        return False
-
-    finally:
-        if conn:
-            conn.close()
-
-
-def get_project_users(project_code: str):
-    conn, cur = get_connection()
-    if conn is None:
-        return False
-
-    try:
-        cur.execute("""
-            SELECT u.code AS id, u.name || ' ' || u.surname AS name
-            FROM public.projects p
-            LEFT JOIN public.users u ON u.code = p.manager_code
-            WHERE p.code = %s
-            UNION
-            SELECT u.code AS id, u.name || ' ' || u.surname AS name
-            FROM public.members m
-            LEFT JOIN public.users u ON u.code = m.user_code
-            WHERE m.project_code = %s
-            ORDER BY name
-        """, (project_code, project_code))
-
-        rows = cur.fetchall()
-        users_list = [{"id": row[0], "name": row[1]} for row in rows]
-
-        return users_list
-
-    except Exception as e:
-        print("Error:", e)
-        return False
-
-    finally:
-        if conn:
-            conn.close()
-
-def edit_project(model: EditProjectModel):
-    conn, cur = get_connection()
-    if conn is None:
-        return False
-
-    try:
-        # Transaction başlat
-        conn.autocommit = False
-
-        cur.execute("""
-            UPDATE projects
-            SET
-                date_start = %s,
-                date_end = %s,
-                manager_code = %s,
-                definition = %s
-            WHERE code = %s
-        """, (
-            model.startDate,
-            model.endDate,
-            model.managerId,
-            model.definition,
-            model.project_code
-        ))
-
-        cur.execute("""
-            SELECT user_code, project_role 
-            FROM members
-            WHERE project_code = %s
-        """, (model.project_code,))
-        
-        rows = cur.fetchall()
-        old_users = {r[0]: r[1] for r in rows}
-
-        new_users_dict = {u["code"]: u["role"] for u in model.extra_users}
-
-        to_insert = set(new_users_dict.keys()) - set(old_users.keys())
-
-        for code in to_insert:
-            cur.execute("""
-                INSERT INTO members (project_code, user_code, project_role)
-                VALUES (%s, %s, %s)
-            """, (model.project_code, code, new_users_dict[code]))
-
-        to_delete = set(old_users.keys()) - set(new_users_dict.keys())
-
-        for code in to_delete:
-            cur.execute("""
-                DELETE FROM members
-                WHERE project_code = %s AND user_code = %s
-            """, (model.project_code, code))
+                ORDER BY name
+            """, (project_code, project_code))
 
-        to_update = [
-            code for code in new_users_dict
-            if code in old_users and new_users_dict[code] != old_users[code]
-        ]
+            rows = await cur.fetchall()
+            users_list = [{"id": row[0], "name": row[1]} for row in rows]
 
-        for code in to_update:
-            cur.execute("""
-                UPDATE members
-                SET project_role = %s
-                WHERE project_code = %s AND user_code = %s
-            """, (new_users_dict[code], model.project_code, code))
-
-        cur.execute("""
-            SELECT definition
-            FROM task_status
-            WHERE project_code = %s
-        """, (model.project_code,))
-        
-        rows = cur.fetchall()
-        old_statuses = set(r[0] for r in rows)
-
-        new_statuses = set(s["name"] for s in model.statuses)
-
-        to_insert = new_statuses - old_statuses
-        for definition in to_insert:
-            cur.execute("""
-                INSERT INTO task_status (project_code, definition)
-                VALUES (%s, %s)
-            """, (model.project_code, definition))
-
-        to_delete = old_statuses - new_statuses
-        for definition in to_delete:
-            cur.execute("""
-                DELETE FROM task_status
-                WHERE project_code = %s AND definition = %s
-            """, (model.project_code, definition))
-
-
-        cur.execute("""
-            SELECT definition
-            FROM task_type
-            WHERE project_code = %s
-        """, (model.project_code,))
-        
-        rows = cur.fetchall()
-        old_types = set(r[0] for r in rows)
-
-        new_types = set(s["name"] for s in model.types)
-
-        to_insert = new_types - old_types
-        for definition in to_insert:
-            cur.execute("""
-                INSERT INTO task_type (project_code, definition)
-                VALUES (%s, %s)
-            """, (model.project_code, definition))
-
-        to_delete = old_types - new_types
-        for definition in to_delete:
-            cur.execute("""
-                DELETE FROM task_type
-                WHERE project_code = %s AND definition = %s
-            """, (model.project_code, definition))
-
-        cur.execute("""
-            SELECT definition
-            FROM task_priorities
-            WHERE project_code = %s
-        """, (model.project_code,))
-        
-        rows = cur.fetchall()
-        old_priorities = set(r[0] for r in rows)
-
-        new_priorities = set(s["name"] for s in model.priorities)
-
-        to_insert = new_priorities - old_priorities
-        for definition in to_insert:
-            cur.execute("""
-                INSERT INTO task_priorities (project_code, definition)
-                VALUES (%s, %s)
-            """, (model.project_code, definition))
-
-        to_delete = old_priorities - new_priorities
-        for definition in to_delete:
-            cur.execute("""
-                DELETE FROM task_priorities
-                WHERE project_code = %s AND definition = %s
-            """, (model.project_code, definition))
-        # Commit
-        conn.commit()
-        return True
-
-    except Exception as e:
-        if conn:
-            conn.rollback()
-        print("Query error:", e)
-        return False
-
-    finally:
-        if cur: cur.close()
-        if conn: conn.close()
-    
\ No newline at end of file
+            return users_list
+
+        except Exception as e:
+            print("Error:", e)
+            return False
+
+async def edit_project(model: EditProjectModel):
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return False
+
+        try:
+            # Transaction başlat
+
+            await cur.execute("""
+                UPDATE projects
+                SET
+                    date_start = %s,
+                    date_end = %s,
+                    manager_code = %s,
+                    definition = %s
+                WHERE code = %s
+            """, (
+                model.startDate,
+                model.endDate,
+                model.managerId,
+                model.definition,
+                model.project_code
+            ))
+
+            # Üyeler tek ifadede eşitlenir. jsonb_populate_recordset gelen değerleri members
+            # satır tipine çevirir; project_role hangi tipte olursa olsun doğrudan yazılabilir.
+            new_users = {u["code"]: u["role"] for u in model.extra_users}
+            await cur.execute("""
+                WITH incoming AS (
+                    SELECT user_code, project_role
+                    FROM jsonb_populate_recordset(NULL::members, %(members)s::jsonb)
+                ),
+                removed AS (
+                    DELETE FROM members m
+                    WHERE m.project_code = %(project_code)s
+                      AND m.user_code NOT IN (SELECT user_code FROM incoming)
+                    RETURNING m.user_code
+                ),
+                updated AS (
+                    UPDATE members m
+                    SET project_role = i.project_role
+                    FROM incoming i
+                    WHERE m.project_code = %(project_code)s
+                      AND m.user_code = i.user_code
+                      AND m.project_role IS DISTINCT FROM i.project_role
+                ),
+                inserted AS (
+                    INSERT INTO members (project_code, user_code, project_role)
+                    SELECT %(project_code)s, i.user_code, i.project_role
+                    FROM incoming i
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM members m
+                        WHERE m.project_code = %(project_code)s AND m.user_code = i.user_code
+                    )
+                    RETURNING user_code
+                )
+                SELECT user_code FROM removed
+                UNION ALL
+                SELECT user_code FROM inserted
+            """, {
+                "project_code": model.project_code,
+                "members": json.dumps([
+                    {"user_code": code, "project_role": role}
+                    for code, role in new_users.items()
+                ])
+            })
+            membership_changed = {row[0] for row in await cur.fetchall()}
+
+            # Durum, tür ve öncelik tanımları: listede olmayanlar silinir, yeni olanlar
+            # verilen sırayla eklenir.
+            for table, items in (
+                ("task_status", model.statuses),
+                ("task_type", model.types),
+                ("task_priorities", model.priorities)
+            ):
+                definitions = list(dict.fromkeys(item["name"] for item in items))
+                await cur.execute(sql.SQL("""
+                    WITH removed AS (
+                        DELETE FROM {table}
+                        WHERE project_code = %(project_code)s
+                          AND NOT (definition = ANY(%(definitions)s::text[]))
+                    )
+                    INSERT INTO {table} (project_code, definition)
+                    SELECT %(project_code)s, d.definition
+                    FROM unnest(%(definitions)s::text[]) WITH ORDINALITY AS d(definition, ord)
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM {table} c
+                        WHERE c.project_code = %(project_code)s AND c.definition = d.definition
+                    )
+                    ORDER BY d.ord
+                """).format(table=sql.Identifier(table)), {
+                    "project_code": model.project_code,
+                    "definitions": definitions
+                })
+
+            # Commit
+            await conn.commit()
+            await invalidate_dashboards(membership_changed)
+            await invalidate_project_constants(model.project_code)
+            return True
+
+        except Exception as e:
+            if conn:
+                await conn.rollback()
+            print("Query error:", e)
+            return False
+    
@@ -1,914 +1,1357 @@
+import os
 from datetime import datetime
-from app.model.task_model import EditTaskFullModel, SetTaskModel, SetTaskDetailModel
+from app.model.task_model import EditTaskFullModel, SetTaskModel, SetTaskDetailModel, TaskListFilterModel, TaskPatchModel
 from app.db.connection import get_connection
-from psycopg2 import sql
-
-def get_projects_for_task(user_code: str):
-    conn, cur = get_connection()
-    if conn is None:
-        return False
-
-    try:
-        query = sql.SQL("""
-            SELECT DISTINCT 
-                p.code,
-                p.definition
-            FROM public.projects p
-            LEFT JOIN public.members m 
-                ON m.project_code = p.code
-            LEFT JOIN public.users u 
-                ON u.code = p.manager_code
-            WHERE p.manager_code = %s
-            OR m.user_code = %s;
-        """)
-        
-        cur.execute(query, (user_code, user_code))
-        rows = cur.fetchall()
-
-        result = [
-            {
-                "code": row[0],
-                "definition": row[1]
-            }
-            for row in rows
-        ]
-
-        return result
-
-    except Exception as e:
-        print("Query error:", e)
-        return False
-
-    finally:
-        cur.close()
-        conn.close()
-
-def set_task(data: dict) -> bool:
-    conn, cur = get_connection()
-    if conn is None:
-        print("Connection error.")
-        return False
-
-    try:
-        cur.execute("""
-            SELECT id FROM task_status 
-            WHERE project_code = %s AND definition = %s
-        """, (data["project_code"], data["status_definition"]))
-        row = cur.fetchone()
-        if not row:
-            raise ValueError("Status not found for given project/definition.")
-        status_id = row[0]
-
-        cur.execute("""
-            SELECT id FROM task_priorities 
-            WHERE project_code = %s AND definition = %s
-        """, (data["project_code"], data["priority_definition"]))
-        row = cur.fetchone()
-        if not row:
-            raise ValueError("Priority not found for given project/definition.")
-        priority_id = row[0]
-
-        cur.execute("""
-            SELECT id FROM task_type 
-            WHERE project_code = %s AND definition = %s
-        """, (data["project_code"], data["type_definition"]))
-        row = cur.fetchone()
-        if not row:
-            raise ValueError("Type not found for given project/definition.")
-        type_id = row[0]
-
-        model = SetTaskModel(
-            p_code=data["project_code"],
-            title=data.get("title", ""),
-            description=data.get("description", ""),
-            last_status=status_id,
-            type=type_id,
-            created_by=data["created_by"],
-            start_date=data.get("startDate"),
-            end_date=data.get("endDate"),
-            priority=priority_id
+from app.utils.cursor import decode_cursor, encode_cursor
+from app.utils.multipart_stream import InvalidMultipart
+from app.utils.attachment_metadata import decode_attachment_data, describe_attachment, guess_content_type
+from app.controllers.attachment_controller import commit_temp_blob, discard_blobs, release_blobs, store_blob_bytes, write_temp_blob
+from app.storage.connection import get_storage
+from app.cache.dashboard import invalidate_dashboards
+from app.cache.project_constants import invalidate_project_constants
+from app.controllers.project_controller import load_project_constants, load_project_user_directory
+from psycopg import sql
+
+MAX_ATTACHMENT_SIZE = int(os.getenv("MAX_ATTACHMENT_SIZE", 50 * 1024 * 1024))
+MAX_TASK_PAGE_SIZE = 100
+
+class AttachmentTooLarge(Exception):
+    pass
+
+class TaskVersionConflict(Exception):
+    pass
+
+async def _resolve_constant_ids(cur, project_code: str, status_definition: str, priority_definition: str, type_definition: str):
+    """Durum, öncelik ve tür tanımlarını proje sabitleri önbelleğinden id'ye çevirir.
+
+    None verilen tanımlar için None döner.
+    """
+    wanted = (("statuses_ids", status_definition, "Status"),
+              ("priorities_ids", priority_definition, "Priority"),
+              ("types_ids", type_definition, "Type"))
+
+    constants = await load_project_constants(cur, project_code)
+    if any(definition is not None and definition not in constants[kind] for kind, definition, _ in wanted):
+        # Önbellek henüz güncellenmemiş olabilir, bir kez veritabanından tazelenir.
+        constants = await load_project_constants(cur, project_code, refresh=True)
+
+    ids = []
+    for kind, definition, label in wanted:
+        if definition is None:
+            ids.append(None)
+            continue
+        if definition not in constants[kind]:
+            raise ValueError(f"{label} not found for given project/definition.")
+        ids.append(constants[kind][definition])
+    return ids
+
+async def _insert_attachments(cur, task_id: int, owner_code: str, rows: list):
+    """(file_name, meta) çiftlerini tek bir çok satırlı INSERT ile ekler."""
+    if not rows:
+        return
+
+    await cur.execute("""
+        INSERT INTO attachments (
+            task_id, storage_key, uploaded_at, owner_code, file_name,
+            file_size, content_type, sha256
+        )
+        SELECT %s, a.storage_key, %s, %s, a.file_name, a.file_size, a.content_type, a.sha256
+        FROM unnest(%s::text[], %s::text[], %s::bigint[], %s::text[], %s::text[])
+            AS a(storage_key, file_name, file_size, content_type, sha256)
+    """, (
+        task_id,
+        datetime.now(),
+        owner_code,
+        [meta["storage_key"] for _, meta in rows],
+        [file_name for file_name, _ in rows],
+        [meta["size"] for _, meta in rows],
+        [meta["content_type"] for _, meta in rows],
+        [meta["sha256"] for _, meta in rows]
+    ))
+
+async def _insert_subtasks(cur, task_id: int, created_by: str, created_time: datetime, subtasks: list):
+    """(açıklama, atanan kullanıcı kodları) çiftlerini alt görev ve atamalarıyla tek ifadede ekler."""
+    if not subtasks:
+        return
+
+    # Alt görev id'leri sequence'tan önceden alınır; böylece alt görevler ve
+    # atamaları sıra numarası üzerinden eşlenip tek ifadede yazılır.
+    subtask_orders = []
+    subtask_users = []
+    for order, (_, user_codes) in enumerate(subtasks, start=1):
+        for user_code in dict.fromkeys(user_codes):
+            subtask_orders.append(order)
+            subtask_users.append(user_code)
+
+    await cur.execute("""
+        WITH input AS MATERIALIZED (
+            SELECT
+                nextval(pg_get_serial_sequence('task_detail', 'id')) AS id,
+                d.description,
+                d.ord
+            FROM unnest(%s::text[]) WITH ORDINALITY AS d(description, ord)
+        ),
+        new_details AS (
+            INSERT INTO task_detail (
+                id, task_id, description, created_by, created_time
+            )
+            SELECT id, %s, description, %s, %s
+            FROM input
+            ORDER BY ord
         )
+        INSERT INTO task_detail_assignment (
+            detail_task_id, assigned_user, timestamp
+        )
+        SELECT i.id, a.user_code, %s
+        FROM unnest(%s::bigint[], %s::text[]) AS a(ord, user_code)
+        JOIN input i ON i.ord = a.ord
+    """, (
+        [description for description, _ in subtasks],
+        task_id,
+        created_by,
+        created_time,
+        created_time,
+        subtask_orders,
+        subtask_users
+    ))
+
+async def _task_dashboard_users(cur, task_id: int) -> set:
+    """Dashboard'unda bu görevi gören kullanıcılar: oluşturan ve atananlar."""
+    await cur.execute("""
+        SELECT created_by FROM tasks WHERE id = %s
+        UNION
+        SELECT user_code FROM tasks_assignment WHERE task_id = %s
+    """, (task_id, task_id))
+    return {row[0] for row in await cur.fetchall()}
+
+async def get_projects_for_task(user_code: str):
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return False
+
+        try:
+            query = sql.SQL("""
+                SELECT DISTINCT 
+                    p.code,
+                    p.definition
+                FROM public.projects p
+                LEFT JOIN public.members m 
+                    ON m.project_code = p.code
+                LEFT JOIN public.users u 
+                    ON u.code = p.manager_code
+                WHERE p.manager_code = %s
+                OR m.user_code = %s;
+            """)
+
+            await cur.execute(query, (user_code, user_code))
+            rows = await cur.fetchall()
+
+            result = [
+                {
+                    "code": row[0],
+                    "definition": row[1]
+                }
+                for row in rows
+            ]
 
-        cur.execute("""
-            INSERT INTO tasks (
-                project_code, title, description, last_status, type,
-                created_time, created_by, start_date, end_date, priority
+            return result
+
+        except Exception as e:
+            print("Query error:", e)
+            return False
+
+async def set_task(data: dict) -> bool:
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            print("Connection error.")
+            return False
+
+        written_keys = []
+        try:
+            status_id, priority_id, type_id = await _resolve_constant_ids(
+                cur,
+                data["project_code"],
+                data["status_definition"],
+                data["priority_definition"],
+                data["type_definition"]
             )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING id
-        """, (
-            model.p_code,
-            model.title,
-            model.description,
-            model.last_status,
-            model.type,
-            model.created_time,
-            model.created_by,
-            model.start_date,
-            model.end_date,
-            model.priority
-        ))
-
-        task_id = cur.fetchone()[0]
-
-        for user in data.get("users", []):
-            cur.execute("""
-                INSERT INTO tasks_assignment (
-                    task_id, user_code, assigned_at, assigned_by
-                )
-                VALUES (%s, %s, %s, %s)
-            """, (
-                task_id,
-                user["id"],
-                datetime.now(),
-                data["created_by"]
-            ))
 
-        for subtask in data.get("subtasks", []):
-            cur.execute("""
-                INSERT INTO task_detail (
-                    task_id, description, created_by, created_time
+            # Ek içerikleri görev eklenmeden önce depoya yazılır; tasks üzerindeki tetikleyici
+            # project_stats satırını kilitlediği için yavaş yüklemeler bu kilidi tutmamalıdır.
+            attachment_rows = []
+            for file in data.get("attachments", []):
+                meta, created_key = await store_blob_bytes(cur, file["name"], decode_attachment_data(file["data"]))
+                if created_key:
+                    written_keys.append(created_key)
+                attachment_rows.append((file["name"], meta))
+
+            model = SetTaskModel(
+                p_code=data["project_code"],
+                title=data.get("title", ""),
+                description=data.get("description", ""),
+                last_status=status_id,
+                type=type_id,
+                created_by=data["created_by"],
+                start_date=data.get("startDate"),
+                end_date=data.get("endDate"),
+                priority=priority_id
+            )
+
+            await cur.execute("""
+                INSERT INTO tasks (
+                    project_code, title, description, last_status, type,
+                    created_time, created_by, start_date, end_date, priority
                 )
-                VALUES (%s, %s, %s, %s)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                 RETURNING id
             """, (
-                task_id,
-                subtask["title"],
-                data["created_by"],
-                datetime.now()
+                model.p_code,
+                model.title,
+                model.description,
+                model.last_status,
+                model.type,
+                model.created_time,
+                model.created_by,
+                model.start_date,
+                model.end_date,
+                model.priority
             ))
 
-            detail_task_id = cur.fetchone()[0]
+            task_id = (await cur.fetchone())[0]
 
-            for user_code in subtask.get("assignedUserIds", []):
-                cur.execute("""
-                    INSERT INTO task_detail_assignment (
-                        detail_task_id, assigned_user, timestamp
+            now = datetime.now()
+            assigned_users = [user["id"] for user in data.get("users", [])]
+            if assigned_users:
+                await cur.execute("""
+                    INSERT INTO tasks_assignment (
+                        task_id, user_code, assigned_at, assigned_by
                     )
-                    VALUES (%s, %s, %s)
-                """, (
-                    detail_task_id,
-                    user_code,
-                    datetime.now()
-                ))
-        
-        
-        for file in data.get("attachments", []):
-            cur.execute("""
-                INSERT INTO attachments (
-                    task_id, file, uploaded_at, owner_code, file_name
+                    SELECT %s, u.user_code, %s, %s
+                    FROM unnest(%s::text[]) AS u(user_code)
+                """, (task_id, now, data["created_by"], assigned_users))
+
+            await _insert_subtasks(cur, task_id, data["created_by"], now, [
+                (subtask["title"], subtask.get("assignedUserIds", []))
+                for subtask in data.get("subtasks", [])
+            ])
+
+            await _insert_attachments(cur, task_id, data["created_by"], attachment_rows)
+
+            await conn.commit()
+            await invalidate_dashboards([data["created_by"], *(user["id"] for user in data.get("users", []))])
+            return True
+
+        except Exception as e:
+            print("Transaction error:", e)
+            await conn.rollback()
+            await discard_blobs(written_keys)
+            return False
+
+async def set_task_detail(data: dict) -> bool:
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            print("Connection error.")
+            return False
+
+        try:
+            await cur.execute("""
+                INSERT INTO task_status (project_code, definition)
+                VALUES (%s, %s)
+                RETURNING id
+            """, (data["project_code"], data["status_definition"]))
+            status_id = (await cur.fetchone())[0]
+
+            model = SetTaskDetailModel(
+                created_by=data["created_by"],
+                description=data["description"],
+                status=status_id,
+                task_id=data["task_id"],
+            )
+            await cur.execute("""
+                INSERT INTO task_detail (
+                    task_id, description, status, created_by, created_time
                 )
                 VALUES (%s, %s, %s, %s, %s)
             """, (
-                task_id,
-                bytes(file["data"]),
-                datetime.now(),
-                data["created_by"],
-                file["name"]
+                model.task_id,
+                model.description,
+                model.status,
+                model.created_by,
+                model.created_time,
             ))
 
-        conn.commit()
-        return True
+            await conn.commit()
+            await invalidate_project_constants(data["project_code"])
+            return True
 
-    except Exception as e:
-        print("Transaction error:", e)
-        conn.rollback()
-        return False
+        except Exception as e:
+            print("Transaction error:", e)
+            await conn.rollback()
+            return False
 
-    finally:
-        cur.close()
-        conn.close()
+async def set_task_attachment(data: dict) -> bool:
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return False
 
-def set_task_detail(data: dict) -> bool:
-    conn, cur = get_connection()
-    if conn is None:
-        print("Connection error.")
-        return False
+        written_keys = []
+        try:
 
-    try:
-        cur.execute("""
-            INSERT INTO task_status (project_code, definition)
-            VALUES (%s, %s, %s)
-            RETURNING id
-        """, (data["project_code"], data["status_definition"]))
-        status_id = cur.fetchone()[0]
-
-        model = SetTaskDetailModel(
-            created_by=data["created_by"],
-            description=data["description"],
-            status=status_id,
-            task_id=data["task_id"],
-        )
-        cur.execute("""
-            INSERT INTO task_detail (
-                task_id, description, status, created_by, created_time
-            )
-            VALUES (%s, %s, %s, %s, %s)
-        """, (
-            model.task_id,
-            model.description,
-            model.status,
-            model.created_by,
-            model.created_time,
-        ))
-
-        conn.commit()
-        return True
-
-    except Exception as e:
-        print("Transaction error:", e)
-        conn.rollback()
-        return False
+            for file in data.get("attachments", []):
+                meta, created_key = await store_blob_bytes(cur, file["name"], decode_attachment_data(file["data"]))
+                if created_key:
+                    written_keys.append(created_key)
+                await cur.execute("""
+                    INSERT INTO attachments (
+                        task_id, storage_key, uploaded_at, owner_code, file_name,
+                        file_size, content_type, sha256
+                    )
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                """, (
+                    data["task_id"],
+                    meta["storage_key"],
+                    datetime.now(),
+                    data["user_id"],
+                    file["name"],
+                    meta["size"],
+                    meta["content_type"],
+                    meta["sha256"]
+                ))
 
-    finally:
-        cur.close()
-        conn.close()
-        
-def set_task_attachment(data: dict) -> bool:
-    conn, cur = get_connection()
-    if conn is None:
-        return False
 
-    try:
-        
-        for file in data.get("attachments", []):
-            cur.execute("""
-                INSERT INTO attachments (
-                    task_id, file, uploaded_at, owner_code, file_name
+            await conn.commit()
+            return True
+
+        except Exception as e:
+            print("Insert error:", e)
+            await conn.rollback()
+            await discard_blobs(written_keys)
+            return False
+
+async def get_tasks(user_code: str, filters: TaskListFilterModel | None = None):
+    filters = filters or TaskListFilterModel()
+    limit = max(1, min(filters.limit, MAX_TASK_PAGE_SIZE))
+    after = None
+    if filters.cursor:
+        # Geçersiz cursor ValueError olarak çağırana iletilir.
+        values = decode_cursor(filters.cursor)
+        try:
+            after = (datetime.fromisoformat(values[0]), int(values[1]))
+        except (IndexError, TypeError):
+            raise ValueError("Invalid cursor")
+
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return False
+
+        try:
+            # Filtreler SQL'e eklenir; sayfa önce sadece tasks üzerinde (created_time, id) ile seçilir.
+            conditions = [sql.SQL("""(
+                t.project_code IN (SELECT project_code FROM members WHERE user_code = %s)
+                OR t.created_by = %s
+                OR EXISTS (SELECT 1 FROM tasks_assignment ta WHERE ta.task_id = t.id AND ta.user_code = %s)
+            )""")]
+            params = [user_code, user_code, user_code]
+
+            if filters.project_code:
+                conditions.append(sql.SQL("t.project_code = %s"))
+                params.append(filters.project_code)
+            if filters.status_id is not None:
+                conditions.append(sql.SQL("t.last_status = %s"))
+                params.append(filters.status_id)
+            if filters.priority_id is not None:
+                conditions.append(sql.SQL("t.priority = %s"))
+                params.append(filters.priority_id)
+            if filters.type_id is not None:
+                conditions.append(sql.SQL("t.type = %s"))
+                params.append(filters.type_id)
+            if filters.assignee:
+                conditions.append(sql.SQL("EXISTS (SELECT 1 FROM tasks_assignment fa WHERE fa.task_id = t.id AND fa.user_code = %s)"))
+                params.append(filters.assignee)
+            if filters.date_from:
+                conditions.append(sql.SQL("t.end_date >= %s"))
+                params.append(filters.date_from)
+            if filters.date_to:
+                conditions.append(sql.SQL("t.start_date <= %s"))
+                params.append(filters.date_to)
+            if after:
+                conditions.append(sql.SQL("(t.created_time, t.id) < (%s, %s)"))
+                params.extend(after)
+
+            query = sql.SQL("""
+                WITH page AS (
+                    SELECT t.id
+                    FROM tasks t
+                    WHERE {conditions}
+                    ORDER BY t.created_time DESC, t.id DESC
+                    LIMIT %s
                 )
-                VALUES (%s, %s, %s, %s, %s)
-            """, (
-                data["task_id"],
-                bytes(file["data"]),
-                datetime.now(),
-                data["user_id"],
-                file["name"]
-            ))
+                SELECT 
+                    t.id AS task_id,
+                    t.project_code,
+                    t.title,
+                    t.description,
+                    t.created_time,
+                    u_created.name || ' ' || u_created.surname AS created_by_name,
+                    t.start_date,
+                    t.end_date,
+                    ts.id AS status_id,
+                    ts.definition AS status_definition,
+                    tp.id AS priority_id,
+                    tp.definition AS priority_definition,
+                    tt.id AS type_id,
+                    tt.definition AS type_definition,
+                    ARRAY_AGG(u_assigned.name || ' ' || u_assigned.surname) 
+                        FILTER (WHERE u_assigned.code IS NOT NULL) AS assigned_users
+                FROM page
+                JOIN tasks t ON t.id = page.id
+                LEFT JOIN users u_created ON t.created_by = u_created.code
+                LEFT JOIN task_status ts ON t.last_status = ts.id
+                LEFT JOIN task_priorities tp ON t.priority = tp.id
+                LEFT JOIN task_type tt ON t.type = tt.id
+                LEFT JOIN tasks_assignment ta ON t.id = ta.task_id
+                LEFT JOIN users u_assigned ON ta.user_code = u_assigned.code
+                GROUP BY 
+                    t.id, t.project_code, t.title, t.description, t.created_time, u_created.name, u_created.surname,
+                    t.start_date, t.end_date,
+                    ts.id, ts.definition,
+                    tp.id, tp.definition,
+                    tt.id, tt.definition
+                ORDER BY t.created_time DESC, t.id DESC;
+            """).format(conditions=sql.SQL(" AND ").join(conditions))
+
+            # Bir fazla satır çekilerek sonraki sayfanın olup olmadığı anlaşılır.
+            await cur.execute(query, (*params, limit + 1))
+            tasks_rows = await cur.fetchall()
+
+            next_cursor = None
+            if len(tasks_rows) > limit:
+                tasks_rows = tasks_rows[:limit]
+                next_cursor = encode_cursor(tasks_rows[-1][4], tasks_rows[-1][0])
+
+            task_ids = [row[0] for row in tasks_rows]
+            sub_tasks_by_task = {task_id: [] for task_id in task_ids}
+            attachments_by_task = {task_id: [] for task_id in task_ids}
+
+            if task_ids:
+                # 🧩 Subtasks (tüm görevler için tek sorgu)
+                await cur.execute("""
+                    SELECT 
+                        td.id,
+                        td.task_id,
+                        td.description,
+                        u_created.name || ' ' || u_created.surname AS created_by,
+                        td.created_time,
+                        ARRAY_AGG(u_assigned.name || ' ' || u_assigned.surname) 
+                            FILTER (WHERE u_assigned.code IS NOT NULL) AS assigned_users
+                    FROM task_detail td
+                    LEFT JOIN users u_created ON td.created_by = u_created.code
+                    LEFT JOIN task_detail_assignment tda ON td.id = tda.detail_task_id
+                    LEFT JOIN users u_assigned ON tda.assigned_user = u_assigned.code
+                    WHERE td.task_id = ANY(%s)
+                    GROUP BY td.id, td.task_id, td.description, u_created.name, u_created.surname, td.created_time
+                    ORDER BY td.task_id, td.created_time ASC, td.id ASC;
+                """, (task_ids,))
+                for drow in await cur.fetchall():
+                    sub_tasks_by_task[drow[1]].append({
+                        "id": drow[0],
+                        "task_id": drow[1],
+                        "description": drow[2],
+                        "created_by": drow[3],
+                        "created_time": drow[4],
+                        "assigned_users": drow[5]
+                    })
+
+                await cur.execute("""
+                    SELECT 
+                        id,
+                        task_id,
+                        file_name,
+                        file_size,
+                        content_type,
+                        sha256
+                    FROM attachments
+                    WHERE task_id = ANY(%s)
+                    ORDER BY task_id, id
+                """, (task_ids,))
+                for a in await cur.fetchall():
+                    attachments_by_task[a[1]].append({
+                        "id": a[0],
+                        "name": a[2],
+                        "size": a[3],
+                        "content_type": a[4] or guess_content_type(a[2]),
+                        "hash": a[5]
+                    })
+
+            tasks_result = []
+            for row in tasks_rows:
+                assigned_users = list(row[14]) if isinstance(row[14], list) else []
+                task_id = row[0]
+
+                tasks_result.append({
+                    "task_id": row[0],
+                    "project_code": row[1],
+                    "title": row[2],
+                    "description": row[3],
+                    "created_time": row[4],
+                    "created_by": row[5],
+                    "start_date": row[6],
+                    "end_date": row[7],
+                    "status_id": row[8],
+                    "status_definition": row[9],
+                    "priority_id": row[10],
+                    "priority_definition": row[11],
+                    "type_id": row[12],
+                    "type_definition": row[13],
+                    "assigned_users": assigned_users,
+                    "sub_tasks": sub_tasks_by_task[task_id],
+                    "attachments": attachments_by_task[task_id]
+                })
 
+            return {
+                "tasks": tasks_result,
+                "next_cursor": next_cursor
+            }
 
-        conn.commit()
-        return True
+        except Exception as e:
+            print("Query error:", e)
+            return False
+
+async def set_main_task_status(task_id: int, new_status: str) -> bool:
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return False
+
+        try:
+            query = """
+                UPDATE task_status ts
+                SET 
+                    category_id = %s,
+                    definition = CASE
+                        WHEN %s = 'continue' THEN 'continue'
+                        WHEN %s = 'finished' THEN 'finished'
+                        ELSE definition
+                    END
+                WHERE ts.id = (
+                    SELECT last_status
+                    FROM tasks
+                    WHERE id = %s
+                )
+                RETURNING ts.project_code
+            """
+
+            await cur.execute(query, (new_status, new_status, new_status, task_id))
+            status_row = await cur.fetchone()
+            affected_users = await _task_dashboard_users(cur, task_id)
+            await conn.commit()
+            await invalidate_dashboards(affected_users)
+            # Durum tanımı yerinde değiştiği için proje sabitleri de tazelenmeli.
+            if status_row:
+                await invalidate_project_constants(status_row[0])
+
+            return True
+
+        except Exception as e:
+            print("UPDATE error:", e)
+            await conn.rollback()
+            return False
+
+async def set_sub_task_status(task_id: int, sub_id: int, new_status: str) -> bool:
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return False
+
+        try:
+            query = """
+                UPDATE task_status ts
+                SET 
+                    category_id = %s,
+                    definition = CASE
+                        WHEN %s = 'continue' THEN 'continue'
+                        WHEN %s = 'finished' THEN 'finished'
+                        ELSE definition
+                    END
+                WHERE ts.id = (
+                    SELECT td.status
+                    FROM task_detail td
+                    WHERE td.task_id = %s AND td.id = %s
+                )
+                RETURNING ts.project_code
+            """
+
+            await cur.execute(query, (new_status, new_status, new_status, task_id, sub_id))
+            status_row = await cur.fetchone()
+            affected_users = await _task_dashboard_users(cur, task_id)
+            await conn.commit()
+            await invalidate_dashboards(affected_users)
+            # Durum tanımı yerinde değiştiği için proje sabitleri de tazelenmeli.
+            if status_row:
+                await invalidate_project_constants(status_row[0])
+
+            return True
+
+        except Exception as e:
+            print("UPDATE error:", e)
+            await conn.rollback()
+            return False
+
+async def get_project_tasks(user_code: str, project_code: str):
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return False
+
+        try:
+            query = """
+                SELECT 
+                    t.id AS task_id,
+                    t.project_code,
+                    t.title,
+                    t.description,
+                    t.created_time,
+                    u_created.name || ' ' || u_created.surname AS created_by_name,
+                    t.start_date,
+                    t.end_date,
+                    ts.id AS status_id,
+                    ts.definition AS status_definition,
+                    ts.category_id AS status_category,
+                    tp.id AS priority_id,
+                    tp.definition AS priority_definition,
+                    tt.id AS type_id,
+                    tt.definition AS type_definition,
+                    (ARRAY_AGG(u_assigned.name || ' ' || u_assigned.surname) FILTER (WHERE u_assigned.code IS NOT NULL))::text[] AS assigned_users
+                FROM tasks t
+                LEFT JOIN users u_created ON t.created_by = u_created.code
+                LEFT JOIN task_status ts ON t.last_status = ts.id
+                LEFT JOIN task_priorities tp ON t.priority = tp.id
+                LEFT JOIN task_type tt ON t.type = tt.id
+                LEFT JOIN tasks_assignment ta ON t.id = ta.task_id
+                LEFT JOIN users u_assigned ON ta.user_code = u_assigned.code
+                WHERE t.project_code IN (
+                    -- Kullanıcının üye olduğu projelerden gelmeli
+                    SELECT project_code
+                    FROM members
+                    WHERE user_code = %s
+                )
+                -- Sadece dışarıdan gelen proje koduna ait görevleri filtrele
+                AND t.project_code = %s 
+                -- Ek olarak, görev ya kullanıcı tarafından oluşturulmuş olmalı ya da kullanıcıya atanmış olmalı (mevcut mantığınızı koruyarak)
+                AND (t.created_by = %s OR ta.user_code = %s) 
+                GROUP BY 
+                    t.id, t.project_code, t.title, t.description, t.created_time, u_created.name, u_created.surname,
+                    t.start_date, t.end_date,
+                    ts.id, ts.definition, ts.category_id,
+                    tp.id, tp.definition,
+                    tt.id, tt.definition
+                ORDER BY t.created_time DESC;
+            """
+
+            await cur.execute(query, (user_code, project_code, user_code, user_code))
+            tasks_rows = await cur.fetchall()
+
+            task_ids = [row[0] for row in tasks_rows]
+            sub_tasks_by_task = {task_id: [] for task_id in task_ids}
+
+            if task_ids:
+                await cur.execute("""
+                    SELECT 
+                        td.id,
+                        td.task_id,
+                        td.description,
+                        ts.category_id AS status_category, 
+                        u.name || ' ' || u.surname AS created_by,
+                        td.created_time
+                    FROM task_detail td
+                    LEFT JOIN task_status ts ON td.status = ts.id
+                    LEFT JOIN users u ON td.created_by = u.code
+                    WHERE td.task_id = ANY(%s)
+                    ORDER BY td.task_id, td.created_time ASC, td.id ASC;
+                """, (task_ids,))
+                for drow in await cur.fetchall():
+                    sub_tasks_by_task[drow[1]].append({
+                        "id": drow[0],
+                        "task_id": drow[1],
+                        "description": drow[2],
+                        "status": drow[3],
+                        "created_by": drow[4],
+                        "created_time": drow[5]
+                    })
+
+            tasks_result = []
+            for row in tasks_rows:
+                assigned_users = list(row[15] or [])
+                sub_tasks = sub_tasks_by_task[row[0]]
+
+                # Sonuç yapısı (Aynı Kalır)
+                tasks_result.append({
+                    "task_id": row[0],
+                    "project_code": row[1],
+                    "title": row[2],
+                    "description": row[3],
+                    "created_time": row[4],
+                    "created_by": row[5],
+                    "start_date": row[6],
+                    "end_date": row[7],
+                    "status_id": row[8],
+                    "status_definition": row[9],
+                    "status_category": row[10],
+                    "priority_id": row[11],
+                    "priority_definition": row[12],
+                    "type_id": row[13],
+                    "type_definition": row[14],
+                    "assigned_users": assigned_users,
+                    "sub_tasks": sub_tasks
+                })
 
-    except Exception as e:
-        print("Insert error:", e)
-        conn.rollback()
-        return False
+            return tasks_result
 
-    finally:
-        cur.close()
-        conn.close()
+        except Exception as e:
+            print("Query error:", e)
+            return False
 
-def get_tasks(user_code: str):
-    conn, cur = get_connection()
-    if conn is None:
-        return False
+async def get_details_for_task_edit(task_id: str, directory_version: str | None = None):
+    """Görev düzenleme ekranının verisini döndürür; görev yoksa None, hata olursa False döner."""
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return False
 
-    try:
-        query = """
-            SELECT 
-                t.id AS task_id,
-                t.project_code,
-                t.title,
-                t.description,
-                t.created_time,
-                u_created.name || ' ' || u_created.surname AS created_by_name,
-                t.start_date,
-                t.end_date,
-                ts.id AS status_id,
-                ts.definition AS status_definition,
-                tp.id AS priority_id,
-                tp.definition AS priority_definition,
-                tt.id AS type_id,
-                tt.definition AS type_definition,
-                ARRAY_AGG(u_assigned.name || ' ' || u_assigned.surname) 
-                    FILTER (WHERE u_assigned.code IS NOT NULL) AS assigned_users
-            FROM tasks t
-            LEFT JOIN users u_created ON t.created_by = u_created.code
-            LEFT JOIN task_status ts ON t.last_status = ts.id
-            LEFT JOIN task_priorities tp ON t.priority = tp.id
-            LEFT JOIN task_type tt ON t.type = tt.id
-            LEFT JOIN tasks_assignment ta ON t.id = ta.task_id
-            LEFT JOIN users u_assigned ON ta.user_code = u_assigned.code
-            WHERE t.project_code IN (
-                SELECT project_code
-                FROM members
-                WHERE user_code = %s
-            )
-            OR (t.created_by = %s OR ta.user_code = %s)
-            GROUP BY 
-                t.id, t.project_code, t.title, t.description, t.created_time, u_created.name, u_created.surname,
-                t.start_date, t.end_date,
-                ts.id, ts.definition,
-                tp.id, tp.definition,
-                tt.id, tt.definition
-            ORDER BY t.created_time DESC;
-        """
-
-        cur.execute(query, (user_code, user_code, user_code))
-        tasks_rows = cur.fetchall()
-
-        tasks_result = []
-        for row in tasks_rows:
-            assigned_users = list(row[14]) if isinstance(row[14], list) else []
-            task_id = row[0]
-
-            # 🧩 Subtasks
-            cur.execute("""
+        try:
+            query_task = """
                 SELECT 
-                    td.id,
-                    td.task_id,
-                    td.description,
-                    u_created.name || ' ' || u_created.surname AS created_by,
-                    td.created_time,
-                    ARRAY_AGG(u_assigned.name || ' ' || u_assigned.surname) 
-                        FILTER (WHERE u_assigned.code IS NOT NULL) AS assigned_users
-                FROM task_detail td
-                LEFT JOIN users u_created ON td.created_by = u_created.code
-                LEFT JOIN task_detail_assignment tda ON td.id = tda.detail_task_id
-                LEFT JOIN users u_assigned ON tda.assigned_user = u_assigned.code
-                WHERE td.task_id = %s
-                GROUP BY td.id, td.task_id, td.description, u_created.name, u_created.surname, td.created_time
-                ORDER BY td.created_time ASC;
-            """, (task_id,))
-            details_rows = cur.fetchall()
-
-            sub_tasks = [
+                    t.project_code, 
+                    t.title, 
+                    t.description, 
+                    t.start_date, 
+                    t.end_date, 
+                    ts.definition AS status_definition, 
+                    tt.definition AS type_definition, 
+                    tp.definition AS priority_definition,
+                    t.version
+                FROM public.tasks t
+                LEFT JOIN public.task_status ts ON t.last_status = ts.id
+                LEFT JOIN public.task_type tt ON t.type = tt.id
+                LEFT JOIN public.task_priorities tp ON t.priority = tp.id
+                WHERE t.id = %s
+                ORDER BY t.id ASC;
+            """
+            await cur.execute(query_task, (task_id,))
+            task_details = await cur.fetchone()
+            if not task_details:
+                return None
+
+            constants = await load_project_constants(cur, task_details[0])
+
+            # Attachments
+            query_attachments = "SELECT id, file_name, file_size, content_type, sha256 FROM public.attachments WHERE task_id = %s ORDER BY id ASC;"
+            await cur.execute(query_attachments, (task_id,))
+            attachments_rows = await cur.fetchall()
+            attachments = [
                 {
-                    "id": drow[0],
-                    "task_id": drow[1],
-                    "description": drow[2],
-                    "created_by": drow[3],
-                    "created_time": drow[4],
-                    "assigned_users": drow[5]
+                    "id": r[0],
+                    "name": r[1],
+                    "size": r[2],
+                    "content_type": r[3] or guess_content_type(r[1]),
+                    "hash": r[4]
                 }
-                for drow in details_rows
+                for r in attachments_rows
             ]
 
-            cur.execute("""
-                SELECT 
-                    id,
-                    file_name,
-                    encode(file, 'base64') AS file_data
-                FROM attachments
-                WHERE task_id = %s
-            """, (task_id,))
-            attachments_rows = cur.fetchall()
 
-            attachments = [
-                {"id": a[0], "name": a[1], "data": a[2]}
-                for a in attachments_rows
+            # Atananlar sadece kullanıcı kodlarıyla döner; isimler proje dizininden okunur.
+            await cur.execute("""
+                SELECT ARRAY(
+                    SELECT ta.user_code
+                    FROM public.tasks_assignment ta
+                    WHERE ta.task_id = %s
+                    ORDER BY ta.user_code
+                )
+            """, (task_id,))
+            assigned_member_ids = list((await cur.fetchone())[0] or [])
+
+            # Subtasks
+            query_subtasks = """
+                SELECT
+                    td.id AS subtask_id,
+                    td.description AS subtask_description,
+                    ARRAY(
+                        SELECT tda.assigned_user
+                        FROM public.task_detail_assignment tda
+                        WHERE tda.detail_task_id = td.id
+                        ORDER BY tda.assigned_user
+                    ) AS assigned_member_ids
+                FROM public.task_detail td
+                WHERE td.task_id = %s
+                ORDER BY td.id ASC;
+            """
+            await cur.execute(query_subtasks, (task_id,))
+            subtasks_rows = await cur.fetchall()
+            subtasks = [
+                {
+                    "subtask_id": s[0],
+                    "description": s[1],
+                    "assigned_member_ids": list(s[2] or [])
+                }
+                for s in subtasks_rows
             ]
 
-            tasks_result.append({
-                "task_id": row[0],
-                "project_code": row[1],
-                "title": row[2],
-                "description": row[3],
-                "created_time": row[4],
-                "created_by": row[5],
-                "start_date": row[6],
-                "end_date": row[7],
-                "status_id": row[8],
-                "status_definition": row[9],
-                "priority_id": row[10],
-                "priority_definition": row[11],
-                "type_id": row[12],
-                "type_definition": row[13],
-                "assigned_users": assigned_users,
-                "sub_tasks": sub_tasks,
-                "attachments": attachments
-            })
-
-        return tasks_result
-
-    except Exception as e:
-        print("Query error:", e)
-        return {"status": False, "error": str(e)}
-
-    finally:
-        cur.close()
-        conn.close()
+            directory = await load_project_user_directory(cur, task_details[0])
+            directory_codes = {user["code"] for user in directory["users"]}
 
-def set_main_task_status(task_id: int, new_status: str) -> bool:
-    conn, cur = get_connection()
-    if conn is None:
-        return False
-
-    try:
-        query = """
-            UPDATE task_status ts
-            SET 
-                category_id = %s,
-                definition = CASE
-                    WHEN %s = 'continue' THEN 'continue'
-                    WHEN %s = 'finished' THEN 'finished'
-                    ELSE definition
-                END
-            WHERE ts.id = (
-                SELECT last_status
-                FROM tasks
-                WHERE id = %s
-            )
-        """
+            # Projeden ayrılmış ama hâlâ atanmış kullanıcıların isimleri ayrıca gönderilir.
+            outside_codes = {
+                code
+                for code in assigned_member_ids + [c for s in subtasks for c in s["assigned_member_ids"]]
+                if code not in directory_codes
+            }
+            outside_directory = []
+            if outside_codes:
+                await cur.execute("""
+                    SELECT code, name || ' ' || surname
+                    FROM public.users
+                    WHERE code = ANY(%s)
+                    ORDER BY code
+                """, (list(outside_codes),))
+                outside_directory = [{"code": r[0], "name": r[1]} for r in await cur.fetchall()]
+
+            # İstemcideki dizin güncelse kullanıcı listesi tekrar gönderilmez.
+            if directory_version is not None and directory_version == directory["version"]:
+                directory = {"version": directory["version"], "not_modified": True}
+
+            # Sonuç
+            result = {
+                "status": True,
+                "task": {
+                    "project_code": task_details[0],
+                    "title": task_details[1],
+                    "description": task_details[2],
+                    "start_date": task_details[3],
+                    "end_date": task_details[4],
+                    "status_definition": task_details[5],
+                    "type_definition": task_details[6],
+                    "priority_definition": task_details[7],
+                    "version": task_details[8],
+                    "all_status_definitions": constants["statuses"],
+                    "all_type_definitions": constants["types"],
+                    "all_priority_definitions": constants["priorities"]
+                },
+                "attachments": attachments,
+                "directory": directory,
+                "users": {
+                    "assigned_member_ids": assigned_member_ids,
+                    "outside_directory": outside_directory
+                },
+                "subtasks": subtasks
+            }
 
-        cur.execute(query, (new_status, new_status, new_status, task_id))
-        conn.commit()
+            return result
 
-        return True
+        except Exception as e:
+            print("Query error:", e)
+            return False
 
-    except Exception as e:
-        print("UPDATE error:", e)
-        conn.rollback()
-        return False
+async def update_task(model: EditTaskFullModel):
+    task_id = int(model.task_id)
 
-    finally:
-        cur.close()
-        conn.close()
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return False
 
-def set_sub_task_status(task_id: int, sub_id: int, new_status: str) -> bool:
-    conn, cur = get_connection()
-    if conn is None:
-        return False
+        written_keys = []
+        removed_keys = []
+        try:
+            now = datetime.now()
 
-    try:
-        query = """
-            UPDATE task_status ts
-            SET 
-                category_id = %s,
-                definition = CASE
-                    WHEN %s = 'continue' THEN 'continue'
-                    WHEN %s = 'finished' THEN 'finished'
-                    ELSE definition
-                END
-            WHERE ts.id = (
-                SELECT td.status
-                FROM task_detail td
-                WHERE td.task_id = %s AND td.id = %s
+            # --- ATTACHMENTS ---
+            await cur.execute("""
+                SELECT id, file_name, storage_key, sha256
+                FROM attachments
+                WHERE task_id = %s
+            """, (task_id,))
+            attachments_rows = await cur.fetchall()
+            new_attachments = {a.name: a for a in model.attachments}
+
+            removed_rows = [a for a in attachments_rows if a[1] not in new_attachments]
+            if removed_rows:
+                await cur.execute("DELETE FROM attachments WHERE id = ANY(%s)", ([a[0] for a in removed_rows],))
+                removed_keys.extend(await release_blobs(cur, [a[3] for a in removed_rows if a[2] and a[3]]))
+
+            # Görevde zaten bulunan içerikler tekrar yüklense de yeni kayıt oluşturulmaz.
+            task_hashes = {a[3] for a in attachments_rows if a[1] in new_attachments and a[3]}
+
+            attachment_rows = []
+            for attachment in model.attachments:
+
+                # Listeden gelen mevcut ekler sadece metadata taşır, içerikleri yoktur.
+                if attachment.size > 0 and attachment.data:
+                    file_data = decode_attachment_data(attachment.data)
+                    meta = describe_attachment(attachment.name, file_data)
+                    if meta["sha256"] in task_hashes:
+                        continue
+
+                    meta, created_key = await store_blob_bytes(cur, attachment.name, file_data, meta)
+                    if created_key:
+                        written_keys.append(created_key)
+                    task_hashes.add(meta["sha256"])
+                    attachment_rows.append((attachment.name, meta))
+            await _insert_attachments(cur, task_id, model.user_code, attachment_rows)
+
+            # --- TASKS ---
+            status_id, priority_id, type_id = await _resolve_constant_ids(
+                cur,
+                model.project_code,
+                model.status_definition,
+                model.priority_definition,
+                model.type_definition
             )
-        """
-
-        cur.execute(query, (new_status, new_status, new_status, task_id, sub_id))
-        conn.commit()
-        
-        return True
-
-    except Exception as e:
-        print("UPDATE error:", e)
-        conn.rollback()
-        return False
 
-    finally:
-        cur.close()
-        conn.close()
+            await cur.execute("""
+                UPDATE tasks
+                SET title = %s,
+                    description = %s,
+                    start_date = %s,
+                    end_date = %s,
+                    last_status = %s,
+                    priority = %s,
+                    type = %s,
+                    version = version + 1
+                WHERE id = %s
+                RETURNING created_by
+            """, (
+                model.title,
+                model.description,
+                model.startDate,
+                model.endDate,
+                status_id,
+                priority_id,
+                type_id,
+                task_id
+            ))
+            created_by_row = await cur.fetchone()
+
+            # --- TASKS ASSIGNMENT ---
+            # Listede olmayan atamalar silinir, yeniler eklenir; önceki atananlar döner.
+            new_members = list(dict.fromkeys(m.code for m in model.assigned_members))
+            await cur.execute("""
+                WITH incoming AS (
+                    SELECT unnest(%(members)s::text[]) AS user_code
+                ),
+                current_members AS (
+                    SELECT user_code FROM tasks_assignment WHERE task_id = %(task_id)s
+                ),
+                removed AS (
+                    DELETE FROM tasks_assignment
+                    WHERE task_id = %(task_id)s
+                      AND user_code NOT IN (SELECT user_code FROM incoming)
+                ),
+                inserted AS (
+                    INSERT INTO tasks_assignment (task_id, user_code, assigned_at, assigned_by)
+                    SELECT %(task_id)s, i.user_code, %(now)s, %(user_code)s
+                    FROM incoming i
+                    WHERE i.user_code NOT IN (SELECT user_code FROM current_members)
+                )
+                SELECT user_code FROM current_members
+            """, {
+                "task_id": task_id,
+                "members": new_members,
+                "now": now,
+                "user_code": model.user_code
+            })
+            current_members = {row[0] for row in await cur.fetchall()}
 
-def get_project_tasks(user_code: str, project_code: str):
-    conn, cur = get_connection()
-    if conn is None:
-        return False
+            # Atamadan çıkarılanların da dashboard'u değişir.
+            affected_users = current_members | set(new_members)
+            if created_by_row:
+                affected_users.add(created_by_row[0])
 
-    try:
-        query = """
-            SELECT 
-                t.id AS task_id,
-                t.project_code,
-                t.title,
-                t.description,
-                t.created_time,
-                u_created.name || ' ' || u_created.surname AS created_by_name,
-                t.start_date,
-                t.end_date,
-                ts.id AS status_id,
-                ts.definition AS status_definition,
-                ts.category_id AS status_category,
-                tp.id AS priority_id,
-                tp.definition AS priority_definition,
-                tt.id AS type_id,
-                tt.definition AS type_definition,
-                ARRAY_AGG(u_assigned.name || ' ' || u_assigned.surname) FILTER (WHERE u_assigned.code IS NOT NULL) AS assigned_users
-            FROM tasks t
-            LEFT JOIN users u_created ON t.created_by = u_created.code
-            LEFT JOIN task_status ts ON t.last_status = ts.id
-            LEFT JOIN task_priorities tp ON t.priority = tp.id
-            LEFT JOIN task_type tt ON t.type = tt.id
-            LEFT JOIN tasks_assignment ta ON t.id = ta.task_id
-            LEFT JOIN users u_assigned ON ta.user_code = u_assigned.code
-            WHERE t.project_code IN (
-                -- Kullanıcının üye olduğu projelerden gelmeli
-                SELECT project_code
-                FROM members
-                WHERE user_code = %s
-            )
-            -- Sadece dışarıdan gelen proje koduna ait görevleri filtrele
-            AND t.project_code = %s 
-            -- Ek olarak, görev ya kullanıcı tarafından oluşturulmuş olmalı ya da kullanıcıya atanmış olmalı (mevcut mantığınızı koruyarak)
-            AND (t.created_by = %s OR ta.user_code = %s) 
-            GROUP BY 
-                t.id, t.project_code, t.title, t.description, t.created_time, u_created.name, u_created.surname,
-                t.start_date, t.end_date,
-                ts.id, ts.definition, ts.category_id,
-                tp.id, tp.definition,
-                tt.id, tt.definition
-            ORDER BY t.created_time DESC;
-        """
-
-        cur.execute(query, (user_code, project_code, user_code, user_code))
-        tasks_rows = cur.fetchall()
-
-        tasks_result = []
-        for row in tasks_rows:
-            assigned_users = row[15] or []
-            if isinstance(assigned_users, str):
-                assigned_users = [name.strip().strip('"') for name in assigned_users.strip("{}").split(",") if name.strip()]
-
-            task_id = row[0]
-
-            cur.execute("""
-                SELECT 
-                    td.id,
-                    td.task_id,
-                    td.description,
-                    ts.category_id AS status_category, 
-                    u.name || ' ' || u.surname AS created_by,
-                    td.created_time
-                FROM task_detail td
-                LEFT JOIN task_status ts ON td.status = ts.id
-                LEFT JOIN users u ON td.created_by = u.code
-                WHERE td.task_id = %s
-                ORDER BY td.created_time ASC;
+            # --- SUBTASKS ---
+            await cur.execute("""
+                SELECT id, description
+                FROM task_detail
+                WHERE task_id = %s
             """, (task_id,))
-            details_rows = cur.fetchall()
-
-            sub_tasks = []
-            for drow in details_rows:
-                sub_tasks.append({
-                    "id": drow[0],
-                    "task_id": drow[1],
-                    "description": drow[2],
-                    "status": drow[3],
-                    "created_by": drow[4],
-                    "created_time": drow[5]
+            existing_subtasks = dict(await cur.fetchall())
+
+            # Gelen alt görevler önce id'leriyle, id'si bu göreve ait değilse açıklamasıyla eşlenir.
+            existing_by_description = {}
+            for subtask_id, description in existing_subtasks.items():
+                existing_by_description.setdefault(description, subtask_id)
+
+            kept = {}
+            to_insert = []
+            for incoming in model.subtasks_raw:
+                subtask_id = incoming.subtask_id if incoming.subtask_id in existing_subtasks else None
+                if subtask_id is None or subtask_id in kept:
+                    subtask_id = existing_by_description.get(incoming.description)
+                if subtask_id is None or subtask_id in kept:
+                    to_insert.append(incoming)
+                else:
+                    kept[subtask_id] = incoming
+
+            to_delete = [subtask_id for subtask_id in existing_subtasks if subtask_id not in kept]
+            if to_delete:
+                await cur.execute("""
+                    WITH removed_assignments AS (
+                        DELETE FROM task_detail_assignment
+                        WHERE detail_task_id = ANY(%(ids)s)
+                    )
+                    DELETE FROM task_detail
+                    WHERE id = ANY(%(ids)s)
+                """, {"ids": to_delete})
+
+            renamed = {
+                subtask_id: incoming.description
+                for subtask_id, incoming in kept.items()
+                if existing_subtasks[subtask_id] != incoming.description
+            }
+            if renamed:
+                await cur.execute("""
+                    UPDATE task_detail td
+                    SET description = r.description
+                    FROM unnest(%s::bigint[], %s::text[]) AS r(id, description)
+                    WHERE td.id = r.id
+                """, (list(renamed.keys()), list(renamed.values())))
+
+            await _insert_subtasks(cur, task_id, model.user_code, now, [
+                (incoming.description, [member.code for member in incoming.assigned_members])
+                for incoming in to_insert
+            ])
+
+            # Kalan alt görevlerin atamaları tek ifadede eşitlenir.
+            if kept:
+                assignment_ids = []
+                assignment_users = []
+                for subtask_id, incoming in kept.items():
+                    for user_code in dict.fromkeys(member.code for member in incoming.assigned_members):
+                        assignment_ids.append(subtask_id)
+                        assignment_users.append(user_code)
+
+                await cur.execute("""
+                    WITH incoming AS (
+                        SELECT *
+                        FROM unnest(%(ids)s::bigint[], %(users)s::text[]) AS a(detail_task_id, assigned_user)
+                    ),
+                    removed AS (
+                        DELETE FROM task_detail_assignment tda
+                        WHERE tda.detail_task_id = ANY(%(kept)s)
+                          AND NOT EXISTS (
+                              SELECT 1 FROM incoming i
+                              WHERE i.detail_task_id = tda.detail_task_id
+                                AND i.assigned_user = tda.assigned_user
+                          )
+                    )
+                    INSERT INTO task_detail_assignment (detail_task_id, assigned_user, timestamp)
+                    SELECT i.detail_task_id, i.assigned_user, %(now)s
+                    FROM incoming i
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM task_detail_assignment tda
+                        WHERE tda.detail_task_id = i.detail_task_id
+                          AND tda.assigned_user = i.assigned_user
+                    )
+                """, {
+                    "ids": assignment_ids,
+                    "users": assignment_users,
+                    "kept": list(kept.keys()),
+                    "now": now
                 })
 
-            # Sonuç yapısı (Aynı Kalır)
-            tasks_result.append({
-                "task_id": row[0],
-                "project_code": row[1],
-                "title": row[2],
-                "description": row[3],
-                "created_time": row[4],
-                "created_by": row[5],
-                "start_date": row[6],
-                "end_date": row[7],
-                "status_id": row[8],
-                "status_definition": row[9],
-                "status_category": row[10],
-                "priority_id": row[11],
-                "priority_definition": row[12],
-                "type_id": row[13],
-                "type_definition": row[14],
-                "assigned_users": assigned_users,
-                "sub_tasks": sub_tasks
-            })
-
-        return tasks_result
-
-    except Exception as e:
-        print("Query error:", e)
-        return {"status": False, "error": str(e)}
-
-    finally:
-        if cur:
-            cur.close()
-        if conn:
-            conn.close()
+            # Commit
+            await conn.commit()
+            await discard_blobs(removed_keys)
+            await invalidate_dashboards(affected_users)
+            return True
+
+        except Exception as e:
+            if conn:
+                await conn.rollback()
+            await discard_blobs(written_keys)
+            print("Query error:", e)
+            return False
+
+async def patch_task(model: TaskPatchModel):
+    """Sadece gönderilen alanları ve koleksiyon farklarını uygular.
+
+    Görev yoksa None döner; sürüm uyuşmazsa TaskVersionConflict fırlatılır.
+    """
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return False
+
+        removed_keys = []
+        try:
+            now = datetime.now()
+
+            await cur.execute("""
+                SELECT project_code, version
+                FROM tasks
+                WHERE id = %s
+                FOR UPDATE
+            """, (model.task_id,))
+            task_row = await cur.fetchone()
+            if task_row is None:
+                return None
+            project_code, version = task_row
+            if version != model.version:
+                raise TaskVersionConflict(version)
+
+            # --- TASK ---
+            columns = {
+                column: model.changes[field]
+                for field, column in (
+                    ("title", "title"),
+                    ("description", "description"),
+                    ("start_date", "start_date"),
+                    ("end_date", "end_date")
+                )
+                if field in model.changes
+            }
+            definitions = [model.changes.get(f"{kind}_definition") for kind in ("status", "priority", "type")]
+            if any(definition is not None for definition in definitions):
+                constant_ids = await _resolve_constant_ids(cur, project_code, *definitions)
+                for column, constant_id in zip(("last_status", "priority", "type"), constant_ids):
+                    if constant_id is not None:
+                        columns[column] = constant_id
+
+            assignments = [
+                sql.SQL("{} = %s").format(sql.Identifier(column)) for column in columns
+            ]
+            await cur.execute(sql.SQL("""
+                UPDATE tasks
+                SET {assignments}
+                WHERE id = %s
+                RETURNING version
+            """).format(assignments=sql.SQL(", ").join(
+                assignments + [sql.SQL("version = version + 1")]
+            )), (*columns.values(), model.task_id))
+            new_version = (await cur.fetchone())[0]
+
+            # --- TASKS ASSIGNMENT ---
+            if model.remove_members:
+                await cur.execute("""
+                    DELETE FROM tasks_assignment
+                    WHERE task_id = %s AND user_code = ANY(%s)
+                """, (model.task_id, model.remove_members))
+            if model.add_members:
+                await cur.execute("""
+                    INSERT INTO tasks_assignment (task_id, user_code, assigned_at, assigned_by)
+                    SELECT %s, u.user_code, %s, %s
+                    FROM unnest(%s::text[]) AS u(user_code)
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM tasks_assignment ta
+                        WHERE ta.task_id = %s AND ta.user_code = u.user_code
+                    )
+                """, (model.task_id, now, model.user_code, list(dict.fromkeys(model.add_members)), model.task_id))
+
+            # --- ATTACHMENTS ---
+            if model.remove_attachments:
+                await cur.execute("""
+                    DELETE FROM attachments
+                    WHERE task_id = %s AND id = ANY(%s)
+                    RETURNING storage_key, sha256
+                """, (model.task_id, model.remove_attachments))
+                removed_rows = await cur.fetchall()
+                removed_keys.extend(await release_blobs(cur, [r[1] for r in removed_rows if r[0] and r[1]]))
+
+            # --- SUBTASKS ---
+            if model.remove_subtasks:
+                await cur.execute("""
+                    WITH targets AS (
+                        SELECT id FROM task_detail
+                        WHERE task_id = %(task_id)s AND id = ANY(%(ids)s)
+                    ),
+                    removed_assignments AS (
+                        DELETE FROM task_detail_assignment
+                        WHERE detail_task_id IN (SELECT id FROM targets)
+                    )
+                    DELETE FROM task_detail
+                    WHERE id IN (SELECT id FROM targets)
+                """, {"task_id": model.task_id, "ids": model.remove_subtasks})
+
+            await _insert_subtasks(cur, model.task_id, model.user_code, now, [
+                (subtask.description, subtask.add_members)
+                for subtask in model.add_subtasks
+            ])
+
+            if model.update_subtasks:
+                updates = {subtask.subtask_id: subtask for subtask in model.update_subtasks}
+                renamed = {sid: u.description for sid, u in updates.items() if u.description is not None}
+                removed_pairs = [(sid, code) for sid, u in updates.items() for code in u.remove_members]
+                added_pairs = [(sid, code) for sid, u in updates.items() for code in dict.fromkeys(u.add_members)]
+
+                # Sadece bu göreve ait alt görevler değiştirilir.
+                await cur.execute("""
+                    WITH owned AS (
+                        SELECT id FROM task_detail
+                        WHERE task_id = %(task_id)s AND id = ANY(%(ids)s)
+                    ),
+                    renamed AS (
+                        UPDATE task_detail td
+                        SET description = r.description
+                        FROM unnest(%(rename_ids)s::bigint[], %(rename_values)s::text[]) AS r(id, description)
+                        WHERE td.id = r.id AND td.id IN (SELECT id FROM owned)
+                    ),
+                    removed AS (
+                        DELETE FROM task_detail_assignment tda
+                        USING unnest(%(remove_ids)s::bigint[], %(remove_users)s::text[]) AS r(detail_task_id, assigned_user)
+                        WHERE tda.detail_task_id = r.detail_task_id
+                          AND tda.assigned_user = r.assigned_user
+                          AND tda.detail_task_id IN (SELECT id FROM owned)
+                    )
+                    INSERT INTO task_detail_assignment (detail_task_id, assigned_user, timestamp)
+                    SELECT a.detail_task_id, a.assigned_user, %(now)s
+                    FROM unnest(%(add_ids)s::bigint[], %(add_users)s::text[]) AS a(detail_task_id, assigned_user)
+                    WHERE a.detail_task_id IN (SELECT id FROM owned)
+                      AND NOT EXISTS (
+                          SELECT 1 FROM task_detail_assignment tda
+                          WHERE tda.detail_task_id = a.detail_task_id
+                            AND tda.assigned_user = a.assigned_user
+                      )
+                """, {
+                    "task_id": model.task_id,
+                    "ids": list(updates.keys()),
+                    "rename_ids": list(renamed.keys()),
+                    "rename_values": list(renamed.values()),
+                    "remove_ids": [sid for sid, _ in removed_pairs],
+                    "remove_users": [code for _, code in removed_pairs],
+                    "add_ids": [sid for sid, _ in added_pairs],
+                    "add_users": [code for _, code in added_pairs],
+                    "now": now
+                })
 
-def get_details_for_task_edit(task_id: str):
-    conn, cur = get_connection()
-    if conn is None:
-        return {"status": False, "error": "DB connection failed"}
+            affected_users = await _task_dashboard_users(cur, model.task_id)
+            affected_users.update(model.remove_members)
 
-    try:
-        query_task = """
-            SELECT 
-                t.project_code, 
-                t.title, 
-                t.description, 
-                t.start_date, 
-                t.end_date, 
-                ts.definition AS status_definition, 
-                tt.definition AS type_definition, 
-                tp.definition AS priority_definition, 
-                (SELECT array_agg(s.definition ORDER BY s.id ASC) FROM public.task_status s WHERE t.project_code = s.project_code) AS all_status_definitions, 
-                (SELECT array_agg(ty.definition ORDER BY ty.id ASC) FROM public.task_type ty WHERE t.project_code = ty.project_code) AS all_type_definitions, 
-                (SELECT array_agg(p.definition ORDER BY p.id ASC) FROM public.task_priorities p WHERE t.project_code = p.project_code) AS all_priority_definitions
-            FROM public.tasks t
-            LEFT JOIN public.task_status ts ON t.last_status = ts.id
-            LEFT JOIN public.task_type tt ON t.type = tt.id
-            LEFT JOIN public.task_priorities tp ON t.priority = tp.id
-            WHERE t.id = %s
-            ORDER BY t.id ASC;
-        """
-        cur.execute(query_task, (task_id,))
-        task_details = cur.fetchone()
-        if not task_details:
-            return {"status": False, "error": "Task not found"}
-
-        # Attachments
-        query_attachments = "SELECT encode(file, 'base64') AS file_data, file_name FROM public.attachments WHERE task_id = %s ORDER BY id ASC;"
-        cur.execute(query_attachments, (task_id,))
-        attachments_rows = cur.fetchall()
-        attachments = [
-            {"name": r[1], "data": r[0], "size":0}
-            for r in attachments_rows
-        ]
-
-                    
-        # Users
-        query_users = """
-            SELECT
-                (SELECT json_agg(json_build_object('name', u.name || ' ' || u.surname, 'code', u.code) ORDER BY u.code ASC)
-                 FROM public.tasks_assignment ta
-                 JOIN public.users u ON ta.user_code = u.code
-                 WHERE ta.task_id = %s) AS assigned_members,
-                (SELECT json_agg(json_build_object('name', u.name || ' ' || u.surname, 'code', u.code) ORDER BY u.code ASC)
-                 FROM public.users u
-                 WHERE u.code NOT IN (
-                     SELECT ta.user_code FROM public.tasks_assignment ta WHERE ta.task_id = %s
-                 )
-                 AND u.code <> (SELECT t.created_by FROM public.tasks t WHERE t.id = %s)
-                ) AS unassigned_members;
-        """
-        cur.execute(query_users, (task_id, task_id, task_id))
-        users_row = cur.fetchone()
-        assigned_members = users_row[0] or []
-        unassigned_members = users_row[1] or []
-
-        # Subtasks
-        query_subtasks = """
-            SELECT
-                td.id AS subtask_id,
-                td.description AS subtask_description,
-                (SELECT json_agg(json_build_object('name', u.name || ' ' || u.surname, 'code', u.code) ORDER BY u.code ASC)
-                 FROM public.task_detail_assignment tda
-                 JOIN public.users u ON tda.assigned_user = u.code
-                 WHERE tda.detail_task_id = td.id) AS assigned_members,
-                (SELECT json_agg(json_build_object('name', u.name || ' ' || u.surname, 'code', u.code) ORDER BY u.code ASC)
-                 FROM public.users u
-                 WHERE u.code NOT IN (
-                     SELECT tda.assigned_user FROM public.task_detail_assignment tda WHERE tda.detail_task_id = td.id
-                 )
-                 AND u.code <> td.created_by
-                ) AS unassigned_members
-            FROM public.task_detail td
-            WHERE td.task_id = %s
-            ORDER BY td.id ASC;
-        """
-        cur.execute(query_subtasks, (task_id,))
-        subtasks_rows = cur.fetchall()
-        subtasks = [
-            {
-                "subtask_id": s[0],
-                "description": s[1],
-                "assigned_members": s[2] or [],
-                "unassigned_members": s[3] or []
-            }
-            for s in subtasks_rows
-        ]
-
-        # Sonuç
-        result = {
-            "status": True,
-            "task": {
-                "project_code": task_details[0],
-                "title": task_details[1],
-                "description": task_details[2],
-                "start_date": task_details[3],
-                "end_date": task_details[4],
-                "status_definition": task_details[5],
-                "type_definition": task_details[6],
-                "priority_definition": task_details[7],
-                "all_status_definitions": task_details[8] or [],
-                "all_type_definitions": task_details[9] or [],
-                "all_priority_definitions": task_details[10] or []
-            },
-            "attachments": attachments,
-            "users": {
-                "assigned_members": assigned_members,
-                "unassigned_members": unassigned_members
-            },
-            "subtasks": subtasks
-        }
-
-        return result
+            await conn.commit()
+            await discard_blobs(removed_keys)
+            await invalidate_dashboards(affected_users)
+            return {"version": new_version}
 
-    except Exception as e:
-        print("Query error:", e)
-        return {"status": False, "error": str(e)}
+        except TaskVersionConflict:
+            await conn.rollback()
+            raise
 
-    finally:
-        if cur: cur.close()
-        if conn: conn.close()
+        except Exception as e:
+            print("Query error:", e)
+            await conn.rollback()
+            return False
 
-def update_task(model: EditTaskFullModel):
-    conn, cur = get_connection()
-    if conn is None:
-        return False
+async def get_attachment(attachment_id: int):
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return False
 
-    try:
-        # Transaction başlat
-        conn.autocommit = False
-
-        # --- ATTACHMENTS ---
-        cur.execute("""
-            SELECT id, file_name
-            FROM attachments
-            WHERE task_id = %s
-        """, (model.task_id,))
-        attachments_rows = cur.fetchall()
-        old_attachments = {a[1]: a[0] for a in attachments_rows}
-        new_attachments = {a.name: a for a in model.attachments}
-
-        for file_name, file_id in old_attachments.items():
-            if file_name not in new_attachments:
-                cur.execute("DELETE FROM attachments WHERE id = %s", (file_id,))
-
-        for attachment in model.attachments:
-
-            if attachment.size > 0:
-                cur.execute("""
-                    INSERT INTO attachments (
-                        task_id, file, uploaded_at, owner_code, file_name
-                    )
-                    VALUES (%s, %s, %s, %s, %s)
-                """, (
-                    model.task_id,
-                    bytes(attachment.data),
-                    datetime.now(),
-                    model.user_code,
-                    attachment.name
-                ))
+        try:
+            await cur.execute("""
+                SELECT id, file_name, file_size, content_type, sha256, uploaded_at, storage_key
+                FROM attachments
+                WHERE id = %s
+            """, (attachment_id,))
+            row = await cur.fetchone()
+            if not row:
+                return None
+
+            return {
+                "id": row[0],
+                "name": row[1],
+                "size": row[2],
+                "content_type": row[3] or guess_content_type(row[1]),
+                "hash": row[4],
+                "uploaded_at": row[5],
+                "storage_key": row[6]
+            }
 
-        # --- TASKS ---
-        cur.execute("""
-            SELECT ts.id
-            FROM task_status ts
-            WHERE ts.project_code = %s AND ts.definition = %s
-        """, (model.project_code, model.status_definition))
-        status_id = cur.fetchone()[0]
-
-        cur.execute("""
-            SELECT tp.id
-            FROM task_priorities tp
-            WHERE tp.project_code = %s AND tp.definition = %s
-        """, (model.project_code, model.priority_definition))
-        priority_id = cur.fetchone()[0]
-
-        cur.execute("""
-            SELECT tt.id
-            FROM task_type tt
-            WHERE tt.project_code = %s AND tt.definition = %s
-        """, (model.project_code, model.type_definition))
-        type_id = cur.fetchone()[0]
-
-        cur.execute("""
-            UPDATE tasks
-            SET title = %s,
-                description = %s,
-                start_date = %s,
-                end_date = %s,
-                last_status = %s,
-                priority = %s,
-                type = %s
-            WHERE id = %s
-        """, (
-            model.title,
-            model.description,
-            model.startDate,
-            model.endDate,
-            status_id,
-            priority_id,
-            type_id,
-            int(model.task_id)
-        ))
-
-        # --- TASKS ASSIGNMENT ---
-        cur.execute("""
-            SELECT user_code
-            FROM tasks_assignment
-            WHERE task_id = %s
-        """, (model.task_id,))
-        current_members = set([row[0] for row in cur.fetchall()])
-        new_members = set([m.code for m in model.assigned_members])
-
-        to_delete = current_members - new_members
-        to_insert = new_members - current_members
-
-        if to_delete:
-            cur.execute("""
-                DELETE FROM tasks_assignment
-                WHERE task_id = %s AND user_code = ANY(%s)
-            """, (model.task_id, list(to_delete)))
-
-        for member_code in to_insert:
-            cur.execute("""
-                INSERT INTO tasks_assignment (task_id, user_code, assigned_at, assigned_by)
-                VALUES (%s, %s, NOW(), %s)
-            """, (model.task_id, member_code, model.user_code))
-
-        # --- SUBTASKS ---
-        cur.execute("""
-            SELECT id, description
-            FROM task_detail
-            WHERE task_id = %s
-        """, (model.task_id,))
-        existing_subtasks = {row[1]: row[0] for row in cur.fetchall()}
-        new_subtasks = set([sub.description for sub in model.subtasks_raw])
-
-        to_delete = set(existing_subtasks.keys()) - new_subtasks
-        to_insert = new_subtasks - set(existing_subtasks.keys())
-        still_exist = new_subtasks & set(existing_subtasks.keys())
-
-        # Silme işlemleri
-        for desc in to_delete:
-            subtask_id = existing_subtasks[desc]
-            cur.execute("""
-                DELETE FROM task_detail_assignment
-                WHERE detail_task_id = %s
-            """, (subtask_id,))
-            cur.execute("""
-                DELETE FROM task_detail
+        except Exception as e:
+            print("Query error:", e)
+            return False
+
+async def read_attachment(attachment: dict, start: int, length: int, chunk_size: int = 1024 * 1024):
+    if attachment["storage_key"]:
+        async for chunk in get_storage().read(attachment["storage_key"], start, length):
+            yield chunk
+        return
+
+    # Henüz depoya taşınmamış eski kayıtlar bytea sütunundan okunur.
+    # Her parça ayrı bir bağlantıyla okunur; yavaş istemciler havuzdaki bağlantıyı tutmaz.
+    offset = start
+    remaining = length
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        async with get_connection() as (conn, cur):
+            if conn is None:
+                return
+
+            await cur.execute("""
+                SELECT substring(file FROM %s FOR %s)
+                FROM attachments
                 WHERE id = %s
-            """, (subtask_id,))
-
-        # Ekleme işlemleri
-        for desc in to_insert:
-            cur.execute("""
-                INSERT INTO task_detail (task_id, description, created_by)
-                VALUES (%s, %s, %s) RETURNING id
-            """, (model.task_id, desc, model.user_code))
-            subtask_id = cur.fetchone()[0]
-
-            incoming_subtask = next(
-                (s for s in model.subtasks_raw if s.subtask_id == subtask_id),
-                None
-            )
+            """, (offset + 1, size, attachment["id"]))
+            row = await cur.fetchone()
 
-            if incoming_subtask is None:
-                users = set()
-            else:
-                users = set(member.code for member in incoming_subtask.assigned_members)
+        if not row or not row[0]:
+            return
 
-            for member in users:
-                cur.execute("""
-                    INSERT INTO task_detail_assignment (detail_task_id, assigned_user, timestamp)
-                    VALUES (%s, %s, NOW())
-                """, (subtask_id, member.code))
-
-        # Hâlâ olan subtasks için assignment güncelleme
-        for desc in still_exist:
-            subtask_id = existing_subtasks[desc]
-
-            cur.execute("""
-                SELECT assigned_user
-                FROM task_detail_assignment
-                WHERE detail_task_id = %s
-            """, (subtask_id,))
-            current_members = set(row[0] for row in cur.fetchall())
-
-            incoming_subtask = next(
-                (s for s in model.subtasks_raw if s.subtask_id == subtask_id),
-                None
-            )
+        chunk = bytes(row[0])
+        yield chunk
+        offset += len(chunk)
+        remaining -= len(chunk)
 
-            if incoming_subtask is None:
-                new_members = set()
-            else:
-                new_members = set(member.code for member in incoming_subtask.assigned_members)
+async def store_attachment_stream(task_id: int, user_code: str, file_name: str, content_type: str | None, chunks, max_size: int = MAX_ATTACHMENT_SIZE):
+    """Yüklenen dosyayı parça parça depoya yazar; boyut ve SHA-256 akış sırasında hesaplanır.
 
-            for user_code in current_members:
-                if user_code not in new_members:
-                    cur.execute("""
-                        DELETE FROM task_detail_assignment
-                        WHERE detail_task_id = %s AND assigned_user = %s
-                    """, (subtask_id, user_code))
-
-            # Eklenmesi gerekenler
-            for user_code in new_members:
-                if user_code not in current_members:
-                    cur.execute("""
-                        INSERT INTO task_detail_assignment (detail_task_id, assigned_user, assigned_at)
-                        VALUES (%s, %s, NOW())
-                    """, (subtask_id, user_code))
-        # Commit
-        conn.commit()
-        return True
+    Aynı içerik daha önce yüklendiyse depoya tekrar yazılmaz, sadece metadata eklenir.
+    """
+    content_type = content_type or guess_content_type(file_name)
+
+    def check_size(size: int):
+        if size > max_size:
+            raise AttachmentTooLarge(f"{file_name} exceeds {max_size} bytes")
 
+    try:
+        tmp_key, sha256, size = await write_temp_blob(chunks, on_chunk=check_size)
+    except (AttachmentTooLarge, InvalidMultipart):
+        # Yarım kalan geçici içerik depo tarafından silinir; hata route'a iletilir.
+        raise
     except Exception as e:
-        if conn:
-            conn.rollback()
-        print("Query error:", e)
+        print("Storage write error:", e)
         return False
 
-    finally:
-        if cur: cur.close()
-        if conn: conn.close()
\ No newline at end of file
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            await discard_blobs([tmp_key])
+            return False
+
+        created_key = None
+        try:
+            storage_key, created_key = await commit_temp_blob(cur, tmp_key, sha256, size)
+            await cur.execute("""
+                INSERT INTO attachments (
+                    task_id, storage_key, uploaded_at, owner_code, file_name,
+                    file_size, content_type, sha256
+                )
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                RETURNING id
+            """, (
+                task_id,
+                storage_key,
+                datetime.now(),
+                user_code,
+                file_name,
+                size,
+                content_type,
+                sha256
+            ))
+            attachment_id = (await cur.fetchone())[0]
+
+            await conn.commit()
+            return {
+                "id": attachment_id,
+                "name": file_name,
+                "size": size,
+                "content_type": content_type,
+                "hash": sha256
+            }
+
+        except Exception as e:
+            print("Insert error:", e)
+            await conn.rollback()
+            if created_key:
+                await discard_blobs([created_key])
+            return False
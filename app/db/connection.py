@@ -1,4 +1,8 @@
-import psycopg2
+import os
+from contextlib import asynccontextmanager
+
+from psycopg import pq
+from psycopg_pool import AsyncConnectionPool
 
 DB_HOST = "localhost"
 DB_NAME = "project"
@@ -6,19 +10,77 @@ DB_USER = "postgres"
 DB_PASSWORD = "password"
 DB_PORT = 5432
 
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", 2))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", 20))
+# Havuzdan bağlantı beklerken en fazla bu kadar saniye beklenir.
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+# Bu süreden uzun boşta kalan bağlantılar (min_size üzerindekiler) kapatılır.
+DB_POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", 300))
+
+_pool: AsyncConnectionPool | None = None
+
+
+async def init_pool(min_size: int = DB_POOL_MIN_SIZE, max_size: int = DB_POOL_MAX_SIZE):
+    global _pool
+    if _pool is not None:
+        return _pool
+
+    _pool = AsyncConnectionPool(
+        kwargs={
+            "host": DB_HOST,
+            "dbname": DB_NAME,
+            "user": DB_USER,
+            "password": DB_PASSWORD,
+            "port": DB_PORT,
+        },
+        min_size=min_size,
+        max_size=max_size,
+        timeout=DB_POOL_TIMEOUT,
+        max_idle=DB_POOL_MAX_IDLE,
+        # Havuzdan alınan her bağlantı kullanılmadan önce kontrol edilir.
+        check=AsyncConnectionPool.check_connection,
+        open=False,
+    )
+    await _pool.open()
+    print("✅ Veritabanı bağlantı havuzu oluşturuldu.")
+    return _pool
+
+
+async def close_pool():
+    global _pool
+    if _pool is None:
+        return
 
-def get_connection():
+    await _pool.close()
+    _pool = None
+    print("✅ Veritabanı bağlantı havuzu kapatıldı.")
+
+
+@asynccontextmanager
+async def get_connection():
+    """Havuzdan bir bağlantı ve cursor verir, blok bitince bağlantıyı havuza iade eder.
+
+    Bağlantı alınamazsa (None, None) döner; controller'lar bunu kontrol eder.
+    """
     try:
-        conn = psycopg2.connect(
-            host=DB_HOST,
-            database=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            port=DB_PORT
-        )
-        cur = conn.cursor()
-        print("✅ Veritabanına başarıyla bağlanıldı.")
-        return conn, cur
+        if _pool is None:
+            await init_pool()
+        conn = await _pool.getconn()
     except Exception as e:
         print("❌ Bağlantı hatası:", e)
-        return None, None
\ No newline at end of file
+        conn = None
+
+    if conn is None:
+        yield None, None
+        return
+
+    try:
+        async with conn.cursor() as cur:
+            yield conn, cur
+    finally:
+        if not conn.closed and conn.info.transaction_status != pq.TransactionStatus.IDLE:
+            try:
+                await conn.rollback()
+            except Exception:
+                pass
+        await _pool.putconn(conn)
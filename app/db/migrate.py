@@ -0,0 +1,52 @@
+import asyncio
+from pathlib import Path
+
+from app.db.connection import init_pool, close_pool, get_connection
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+
+
+async def apply_migrations():
+    """migrations klasöründeki .sql dosyalarını isim sırasıyla, daha önce uygulanmamışsa çalıştırır."""
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return False
+
+        await cur.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                name TEXT PRIMARY KEY,
+                applied_at TIMESTAMP NOT NULL DEFAULT NOW()
+            )
+        """)
+        await conn.commit()
+
+        await cur.execute("SELECT name FROM schema_migrations")
+        applied = {row[0] for row in await cur.fetchall()}
+
+        for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+            if path.name in applied:
+                continue
+
+            try:
+                await cur.execute(path.read_text(encoding="utf-8"))
+                await cur.execute("INSERT INTO schema_migrations (name) VALUES (%s)", (path.name,))
+                await conn.commit()
+                print("✅ Migration uygulandı:", path.name)
+            except Exception as e:
+                await conn.rollback()
+                print("❌ Migration hatası:", path.name, e)
+                return False
+
+        return True
+
+
+async def main():
+    await init_pool(min_size=1, max_size=1)
+    try:
+        await apply_migrations()
+    finally:
+        await close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,13 @@
+-- Ek listeleri dosya içeriği yerine yalnızca metadata döndürür.
+ALTER TABLE attachments
+    ADD COLUMN IF NOT EXISTS file_size BIGINT,
+    ADD COLUMN IF NOT EXISTS content_type TEXT,
+    ADD COLUMN IF NOT EXISTS sha256 TEXT;
+
+UPDATE attachments
+SET file_size = octet_length(file),
+    sha256 = encode(sha256(file), 'hex')
+WHERE file IS NOT NULL
+  AND (file_size IS NULL OR sha256 IS NULL);
+
+CREATE INDEX IF NOT EXISTS attachments_task_id_idx ON attachments (task_id);
@@ -0,0 +1,6 @@
+-- Dosya içerikleri dış depoya (dosya sistemi / S3) taşınır, Postgres yalnızca anahtarı tutar.
+ALTER TABLE attachments
+    ADD COLUMN IF NOT EXISTS storage_key TEXT;
+
+ALTER TABLE attachments
+    ALTER COLUMN file DROP NOT NULL;
@@ -0,0 +1,40 @@
+-- Ek içerikleri SHA-256 ile adreslenir; aynı içerik depoda tek kez tutulur.
+CREATE TABLE IF NOT EXISTS attachment_blobs (
+    sha256 TEXT PRIMARY KEY,
+    storage_key TEXT NOT NULL,
+    file_size BIGINT NOT NULL,
+    ref_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+-- Depoya taşınmış mevcut ekler için blob kayıtları oluşturulur.
+INSERT INTO attachment_blobs (sha256, storage_key, file_size, ref_count)
+SELECT sha256, MIN(storage_key), MAX(file_size), COUNT(*)
+FROM attachments
+WHERE storage_key IS NOT NULL AND sha256 IS NOT NULL
+GROUP BY sha256
+ON CONFLICT (sha256) DO NOTHING;
+
+-- Artık hiçbir satırın göstermediği depo nesneleri; python -m app.storage.migrate --purge-orphans siler.
+CREATE TABLE IF NOT EXISTS storage_orphans (
+    storage_key TEXT PRIMARY KEY,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+-- Aynı içeriğe sahip ekler tek bir nesneyi gösterir; diğer kopyalar silinmek üzere kaydedilir.
+INSERT INTO storage_orphans (storage_key)
+SELECT DISTINCT a.storage_key
+FROM attachments a
+JOIN attachment_blobs b ON b.sha256 = a.sha256
+WHERE a.storage_key IS NOT NULL
+  AND a.storage_key <> b.storage_key
+ON CONFLICT (storage_key) DO NOTHING;
+
+UPDATE attachments a
+SET storage_key = b.storage_key
+FROM attachment_blobs b
+WHERE a.sha256 = b.sha256
+  AND a.storage_key IS NOT NULL
+  AND a.storage_key <> b.storage_key;
+
+CREATE INDEX IF NOT EXISTS attachments_sha256_idx ON attachments (sha256);
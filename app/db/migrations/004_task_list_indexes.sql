@@ -0,0 +1,8 @@
+-- /tasks/getTasks keyset sayfalama ve filtreleri için.
+CREATE INDEX IF NOT EXISTS tasks_created_time_id_idx ON tasks (created_time DESC, id DESC);
+CREATE INDEX IF NOT EXISTS tasks_project_created_time_id_idx ON tasks (project_code, created_time DESC, id DESC);
+CREATE INDEX IF NOT EXISTS tasks_created_by_idx ON tasks (created_by);
+CREATE INDEX IF NOT EXISTS tasks_assignment_user_task_idx ON tasks_assignment (user_code, task_id);
+CREATE INDEX IF NOT EXISTS tasks_assignment_task_idx ON tasks_assignment (task_id);
+CREATE INDEX IF NOT EXISTS members_user_project_idx ON members (user_code, project_code);
+CREATE INDEX IF NOT EXISTS task_detail_task_idx ON task_detail (task_id);
@@ -0,0 +1,2 @@
+-- /general/getLogs keyset sayfalaması (owner_code, created_at, id) sırasıyla okur.
+CREATE INDEX IF NOT EXISTS logs_owner_created_at_id_idx ON logs (owner_code, created_at DESC, id DESC);
@@ -0,0 +1,11 @@
+-- Admin kullanıcı listesi: sıralama için btree, içerik araması (ILIKE '%...%') için trigram indeksleri.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS users_name_surname_code_idx ON users (name, surname, code);
+CREATE INDEX IF NOT EXISTS users_surname_name_code_idx ON users (surname, name, code);
+CREATE INDEX IF NOT EXISTS users_email_code_idx ON users (email, code);
+
+CREATE INDEX IF NOT EXISTS users_name_trgm_idx ON users USING gin (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS users_surname_trgm_idx ON users USING gin (surname gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS users_email_trgm_idx ON users USING gin (email gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS users_phone_number_trgm_idx ON users USING gin (phone_number gin_trgm_ops);
@@ -0,0 +1,3 @@
+-- Üye seçici typeahead araması: ad soyad ve soyad başlangıcına göre önek araması.
+CREATE INDEX IF NOT EXISTS users_full_name_prefix_idx ON users (lower(name || ' ' || surname) text_pattern_ops);
+CREATE INDEX IF NOT EXISTS users_surname_prefix_idx ON users (lower(surname) text_pattern_ops);
@@ -0,0 +1,4 @@
+-- Dashboard takvimi ve /general/calendar pencere sorguları için görev tarih aralığı indeksi.
+-- Başlangıç/bitiş ters girilmiş kayıtlar daterange hatası vermesin diye LEAST/GREATEST kullanılır.
+CREATE INDEX IF NOT EXISTS tasks_date_range_gist_idx ON tasks
+    USING gist (daterange(LEAST(start_date, end_date), GREATEST(start_date, end_date), '[]'));
@@ -0,0 +1,2 @@
+-- Kısmi görev düzenlemede iyimser eşzamanlılık kontrolü için sürüm numarası.
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
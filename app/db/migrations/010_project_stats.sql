@@ -0,0 +1,76 @@
+-- Proje detay sayfası için üye ve görev sayıları; members ve tasks üzerindeki tetikleyicilerle güncel tutulur.
+CREATE TABLE IF NOT EXISTS project_stats (
+    project_code TEXT PRIMARY KEY REFERENCES projects (code) ON DELETE CASCADE,
+    member_count INTEGER NOT NULL DEFAULT 0,
+    task_count INTEGER NOT NULL DEFAULT 0
+);
+
+-- Sayaç satırı yoksa oluşturulur; proje silinirken gelen azaltmalar satır yoksa etkisiz kalır.
+CREATE OR REPLACE FUNCTION project_stats_adjust(p_project_code TEXT, p_members INTEGER, p_tasks INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    IF p_project_code IS NULL THEN
+        RETURN;
+    END IF;
+
+    UPDATE project_stats
+    SET member_count = member_count + p_members,
+        task_count = task_count + p_tasks
+    WHERE project_code = p_project_code;
+
+    IF NOT FOUND AND (p_members > 0 OR p_tasks > 0) THEN
+        INSERT INTO project_stats (project_code, member_count, task_count)
+        VALUES (p_project_code, GREATEST(p_members, 0), GREATEST(p_tasks, 0))
+        ON CONFLICT (project_code) DO UPDATE
+        SET member_count = project_stats.member_count + p_members,
+            task_count = project_stats.task_count + p_tasks;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION project_stats_members_trigger()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        PERFORM project_stats_adjust(OLD.project_code, -1, 0);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM project_stats_adjust(NEW.project_code, 1, 0);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION project_stats_tasks_trigger()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        PERFORM project_stats_adjust(OLD.project_code, 0, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM project_stats_adjust(NEW.project_code, 0, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS members_project_stats ON members;
+CREATE TRIGGER members_project_stats
+    AFTER INSERT OR DELETE OR UPDATE OF project_code ON members
+    FOR EACH ROW EXECUTE FUNCTION project_stats_members_trigger();
+
+DROP TRIGGER IF EXISTS tasks_project_stats ON tasks;
+CREATE TRIGGER tasks_project_stats
+    AFTER INSERT OR DELETE OR UPDATE OF project_code ON tasks
+    FOR EACH ROW EXECUTE FUNCTION project_stats_tasks_trigger();
+
+-- Mevcut projeler için sayaçlar bir kez hesaplanır.
+INSERT INTO project_stats (project_code, member_count, task_count)
+SELECT
+    p.code,
+    (SELECT COUNT(*) FROM members m WHERE m.project_code = p.code),
+    (SELECT COUNT(*) FROM tasks t WHERE t.project_code = p.code)
+FROM projects p
+ON CONFLICT (project_code) DO UPDATE
+SET member_count = EXCLUDED.member_count,
+    task_count = EXCLUDED.task_count;
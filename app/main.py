@@ -1,8 +1,27 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.db.connection import init_pool, close_pool
+from app.cache.connection import init_cache, close_cache
+from app.cache.project_constants import start_project_constants_listener, stop_project_constants_listener
+from app.controllers.log_controller import start_log_writer, stop_log_writer
+from app.storage.connection import init_storage
 from app.routes import authentication, project, tasks, general
 
-app = FastAPI(title="My Python Server")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await init_pool()
+    init_cache()
+    init_storage()
+    start_log_writer()
+    start_project_constants_listener()
+    yield
+    await stop_project_constants_listener()
+    await stop_log_writer()
+    await close_cache()
+    await close_pool()
+
+app = FastAPI(title="My Python Server", lifespan=lifespan)
 
 origins = [
     "http://localhost:5173",
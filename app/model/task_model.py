@@ -76,10 +76,12 @@ class EditAttachmentModel:
 
 
 class EditSubtaskModel:
+    subtask_id: Optional[int]
     description: str
     assigned_members: List[EditUserModel]
 
-    def __init__(self, description: str, assigned_members: Optional[List[EditUserModel]] = None):
+    def __init__(self, description: str, assigned_members: Optional[List[EditUserModel]] = None, subtask_id: Optional[int] = None):
+        self.subtask_id = subtask_id
         self.description = description
         self.assigned_members = assigned_members or []
 
@@ -127,4 +129,92 @@ class EditTaskFullModel:
         self.assigned_members = assigned_members or []
         self.attachments = attachments or []
         self.subtasks_raw = subtasks_raw or []
-        self.user_code = user_code
\ No newline at end of file
+        self.user_code = user_code
+
+class PatchSubtaskModel:
+    subtask_id: Optional[int]
+    description: Optional[str]
+    add_members: List[str]
+    remove_members: List[str]
+
+    def __init__(
+        self,
+        subtask_id: Optional[int],
+        description: Optional[str] = None,
+        add_members: Optional[List[str]] = None,
+        remove_members: Optional[List[str]] = None,
+    ):
+        self.subtask_id = subtask_id
+        self.description = description
+        self.add_members = add_members or []
+        self.remove_members = remove_members or []
+
+class TaskPatchModel:
+    task_id: int
+    version: int
+    user_code: str
+    changes: dict
+    add_members: List[str]
+    remove_members: List[str]
+    remove_attachments: List[int]
+    add_subtasks: List[PatchSubtaskModel]
+    update_subtasks: List[PatchSubtaskModel]
+    remove_subtasks: List[int]
+
+    def __init__(
+        self,
+        task_id: int,
+        version: int,
+        user_code: str,
+        changes: Optional[dict] = None,
+        add_members: Optional[List[str]] = None,
+        remove_members: Optional[List[str]] = None,
+        remove_attachments: Optional[List[int]] = None,
+        add_subtasks: Optional[List[PatchSubtaskModel]] = None,
+        update_subtasks: Optional[List[PatchSubtaskModel]] = None,
+        remove_subtasks: Optional[List[int]] = None,
+    ):
+        self.task_id = task_id
+        self.version = version
+        self.user_code = user_code
+        # Sadece gönderilen alanlar: title, description, start_date, end_date ve *_definition
+        self.changes = changes or {}
+        self.add_members = add_members or []
+        self.remove_members = remove_members or []
+        self.remove_attachments = remove_attachments or []
+        self.add_subtasks = add_subtasks or []
+        self.update_subtasks = update_subtasks or []
+        self.remove_subtasks = remove_subtasks or []
+
+class TaskListFilterModel:
+    project_code: Optional[str]
+    status_id: Optional[int]
+    priority_id: Optional[int]
+    type_id: Optional[int]
+    assignee: Optional[str]
+    date_from: Optional[date]
+    date_to: Optional[date]
+    cursor: Optional[str]
+    limit: int
+
+    def __init__(
+        self,
+        project_code: Optional[str] = None,
+        status_id: Optional[int] = None,
+        priority_id: Optional[int] = None,
+        type_id: Optional[int] = None,
+        assignee: Optional[str] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+    ):
+        self.project_code = project_code
+        self.status_id = status_id
+        self.priority_id = priority_id
+        self.type_id = type_id
+        self.assignee = assignee
+        self.date_from = date_from
+        self.date_to = date_to
+        self.cursor = cursor
+        self.limit = limit
@@ -3,7 +3,7 @@ from pydantic import BaseModel, EmailStr
 from app.controllers.authentication_controller import hash_password, set_user, check_email, check_user, check_user_main
 from app.controllers.log_controller import log_message
 from app.utils.generate_uuid import generate_uuid
-from app.cache.connection import set_cache, get_cache
+from app.cache.connection import set_cache_async, get_cache_async
 from app.model.user_model import UserModel
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -19,7 +19,7 @@ class CreateUserRequest(BaseModel):
 async def create_user(data: CreateUserRequest):
     email = data.email;
 
-    email_check = check_email(email=email)
+    email_check = await check_email(email=email)
     if email_check == False:
         return {
             "status": False,
@@ -43,7 +43,7 @@ async def create_user(data: CreateUserRequest):
         phone_number= data.phone
     )
 
-    db_response = set_user(model=model)
+    db_response = await set_user(model=model)
     
     if db_response:
         return {
@@ -65,7 +65,7 @@ async def login_user(data: LoginUserRequest):
     email = data.email;
     hashed_password = hash_password(password=data.password);
 
-    db_response = check_user(email=email, password= hashed_password);
+    db_response = await check_user(email=email, password= hashed_password);
 
     if db_response:
         log_message(
@@ -73,7 +73,7 @@ async def login_user(data: LoginUserRequest):
             message=f"Kullanıcı sisteme giriş yaptı."
         )
         cache_key = generate_uuid();
-        set_cache(cache_key=cache_key, uuid= db_response)
+        await set_cache_async(cache_key=cache_key, uuid= db_response)
 
         return {
             "status": True,
@@ -91,9 +91,9 @@ async def login_user(data: LoginUserRequest):
 
 @router.get("/check")
 async def check_user_route(key: str = Query(...), response: Response = None):
-    cached_key = get_cache(key)
+    cached_key = await get_cache_async(key)
     if cached_key:
-        db_response = check_user_main(cached_key)
+        db_response = await check_user_main(cached_key)
         if db_response != False:
             response.set_cookie(
                 key="user_code",
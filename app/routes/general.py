@@ -1,28 +1,38 @@
-from fastapi import APIRouter, Query
+from datetime import date, datetime
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
-from app.controllers.general_controller import get_all_users_for_project, get_all_users_for_admin, delete_user, edit_activation_user, get_user_logs, update_user, get_dashboard
+from app.controllers.general_controller import get_all_users_for_project, get_all_users_for_admin, delete_user, edit_activation_user, get_user_logs, update_user, get_dashboard, search_users, get_calendar, calendar_window, MAX_CALENDAR_WINDOW_DAYS
 from app.model.user_model import UpdateUserModel
+from app.cache.dashboard import get_dashboard_cache_stats
 router = APIRouter(prefix="/general", tags=["General"])
 
 @router.get("/getUsersForAdmin")
-async def get_users_for_admin():
-    result = get_all_users_for_admin()
+async def get_users_for_admin(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    sort: Literal["name", "surname", "email"] = "name",
+    direction: Literal["asc", "desc"] = "asc",
+    search: Optional[str] = None
+):
+    try:
+        result = await get_all_users_for_admin(cursor, limit, sort, direction, search)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     if result is False:
         return {"status": False, "message": "Unable to fetch users"}
     
     return {
         "status": True,
         "message": "Users List has got.",
-        "data": {
-            "users": result
-        }
+        "data": result
     }
 
 class DeleteUserRequest(BaseModel):
     code: str
 @router.delete("/deleteUser")
 async def delete_user_route(data: DeleteUserRequest):
-    status = delete_user(data.code)
+    status = await delete_user(data.code)
     return {"status": status, "message": "Delete Process"}
 
 
@@ -30,7 +40,7 @@ class EditActivationUserRequest(BaseModel):
     code: str
 @router.put("/setActivationForUser")
 async def delete_user_route(data: EditActivationUserRequest):
-    status = edit_activation_user(data.code)
+    status = await edit_activation_user(data.code)
     return {"status": status, "message": "Put Process"}
 
 
@@ -44,12 +54,31 @@ class UpdateUserRequest(BaseModel):
 @router.put("/updateUser")
 async def update_user_request(data: UpdateUserRequest):
     data = UpdateUserModel(data.code, data.name, data.surname, data.email, data.password, data.phone)
-    status = update_user(data)
+    status = await update_user(data)
     return {"status": status, "message": "Put Process"}
 
 @router.get("/getUsersForProject")
 async def get_users_for_project():
-    result = get_all_users_for_project()
+    result = await get_all_users_for_project()
+    if result is False:
+        return {"status": False, "message": "Unable to fetch users"}
+    
+    return {
+        "status": True,
+        "message": "Users List has got.",
+        "data": {
+            "users": result
+        }
+    }
+
+
+@router.get("/searchUsers")
+async def search_users_route(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=50),
+    exclude_project: Optional[str] = None
+):
+    result = await search_users(q, limit, exclude_project)
     if result is False:
         return {"status": False, "message": "Unable to fetch users"}
     
@@ -63,23 +92,43 @@ async def get_users_for_project():
 
 
 @router.get("/getLogs")
-async def get_logs(user_code: str = Query(...)):
-    result = get_user_logs(user_code)
+async def get_logs(
+    user_code: str = Query(...),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    search: Optional[str] = None
+):
+    try:
+        result = await get_user_logs(user_code, cursor, limit, date_from, date_to, search)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     if result is False:
         return {"status": False, "message": "Unable to fetch logs"}
     
     return {
         "status": True,
         "message": "Logs List has got.",
-        "data": {
-            "logs": result
-        }
+        "data": result
     }
 
 
+def _check_calendar_window(date_from: Optional[date], date_to: Optional[date]):
+    # Eksik uçlar önce varsayılanlarla tamamlanır, sınır son pencereye uygulanır.
+    date_from, date_to = calendar_window(date_from, date_to)
+    if date_from > date_to or (date_to - date_from).days > MAX_CALENDAR_WINDOW_DAYS:
+        raise HTTPException(status_code=400, detail=f"Invalid date window (max {MAX_CALENDAR_WINDOW_DAYS} days)")
+
+
 @router.get("/dashboard")
-async def getDashboard(user_code: str = Query(...)):
-    result = get_dashboard(user_code)
+async def getDashboard(
+    user_code: str = Query(...),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+):
+    _check_calendar_window(date_from, date_to)
+    result = await get_dashboard(user_code, date_from, date_to)
     if result is False:
         return {"status": False, "message": "Unable to fetch dashboard"}
     
@@ -87,4 +136,32 @@ async def getDashboard(user_code: str = Query(...)):
         "status": True,
         "message": "Dashboard has got.",
         "data": result
-    }
\ No newline at end of file
+    }
+
+
+@router.get("/calendar")
+async def getCalendar(
+    user_code: str = Query(...),
+    date_from: date = Query(...),
+    date_to: date = Query(...)
+):
+    _check_calendar_window(date_from, date_to)
+    result = await get_calendar(user_code, date_from, date_to)
+    if result is False:
+        return {"status": False, "message": "Unable to fetch calendar"}
+    
+    return {
+        "status": True,
+        "message": "Calendar has got.",
+        "data": result
+    }
+
+
+@router.get("/dashboardCacheStats")
+async def getDashboardCacheStats():
+    result = await get_dashboard_cache_stats()
+    return {
+        "status": True,
+        "message": "Dashboard cache stats has got.",
+        "data": result
+    }
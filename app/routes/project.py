@@ -1,11 +1,10 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Query, Request, Response
 from pydantic import BaseModel, Field
-from app.controllers.general_controller import get_all_users_for_project
 from app.controllers.log_controller import log_message
 from app.model.project_model import SetMemberModel, SetManagerModel, SetProjectModel, ChangeRoleModel, UnAuthorizeUserModel, EditProjectModel
 from typing import List, Literal, Optional
 from app.controllers.authentication_controller import set_member, set_manager
-from app.controllers.project_controller import edit_project, get_project_constants, get_project_users, set_project, change_role, unauthorize_user, delete_project, get_members, change_status, get_projects, get_project_detail
+from app.controllers.project_controller import edit_project, get_project_constants, get_project_users, set_project, change_role, unauthorize_user, delete_project, get_members, change_status, get_projects, get_project_detail, get_project_user_directory
 from datetime import date
 
 router = APIRouter(prefix="/project", tags=["Project"])
@@ -16,7 +15,7 @@ async def getProjects(user_code: str = Query(...)):
         user_code=user_code,
         message=f"Proje listesini çekti."
     )
-    result = get_projects(user_code)
+    result = await get_projects(user_code)
     
     if result is False:
         return {"status": False, "message": "Unable to fetch projects"}
@@ -28,6 +27,25 @@ async def getProjects(user_code: str = Query(...)):
         }
     }
 
+@router.get("/userDirectory")
+async def getUserDirectory(request: Request, response: Response, project_code: str = Query(...)):
+    result = await get_project_user_directory(project_code)
+
+    if result is False:
+        return {"status": False, "message": "Unable to fetch users"}
+
+    # Sürüm dizin içeriğinin özeti; istemci If-None-Match ile doğrulayıp önbelleğini kullanır.
+    etag = f'"{result["version"]}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return {
+        "status": True,
+        "data": result
+    }
+
 class Item(BaseModel):
     code: Optional[int] = None
     name: str
@@ -55,7 +73,7 @@ async def setProject(data: SetProjectRequest):
         priorities=data.priorities,
         types=data.types
     )
-    status = set_project(model=model)
+    status = await set_project(model=model)
     
     return {"status": status}
 
@@ -72,12 +90,12 @@ async def authorizeUser(data: AuthorizeUserRequest):
     )
     if data.role_type == "project_member":
         model = SetMemberModel(project_code=data.project_code, user_code=data.user_code, project_role=data.project_role)
-        status = set_member(model)
+        status = await set_member(model)
         
         return {"status": status}
     else:
         model = SetManagerModel(project_code= data.project_code, user_code= data.user_code)
-        status = set_manager(model)
+        status = await set_manager(model)
         return {"status": status}
 
 class ChangeRoleRequest(BaseModel):
@@ -87,7 +105,7 @@ class ChangeRoleRequest(BaseModel):
 @router.put("/changeRole")
 async def changeRole(data: ChangeRoleRequest):
     model = ChangeRoleModel(data.project_code, data.user_code, data.project_role)
-    status = change_role(model)
+    status = await change_role(model)
 
     return {"status": status}
 
@@ -96,7 +114,7 @@ class ChangeStatusRequest(BaseModel):
     project_status: Literal['reseraching', 'started', 'continue', 'finished', 'canceled']
 @router.put("/changeProjectStatus")
 async def changeStatus(data: ChangeStatusRequest):
-    status = change_status(project_code=data.project_code, new_status=data.project_status)
+    status = await change_status(project_code=data.project_code, new_status=data.project_status)
 
     return {"status": status}
 
@@ -106,7 +124,7 @@ class UnAuthorizeUserRequest(BaseModel):
 @router.delete("/unauthorizeUser")
 async def unauthorizeUser(data: UnAuthorizeUserRequest):
     model = UnAuthorizeUserModel(data.project_code, data.user_code)
-    status = unauthorize_user(model)
+    status = await unauthorize_user(model)
 
     return {"status": status}
 
@@ -114,13 +132,13 @@ class DeleteProjectRequest(BaseModel):
     project_code: str
 @router.delete("/deleteProject")
 async def deleteProject(data: DeleteProjectRequest):
-    status = delete_project(data.project_code)
+    status = await delete_project(data.project_code)
 
     return {"status": status}
 
 @router.get("/getMembers")
 async def getMembers(project_code: str = Query(...)):
-    result = get_members(project_code)
+    result = await get_members(project_code)
     
     if result is False:
         return {"status": False, "message": "Unable to fetch members"}
@@ -134,7 +152,7 @@ async def getMembers(project_code: str = Query(...)):
 
 @router.get("/getProjectDetail")
 async def getProjectDetail(project_code: str = Query(...)):
-    result = get_project_detail(project_code)
+    result = await get_project_detail(project_code)
     
     if result is False:
         return {"status": False, "message": "Unable to fetch detail"}
@@ -146,11 +164,8 @@ async def getProjectDetail(project_code: str = Query(...)):
 
 @router.get("/getProjectForEdit")
 async def getProjectForEdit(project_code: str = Query(...)):
-    users_result = get_all_users_for_project()
-    if users_result is False:
-        return {"status": False, "message": "Unable to fetch users"}
-    
-    detail_result = get_project_detail(project_code)
+    # Üye seçici kullanıcıları /general/searchUsers üzerinden arar; tüm kullanıcı listesi gönderilmez.
+    detail_result = await get_project_detail(project_code)
     
     if detail_result is False:
         return {"status": False, "message": "Unable to fetch detail"}
@@ -158,14 +173,13 @@ async def getProjectForEdit(project_code: str = Query(...)):
     return {
         "status": True, 
         "data": {
-            "users": users_result,
             "details": detail_result
         }
     }
 
 @router.get("/getProjectConstants")
 async def getProjectConstants(project_code: str = Query(...)):
-    result = get_project_constants(project_code)
+    result = await get_project_constants(project_code)
     
     if result is False:
         return {"status": False, "message": "Unable to fetch constants"}
@@ -177,7 +191,7 @@ async def getProjectConstants(project_code: str = Query(...)):
 
 @router.get("/projectUsers")
 async def getProjectUsers(project_code: str = Query(...)):
-    result = get_project_users(project_code)
+    result = await get_project_users(project_code)
     
     if result is False:
         return {"status": False, "message": "Unable to fetch users"}
@@ -215,7 +229,7 @@ async def editProject(data: UpdateProjectRequest):
         message=f"{data.project_code} projesi için düzenleme yaptı."
     )
     model = EditProjectModel(data.model_dump())
-    result = edit_project(model)
+    result = await edit_project(model)
 
     if result is False:
         return {"status": False, "message": "Unable to update task"}
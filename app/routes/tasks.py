@@ -1,17 +1,22 @@
 from typing import Any, List, Optional
-from fastapi import APIRouter, Query
+from urllib.parse import quote
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from datetime import date
+from datetime import date, timezone
+from email.utils import format_datetime
 from app.controllers.log_controller import log_message
-from app.controllers.task_controller import get_details_for_task_edit, set_task, set_task_detail, set_task_attachment, get_projects_for_task, get_tasks, set_main_task_status, set_sub_task_status, get_project_tasks, update_task
-from app.model.task_model import EditTaskFullModel
+from app.controllers.task_controller import get_details_for_task_edit, set_task, set_task_detail, set_task_attachment, get_projects_for_task, get_tasks, set_main_task_status, set_sub_task_status, get_project_tasks, update_task, get_attachment, read_attachment, store_attachment_stream, AttachmentTooLarge, patch_task, TaskVersionConflict
+from app.model.task_model import EditTaskFullModel, TaskListFilterModel, TaskPatchModel, PatchSubtaskModel
+from app.utils.range_header import RangeNotSatisfiable, parse_range_header
+from app.utils.multipart_stream import InvalidMultipart, iter_multipart
 
 router = APIRouter(prefix="/tasks", tags=["Tasks"])
 
 @router.get("/getProjectsForTask")
 async def getProjectsForTask(user_code: str = Query(...)):
     log_message(user_code=user_code, message="Görevler için projeler çekildi.")
-    result = get_projects_for_task(user_code)
+    result = await get_projects_for_task(user_code)
     
     if result is False:
         return {"status": False, "message": "Unable to fetch projects"}
@@ -52,7 +57,7 @@ async def setTask(data: SetTaskRequest):
         user_code=data.created_by,
         message=f"{data.project_code} için {data.title} adlı görev oluşturdu."
     )
-    result = set_task(data.model_dump())
+    result = await set_task(data.model_dump())
     return {"status": result}
 
 
@@ -69,7 +74,7 @@ async def setTaskDetail(data: SetTaskDetailRequest):
         user_code=data.created_by,
         message=f"{data.task_id} için {data.description} adlı alt görev oluşturuldu."
     )
-    result = set_task_detail(data.model_dump())
+    result = await set_task_detail(data.model_dump())
     return {"status": result}
 
 class SetTaskAttachment(BaseModel):
@@ -82,27 +87,100 @@ async def setTaskAttachment(data: SetTaskAttachment):
         user_code=data.user_id,
         message=f"{data.task_id} için dosya eklendi."
     )
-    result = set_task_attachment(data.model_dump())
+    result = await set_task_attachment(data.model_dump())
 
     return {"status": result}
 
 
+async def _part_chunks(events):
+    async for kind, value in events:
+        if kind == "end":
+            return
+        if kind == "data":
+            yield value
+
+@router.post("/uploadAttachment")
+async def uploadAttachment(request: Request, task_id: int = Query(...), user_id: str = Query(...)):
+    """multipart/form-data ile gelen dosyaları belleğe almadan parça parça kaydeder."""
+    uploaded = []
+    events = iter_multipart(request)
+    try:
+        async for kind, part in events:
+            if kind != "part":
+                continue
+            if not part["filename"]:
+                # Dosya olmayan alanlar atlanır.
+                async for _ in _part_chunks(events):
+                    pass
+                continue
+
+            result = await store_attachment_stream(
+                task_id=task_id,
+                user_code=user_id,
+                file_name=part["filename"],
+                content_type=part["content_type"],
+                chunks=_part_chunks(events)
+            )
+            if result is False:
+                return {"status": False, "message": "Unable to upload attachment", "data": {"attachments": uploaded}}
+            uploaded.append(result)
+    except InvalidMultipart as e:
+        # Önceki parçalar kaydedilmiş olabilir; istemci hangilerinin kaldığını bilmelidir.
+        raise HTTPException(status_code=400, detail={"status": False, "message": str(e), "data": {"attachments": uploaded}})
+    except AttachmentTooLarge as e:
+        raise HTTPException(status_code=413, detail={"status": False, "message": str(e), "data": {"attachments": uploaded}})
+
+    log_message(
+        user_code=user_id,
+        message=f"{task_id} için dosya eklendi."
+    )
+    return {
+        "status": True,
+        "data": {
+            "attachments": uploaded
+        }
+    }
+
+
 @router.get("/getTasks")
-async def getTasks(user_code: str = Query(...)):
+async def getTasks(
+    user_code: str = Query(...),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=100),
+    project_code: Optional[str] = None,
+    status_id: Optional[int] = None,
+    priority_id: Optional[int] = None,
+    type_id: Optional[int] = None,
+    assignee: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+):
     log_message(
         user_code=user_code,
         message=f"Görev listesini çekti."
     )
-    result = get_tasks(user_code)
+    filters = TaskListFilterModel(
+        project_code=project_code,
+        status_id=status_id,
+        priority_id=priority_id,
+        type_id=type_id,
+        assignee=assignee,
+        date_from=date_from,
+        date_to=date_to,
+        cursor=cursor,
+        limit=limit
+    )
+    try:
+        result = await get_tasks(user_code, filters)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     
     if result is False:
         return {"status": False, "message": "Unable to fetch projects"}
     
     return {
         "status": True, 
-        "data": {
-            "tasks": result
-        }
+        "data": result
     }
 
 
@@ -112,7 +190,7 @@ class SetMainTaskStatusRequest(BaseModel):
 
 @router.put("/setMainTaskStatus")
 async def setMainTaskStatus(data: SetMainTaskStatusRequest):
-    result = set_main_task_status(new_status=data.new_status, task_id=data.task_id)
+    result = await set_main_task_status(new_status=data.new_status, task_id=data.task_id)
     return {"status": result}
 
 
@@ -123,7 +201,7 @@ class SetSubTaskStatusRequest(BaseModel):
 
 @router.put("/setSubTaskStatus")
 async def setSubTaskStatus(data: SetSubTaskStatusRequest):
-    result = set_sub_task_status(new_status=data.new_status, task_id=data.task_id, sub_id=data.sub_id)
+    result = await set_sub_task_status(new_status=data.new_status, task_id=data.task_id, sub_id=data.sub_id)
     return {"status": result}
 
 @router.get("/getProjectTasks")
@@ -132,7 +210,7 @@ async def getProjectTasks(user_code: str, project_code: str = Query(...)):
         user_code=user_code,
         message=f"{project_code} için görev listesini çekti."
     )
-    result = get_project_tasks(user_code, project_code)
+    result = await get_project_tasks(user_code, project_code)
     
     if result is False:
         return {"status": False, "message": "Unable to fetch projects"}
@@ -145,13 +223,15 @@ async def getProjectTasks(user_code: str, project_code: str = Query(...)):
     }
 
 @router.get("/getDetailsForTaskEdit")
-async def getDetailsForTaskEdit(user_code: str, task_id: str = Query(...)):
+async def getDetailsForTaskEdit(user_code: str, task_id: str = Query(...), directory_version: Optional[str] = None):
     log_message(
         user_code=user_code,
         message=f"{task_id} için düzenleme amaçlı görev detayı çekti."
     )
-    result = get_details_for_task_edit(task_id)
+    result = await get_details_for_task_edit(task_id, directory_version)
 
+    if result is None:
+        raise HTTPException(status_code=404, detail={"status": False, "message": "Task not found"})
     if result is False:
         return {"status": False, "message": "Unable to fetch task"}
     
@@ -161,17 +241,17 @@ async def getDetailsForTaskEdit(user_code: str, task_id: str = Query(...)):
     }
 
 class EditUserModel(BaseModel):
-    name: str
+    name: str = ""
     code: str
 class EditAttachmentModel(BaseModel):
     name: str
-    data: Any
-    size: int
+    data: Any = None
+    size: int = 0
 class EditSubtaskModel(BaseModel):
     subtask_id: int
     description: str
     assigned_members: List[EditUserModel]
-    unassigned_members: List[EditUserModel]
+    unassigned_members: List[EditUserModel] = []
 class TaskEditModel(BaseModel):
     project_code: str
     title: str
@@ -181,11 +261,11 @@ class TaskEditModel(BaseModel):
     status_definition: str
     type_definition: str
     priority_definition: str
-    all_status_definitions: List[str]
-    all_type_definitions: List[str]
-    all_priority_definitions: List[str]
+    all_status_definitions: List[str] = []
+    all_type_definitions: List[str] = []
+    all_priority_definitions: List[str] = []
     assigned_members: List[EditUserModel]
-    unassigned_members: List[EditUserModel]
+    unassigned_members: List[EditUserModel] = []
     attachments: List[EditAttachmentModel]
     subtasks_raw: List[EditSubtaskModel]
     edited_by: str
@@ -211,7 +291,7 @@ async def completeEdit(data: TaskEditModel):
         title=data.title,
         type_definition=data.type_definition
     )
-    result = update_task(model)
+    result = await update_task(model)
 
     if result is False:
         return {"status": False, "message": "Unable to update task"}
@@ -219,4 +299,120 @@ async def completeEdit(data: TaskEditModel):
     return {
         "status": True, 
         "data": result
-    }
\ No newline at end of file
+    }
+
+class PatchSubtaskRequest(BaseModel):
+    subtask_id: int
+    description: Optional[str] = None
+    add_members: List[str] = []
+    remove_members: List[str] = []
+class NewSubtaskRequest(BaseModel):
+    description: str
+    assigned_members: List[str] = []
+class TaskPatchRequest(BaseModel):
+    edited_by: str
+    version: int
+    title: Optional[str] = None
+    description: Optional[str] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    status_definition: Optional[str] = None
+    priority_definition: Optional[str] = None
+    type_definition: Optional[str] = None
+    add_members: List[str] = []
+    remove_members: List[str] = []
+    remove_attachments: List[int] = []
+    add_subtasks: List[NewSubtaskRequest] = []
+    update_subtasks: List[PatchSubtaskRequest] = []
+    remove_subtasks: List[int] = []
+@router.patch("/{task_id}")
+async def patchTask(task_id: int, data: TaskPatchRequest):
+    log_message(
+        user_code=data.edited_by,
+        message=f"{task_id} kodlu görev için düzenleme yaptı."
+    )
+    # Yeni ekler /tasks/uploadAttachment ile yüklenir; burada sadece silme farkı taşınır.
+    fields = ("title", "description", "start_date", "end_date", "status_definition", "priority_definition", "type_definition")
+    model = TaskPatchModel(
+        task_id=task_id,
+        version=data.version,
+        user_code=data.edited_by,
+        changes={field: getattr(data, field) for field in fields if field in data.model_fields_set},
+        add_members=data.add_members,
+        remove_members=data.remove_members,
+        remove_attachments=data.remove_attachments,
+        add_subtasks=[
+            PatchSubtaskModel(None, subtask.description, subtask.assigned_members)
+            for subtask in data.add_subtasks
+        ],
+        update_subtasks=[
+            PatchSubtaskModel(subtask.subtask_id, subtask.description, subtask.add_members, subtask.remove_members)
+            for subtask in data.update_subtasks
+        ],
+        remove_subtasks=data.remove_subtasks
+    )
+    try:
+        result = await patch_task(model)
+    except TaskVersionConflict as e:
+        raise HTTPException(status_code=409, detail={"status": False, "message": "Task was modified", "version": e.args[0]})
+
+    if result is None:
+        raise HTTPException(status_code=404, detail={"status": False, "message": "Task not found"})
+    if result is False:
+        return {"status": False, "message": "Unable to update task"}
+
+    return {
+        "status": True,
+        "data": result
+    }
+
+@router.get("/attachments/{attachment_id}")
+async def getAttachment(attachment_id: int, request: Request):
+    attachment = await get_attachment(attachment_id)
+    if attachment is False:
+        raise HTTPException(status_code=500, detail={"status": False, "message": "Unable to fetch attachment"})
+    if attachment is None:
+        raise HTTPException(status_code=404, detail={"status": False, "message": "Attachment not found"})
+
+    size = attachment["size"] or 0
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, max-age=86400",
+        "Content-Disposition": f"inline; filename*=UTF-8''{quote(attachment['name'] or '')}",
+    }
+    if attachment["hash"]:
+        headers["ETag"] = f'"{attachment["hash"]}"'
+    if attachment["uploaded_at"]:
+        # uploaded_at saat dilimsiz yerel zamandır; başlık UTC olarak yazılmalıdır.
+        headers["Last-Modified"] = format_datetime(attachment["uploaded_at"].astimezone(timezone.utc), usegmt=True)
+
+    etag = headers.get("ETag")
+    if etag and request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range and if_range != etag:
+        range_header = None
+
+    try:
+        byte_range = parse_range_header(range_header, size)
+    except RangeNotSatisfiable:
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, 200
+    else:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    length = max(end - start + 1, 0)
+    headers["Content-Length"] = str(length)
+
+    return StreamingResponse(
+        read_attachment(attachment, start, length),
+        status_code=status_code,
+        media_type=attachment["content_type"],
+        headers=headers
+    )
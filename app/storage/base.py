@@ -0,0 +1,37 @@
+from abc import ABC, abstractmethod
+from typing import AsyncIterator
+
+
+class AttachmentStorage(ABC):
+    """Ek dosyalarının içeriğini saklayan arka uçların ortak arayüzü.
+
+    Postgres yalnızca metadata ve nesne anahtarını (storage_key) tutar.
+    """
+
+    chunk_size = 1024 * 1024
+
+    @abstractmethod
+    async def write(self, key: str, chunks: AsyncIterator[bytes]) -> int:
+        """Parçaları verilen anahtara yazar ve toplam boyutu döndürür."""
+
+    @abstractmethod
+    def read(self, key: str, start: int = 0, length: int | None = None) -> AsyncIterator[bytes]:
+        """İçeriği start konumundan itibaren length bayt kadar parça parça okur."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Anahtarı siler; anahtar yoksa hata vermez."""
+
+    @abstractmethod
+    async def move(self, source_key: str, target_key: str) -> None:
+        """İçeriği yeni anahtara taşır; hedef varsa üzerine yazılır."""
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        """Anahtarın var olup olmadığını döndürür."""
+
+    async def write_bytes(self, key: str, data: bytes) -> int:
+        async def single_chunk():
+            yield data
+
+        return await self.write(key, single_chunk())
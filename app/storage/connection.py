@@ -0,0 +1,45 @@
+import os
+
+from app.storage.base import AttachmentStorage
+
+# "filesystem" ya da "s3"
+ATTACHMENT_STORAGE = os.getenv("ATTACHMENT_STORAGE", "filesystem")
+ATTACHMENT_STORAGE_PATH = os.getenv("ATTACHMENT_STORAGE_PATH", "storage/attachments")
+
+S3_BUCKET = os.getenv("S3_BUCKET", "attachments")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")  # MinIO için örn. http://localhost:9000
+S3_ACCESS_KEY = os.getenv("S3_ACCESS_KEY")
+S3_SECRET_KEY = os.getenv("S3_SECRET_KEY")
+S3_REGION = os.getenv("S3_REGION")
+
+_storage: AttachmentStorage | None = None
+
+
+def init_storage() -> AttachmentStorage:
+    global _storage
+    if _storage is not None:
+        return _storage
+
+    if ATTACHMENT_STORAGE == "s3":
+        from app.storage.s3 import S3Storage
+
+        _storage = S3Storage(
+            bucket=S3_BUCKET,
+            endpoint_url=S3_ENDPOINT_URL,
+            access_key=S3_ACCESS_KEY,
+            secret_key=S3_SECRET_KEY,
+            region=S3_REGION,
+        )
+    else:
+        from app.storage.filesystem import FileSystemStorage
+
+        _storage = FileSystemStorage(ATTACHMENT_STORAGE_PATH)
+
+    print("✅ Dosya deposu hazır:", ATTACHMENT_STORAGE)
+    return _storage
+
+
+def get_storage() -> AttachmentStorage:
+    if _storage is None:
+        return init_storage()
+    return _storage
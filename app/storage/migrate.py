@@ -0,0 +1,119 @@
+import argparse
+import asyncio
+
+from app.controllers.attachment_controller import discard_blobs, store_blob_bytes
+from app.db.connection import init_pool, close_pool, get_connection
+
+
+async def migrate_batch(batch_size: int) -> int:
+    """attachments.file sütunundaki içeriklerden bir grubu depoya taşır, taşınan satır sayısını döndürür."""
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return 0
+
+        written_keys = []
+        try:
+            # Aynı anda çalışan başka bir taşıma işlemiyle çakışmamak için satırlar kilitlenir.
+            await cur.execute("""
+                SELECT id, task_id, file_name, file
+                FROM attachments
+                WHERE storage_key IS NULL AND file IS NOT NULL
+                ORDER BY id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            """, (batch_size,))
+            rows = await cur.fetchall()
+            if not rows:
+                return 0
+
+            updates = []
+            for attachment_id, task_id, file_name, data in rows:
+                meta, created_key = await store_blob_bytes(cur, file_name, bytes(data))
+                if created_key:
+                    written_keys.append(created_key)
+                updates.append((meta["storage_key"], meta["size"], meta["content_type"], meta["sha256"], attachment_id))
+
+            await cur.executemany("""
+                UPDATE attachments
+                SET storage_key = %s,
+                    file = NULL,
+                    file_size = %s,
+                    content_type = COALESCE(content_type, %s),
+                    sha256 = %s
+                WHERE id = %s
+            """, updates)
+            await conn.commit()
+            return len(rows)
+
+        except Exception as e:
+            print("Taşıma hatası:", e)
+            await conn.rollback()
+            await discard_blobs(written_keys)
+            raise
+
+
+async def purge_orphans_batch(batch_size: int) -> int:
+    """storage_orphans'taki nesnelerden bir grubu depodan siler, silinen sayıyı döndürür."""
+    async with get_connection() as (conn, cur):
+        if conn is None:
+            return 0
+
+        try:
+            # Bu arada yeniden kullanılmaya başlanmış anahtarlar silinmez, sadece kayıttan düşer.
+            await cur.execute("""
+                DELETE FROM storage_orphans o
+                WHERE o.storage_key IN (
+                    SELECT storage_key
+                    FROM storage_orphans
+                    ORDER BY storage_key
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING o.storage_key,
+                    EXISTS (SELECT 1 FROM attachments a WHERE a.storage_key = o.storage_key)
+                    OR EXISTS (SELECT 1 FROM attachment_blobs b WHERE b.storage_key = o.storage_key)
+            """, (batch_size,))
+            rows = await cur.fetchall()
+            await conn.commit()
+
+        except Exception as e:
+            print("Temizlik hatası:", e)
+            await conn.rollback()
+            raise
+
+    await discard_blobs([key for key, in_use in rows if not in_use])
+    return len(rows)
+
+
+async def main(batch_size: int, limit: int | None, purge_orphans: bool = False):
+    await init_pool(min_size=1, max_size=1)
+    moved = 0
+    try:
+        if purge_orphans:
+            purged = 0
+            while True:
+                count = await purge_orphans_batch(batch_size)
+                if count == 0:
+                    break
+                purged += count
+                print(f"✅ {purged} sahipsiz nesne temizlendi.")
+            return
+
+        while limit is None or moved < limit:
+            size = batch_size if limit is None else min(batch_size, limit - moved)
+            count = await migrate_batch(size)
+            if count == 0:
+                break
+            moved += count
+            print(f"✅ {moved} ek depoya taşındı.")
+    finally:
+        await close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="attachments.file bytea içeriklerini dosya deposuna taşır.")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=None, help="En fazla bu kadar ek taşınır.")
+    parser.add_argument("--purge-orphans", action="store_true", help="storage_orphans'taki nesneleri depodan siler.")
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size, args.limit, args.purge_orphans))
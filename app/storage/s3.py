@@ -0,0 +1,114 @@
+import asyncio
+from typing import AsyncIterator
+
+import boto3
+from botocore.exceptions import ClientError
+
+from app.storage.base import AttachmentStorage
+
+# S3 çok parçalı yüklemede son parça hariç her parça en az 5 MB olmalıdır.
+MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class S3Storage(AttachmentStorage):
+    """S3 uyumlu (AWS S3, MinIO vb.) nesne depolama arka ucu."""
+
+    def __init__(self, bucket: str, endpoint_url: str | None = None, access_key: str | None = None,
+                 secret_key: str | None = None, region: str | None = None):
+        self.bucket = bucket
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+            region_name=region,
+        )
+
+    async def write(self, key: str, chunks: AsyncIterator[bytes]) -> int:
+        buffer = bytearray()
+        size = 0
+        upload_id = None
+        parts = []
+
+        try:
+            async for chunk in chunks:
+                buffer.extend(chunk)
+                size += len(chunk)
+                if len(buffer) >= MULTIPART_CHUNK_SIZE:
+                    if upload_id is None:
+                        upload = await asyncio.to_thread(
+                            self.client.create_multipart_upload, Bucket=self.bucket, Key=key
+                        )
+                        upload_id = upload["UploadId"]
+                    parts.append(await self._upload_part(key, upload_id, len(parts) + 1, bytes(buffer)))
+                    buffer.clear()
+
+            if upload_id is None:
+                await asyncio.to_thread(self.client.put_object, Bucket=self.bucket, Key=key, Body=bytes(buffer))
+                return size
+
+            if buffer:
+                parts.append(await self._upload_part(key, upload_id, len(parts) + 1, bytes(buffer)))
+            await asyncio.to_thread(
+                self.client.complete_multipart_upload,
+                Bucket=self.bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+            return size
+
+        except BaseException:
+            if upload_id is not None:
+                await asyncio.to_thread(
+                    self.client.abort_multipart_upload, Bucket=self.bucket, Key=key, UploadId=upload_id
+                )
+            raise
+
+    async def _upload_part(self, key: str, upload_id: str, number: int, data: bytes) -> dict:
+        response = await asyncio.to_thread(
+            self.client.upload_part,
+            Bucket=self.bucket,
+            Key=key,
+            UploadId=upload_id,
+            PartNumber=number,
+            Body=data,
+        )
+        return {"ETag": response["ETag"], "PartNumber": number}
+
+    async def read(self, key: str, start: int = 0, length: int | None = None) -> AsyncIterator[bytes]:
+        if length == 0:
+            return
+
+        byte_range = f"bytes={start}-" if length is None else f"bytes={start}-{start + length - 1}"
+        response = await asyncio.to_thread(self.client.get_object, Bucket=self.bucket, Key=key, Range=byte_range)
+        body = response["Body"]
+        try:
+            while True:
+                chunk = await asyncio.to_thread(body.read, self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            body.close()
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self.client.delete_object, Bucket=self.bucket, Key=key)
+
+    async def move(self, source_key: str, target_key: str) -> None:
+        await asyncio.to_thread(
+            self.client.copy,
+            {"Bucket": self.bucket, "Key": source_key},
+            self.bucket,
+            target_key,
+        )
+        await self.delete(source_key)
+
+    async def exists(self, key: str) -> bool:
+        try:
+            await asyncio.to_thread(self.client.head_object, Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
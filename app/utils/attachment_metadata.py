@@ -0,0 +1,27 @@
+import base64
+import hashlib
+import mimetypes
+
+DEFAULT_CONTENT_TYPE = "application/octet-stream"
+
+
+def guess_content_type(file_name: str) -> str:
+    content_type, _ = mimetypes.guess_type(file_name or "")
+    return content_type or DEFAULT_CONTENT_TYPE
+
+
+def decode_attachment_data(data) -> bytes:
+    # JSON uç noktaları eski istemciler için tamsayı listesi, yeniler için base64 metin kabul eder.
+    if isinstance(data, str):
+        if data.startswith("data:") and "," in data:
+            data = data.split(",", 1)[1]
+        return base64.b64decode(data)
+    return bytes(data)
+
+
+def describe_attachment(file_name: str, data: bytes) -> dict:
+    return {
+        "size": len(data),
+        "content_type": guess_content_type(file_name),
+        "sha256": hashlib.sha256(data).hexdigest(),
+    }
@@ -0,0 +1,97 @@
+try:
+    from python_multipart.exceptions import MultipartParseError
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.exceptions import MultipartParseError
+    from multipart.multipart import MultipartParser, parse_options_header
+
+
+class InvalidMultipart(Exception):
+    pass
+
+
+def _parse_disposition(value: bytes) -> dict:
+    _, params = parse_options_header(value)
+    return {key.decode("latin-1"): val.decode("utf-8", "replace") for key, val in params.items()}
+
+
+async def iter_multipart(request):
+    """multipart/form-data gövdesini belleğe almadan olay akışı olarak döndürür.
+
+    Olaylar sırasıyla ("part", {"name", "filename", "content_type"}), sıfır veya daha
+    fazla ("data", bytes) ve ("end", None) şeklindedir. Bozuk ya da kapanış sınırı
+    gelmeden kesilen gövdeler InvalidMultipart fırlatır.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise InvalidMultipart("multipart/form-data with a boundary is required")
+
+    events = []
+    header_field = bytearray()
+    header_value = bytearray()
+    headers = {}
+    finished = False
+
+    def on_part_begin():
+        headers.clear()
+
+    def on_header_field(data, start, end):
+        header_field.extend(data[start:end])
+
+    def on_header_value(data, start, end):
+        header_value.extend(data[start:end])
+
+    def on_header_end():
+        headers[bytes(header_field).lower()] = bytes(header_value)
+        header_field.clear()
+        header_value.clear()
+
+    def on_headers_finished():
+        disposition = _parse_disposition(headers.get(b"content-disposition", b""))
+        events.append(("part", {
+            "name": disposition.get("name"),
+            "filename": disposition.get("filename"),
+            "content_type": headers.get(b"content-type", b"").decode("latin-1") or None,
+        }))
+
+    def on_part_data(data, start, end):
+        events.append(("data", bytes(data[start:end])))
+
+    def on_part_end():
+        events.append(("end", None))
+
+    def on_end():
+        nonlocal finished
+        finished = True
+
+    parser = MultipartParser(params[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+        "on_end": on_end,
+    })
+
+    async for chunk in request.stream():
+        try:
+            parser.write(chunk)
+        except MultipartParseError as e:
+            raise InvalidMultipart(f"Malformed multipart body: {e}")
+        pending = events[:]
+        events.clear()
+        for event in pending:
+            yield event
+
+    try:
+        parser.finalize()
+    except MultipartParseError as e:
+        raise InvalidMultipart(f"Malformed multipart body: {e}")
+    for event in events:
+        yield event
+
+    # Kesilen gövdede son parçanın "end" olayı gelmez; yarım dosya başarılı sayılmamalıdır.
+    if not finished:
+        raise InvalidMultipart("Multipart body ended before the closing boundary")
@@ -0,0 +1,34 @@
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range_header(header: str | None, size: int):
+    """Tek aralıklı 'bytes=start-end' başlığını (start, end) olarak döndürür, end dahildir.
+
+    Başlık yoksa ya da desteklenmeyen bir biçimdeyse None döner ve tüm dosya gönderilir.
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+
+    spec = header[len("bytes="):].strip()
+    if "," in spec or "-" not in spec:
+        return None
+
+    start_text, end_text = (part.strip() for part in spec.split("-", 1))
+    try:
+        if start_text == "":
+            suffix = int(end_text)
+            if suffix <= 0:
+                raise RangeNotSatisfiable()
+            start = max(size - suffix, 0)
+            end = size - 1
+        else:
+            start = int(start_text)
+            end = int(end_text) if end_text else size - 1
+    except ValueError:
+        return None
+
+    if start >= size or start > end:
+        raise RangeNotSatisfiable()
+
+    return start, min(end, size - 1)
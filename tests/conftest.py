@@ -0,0 +1,52 @@
+from contextlib import asynccontextmanager
+
+import pytest
+
+
+class FakeCursor:
+    """Çalıştırılan ifadeleri kaydeder; her execute sıradaki hazır sonucu döndürür."""
+
+    def __init__(self, results=()):
+        self.results = list(results)
+        self.statements = []
+        self._current = None
+
+    async def execute(self, query, params=None):
+        self.statements.append((query, params))
+        self._current = self.results.pop(0) if self.results else None
+
+    async def fetchone(self):
+        return self._current
+
+    async def fetchall(self):
+        return self._current or []
+
+
+class FakeConnection:
+    def __init__(self):
+        self.commits = 0
+        self.rollbacks = 0
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    """Verilen modülün get_connection'ını sahte bağlantıyla değiştirir ve cursor'ı döner."""
+
+    def install(module, results=()):
+        conn = FakeConnection()
+        cur = FakeCursor(results)
+
+        @asynccontextmanager
+        async def get_connection():
+            yield conn, cur
+
+        monkeypatch.setattr(module, "get_connection", get_connection)
+        return conn, cur
+
+    return install
@@ -0,0 +1,52 @@
+import asyncio
+from datetime import date
+
+import pytest
+
+from app.controllers import general_controller
+
+
+@pytest.fixture
+def dashboard_cache(monkeypatch):
+    stored = {}
+
+    async def get_cached_dashboard(user_code):
+        return None
+
+    async def set_cached_dashboard(user_code, data):
+        stored[user_code] = data
+
+    monkeypatch.setattr(general_controller, "get_cached_dashboard", get_cached_dashboard)
+    monkeypatch.setattr(general_controller, "set_cached_dashboard", set_cached_dashboard)
+    return stored
+
+
+def _results(task_count):
+    near_tasks = [[f"Task {i}", i % 7] for i in range(task_count)]
+    tasks_by_date = [[f"2024-01-{day:02d}", [{"title": f"Task {day}"}]] for day in range(1, 29)]
+    return [
+        ("Ada Lovelace", ["login"]),
+        (task_count, task_count // 2, len(near_tasks), task_count // 4, near_tasks, tasks_by_date),
+    ]
+
+
+@pytest.mark.parametrize("task_count", [1, 500])
+def test_get_dashboard_makes_two_queries(fake_db, dashboard_cache, task_count):
+    _, cur = fake_db(general_controller, _results(task_count))
+
+    data = asyncio.run(general_controller.get_dashboard("u1"))
+
+    assert len(cur.statements) == 2
+    assert data["tasks_counts"]["all_count"] == task_count
+    assert len(data["near_tasks"]) == task_count
+    assert dashboard_cache["u1"] is data
+
+
+def test_get_dashboard_does_not_cache_custom_window(fake_db, dashboard_cache):
+    _, cur = fake_db(general_controller, _results(3))
+
+    data = asyncio.run(general_controller.get_dashboard("u1", date(2024, 1, 1), date(2024, 1, 31)))
+
+    assert len(cur.statements) == 2
+    assert data["calendar_window"] == {"date_from": "2024-01-01", "date_to": "2024-01-31"}
+    assert dashboard_cache == {}
@@ -0,0 +1,123 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.controllers import log_controller
+
+
+class FakeCopy:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rows = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.conn.rows.extend(self.rows)
+        return False
+
+    async def write_row(self, row):
+        if row[0] == "bad":
+            raise ValueError("invalid row")
+        self.rows.append(row)
+
+
+class LogConnection:
+    def __init__(self, rollback_fails=False):
+        self.rollback_fails = rollback_fails
+        self.rows = []
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        if self.rollback_fails:
+            raise ConnectionError("the connection is closed")
+
+
+class LogCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def copy(self, statement):
+        return FakeCopy(self.conn)
+
+    async def execute(self, query, params=None):
+        if params[0] == "bad":
+            raise ValueError("invalid row")
+        self.conn.rows.append(params)
+
+
+@pytest.fixture
+def log_db(monkeypatch):
+    connections = []
+
+    @asynccontextmanager
+    async def get_connection():
+        # İlk bağlantının rollback'i kopan bağlantı gibi hata verir.
+        conn = LogConnection(rollback_fails=not connections)
+        connections.append(conn)
+        yield conn, LogCursor(conn)
+
+    invalidated = []
+
+    async def invalidate_dashboards(user_codes):
+        invalidated.extend(user_codes)
+
+    monkeypatch.setattr(log_controller, "get_connection", get_connection)
+    monkeypatch.setattr(log_controller, "invalidate_dashboards", invalidate_dashboards)
+    monkeypatch.setattr(log_controller, "LOG_FLUSH_INTERVAL", 0.01)
+    return connections, invalidated
+
+
+def test_failed_copy_falls_back_to_single_rows(log_db):
+    connections, invalidated = log_db
+
+    async def run():
+        log_controller.log_message("u1", "first")
+        log_controller.log_message("u2", "bad")
+        log_controller.log_message("u3", "third")
+        await log_controller.stop_log_writer()
+
+    asyncio.run(run())
+
+    assert [row[:2] for row in connections[1].rows] == [("first", "u1"), ("third", "u3")]
+    assert invalidated == ["u1", "u3"]
+
+
+def test_writer_survives_failed_batch(log_db):
+    connections, _ = log_db
+
+    async def run():
+        log_controller.log_message("u1", "bad")
+        await asyncio.sleep(0.05)
+        assert not log_controller._writer_task.done()
+        log_controller.log_message("u2", "later")
+        await log_controller.stop_log_writer()
+
+    asyncio.run(run())
+
+    assert [row[:2] for conn in connections for row in conn.rows] == [("later", "u2")]
+
+
+def test_stop_does_not_block_on_full_queue(log_db, monkeypatch):
+    monkeypatch.setattr(log_controller, "LOG_STOP_TIMEOUT", 0.05)
+
+    async def stuck(batch):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(log_controller, "_write_batch", stuck)
+    monkeypatch.setattr(log_controller, "LOG_QUEUE_MAX_SIZE", 1)
+
+    async def run():
+        log_controller.log_message("u1", "first")
+        await asyncio.sleep(0.02)
+        log_controller.log_message("u2", "second")
+        await asyncio.wait_for(log_controller.stop_log_writer(), 1)
+
+    asyncio.run(run())
+
+    assert log_controller._writer_task is None
@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+from app.utils.multipart_stream import InvalidMultipart, iter_multipart
+
+BODY = (
+    b'--XX\r\nContent-Disposition: form-data; name="file"; filename="a.txt"\r\n'
+    b'Content-Type: text/plain\r\n\r\nhello world\r\n--XX--\r\n'
+)
+
+
+class FakeRequest:
+    def __init__(self, body: bytes, chunk_size: int = 7):
+        self.body = body
+        self.chunk_size = chunk_size
+        self.headers = {"content-type": "multipart/form-data; boundary=XX"}
+
+    async def stream(self):
+        for start in range(0, len(self.body), self.chunk_size):
+            yield self.body[start:start + self.chunk_size]
+
+
+def _collect(body: bytes):
+    async def collect():
+        return [event async for event in iter_multipart(FakeRequest(body))]
+
+    return asyncio.run(collect())
+
+
+def test_complete_body_yields_part_data_and_end():
+    events = _collect(BODY)
+
+    assert events[0] == ("part", {"name": "file", "filename": "a.txt", "content_type": "text/plain"})
+    assert b"".join(value for kind, value in events if kind == "data") == b"hello world"
+    assert events[-1] == ("end", None)
+
+
+@pytest.mark.parametrize("cut", [20, BODY.index(b"hello") + 5, len(BODY) - 8])
+def test_truncated_body_raises(cut):
+    with pytest.raises(InvalidMultipart):
+        _collect(BODY[:cut])
+
+
+def test_parser_errors_become_invalid_multipart():
+    with pytest.raises(InvalidMultipart):
+        _collect(b"--XY\r\nfoo")
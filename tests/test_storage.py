@@ -0,0 +1,189 @@
+import asyncio
+import io
+import os
+
+import pytest
+from botocore.exceptions import ClientError
+
+from app.storage import s3
+from app.storage.filesystem import FileSystemStorage
+from app.storage.s3 import S3Storage
+
+
+async def _chunks(*parts):
+    for part in parts:
+        yield part
+
+
+async def _read(storage, key, start=0, length=None):
+    return b"".join([chunk async for chunk in storage.read(key, start, length)])
+
+
+def test_filesystem_write_read_move_delete(tmp_path):
+    storage = FileSystemStorage(str(tmp_path))
+    storage.chunk_size = 4
+
+    async def run():
+        assert await storage.write("blobs/ab/file", _chunks(b"hello ", b"world")) == 11
+        assert await _read(storage, "blobs/ab/file") == b"hello world"
+        assert await _read(storage, "blobs/ab/file", 6) == b"world"
+        assert await _read(storage, "blobs/ab/file", 2, 5) == b"llo w"
+
+        await storage.move("blobs/ab/file", "blobs/cd/moved")
+        assert not await storage.exists("blobs/ab/file")
+        assert await _read(storage, "blobs/cd/moved") == b"hello world"
+
+        await storage.delete("blobs/cd/moved")
+        await storage.delete("blobs/cd/moved")
+        assert not await storage.exists("blobs/cd/moved")
+
+    asyncio.run(run())
+
+
+def test_filesystem_failed_write_leaves_no_file(tmp_path):
+    storage = FileSystemStorage(str(tmp_path))
+
+    async def broken():
+        yield b"partial"
+        raise ConnectionError("client went away")
+
+    async def run():
+        with pytest.raises(ConnectionError):
+            await storage.write("tmp/upload", broken())
+        assert not await storage.exists("tmp/upload")
+
+    asyncio.run(run())
+    assert list((tmp_path / "tmp").iterdir()) == []
+
+
+def test_filesystem_rejects_keys_outside_root(tmp_path):
+    storage = FileSystemStorage(str(tmp_path / "root"))
+
+    with pytest.raises(ValueError):
+        asyncio.run(storage.exists("../outside"))
+
+
+class StubS3Client:
+    """S3 istemcisinin depo tarafından kullanılan kısmını bellekte taklit eder."""
+
+    def __init__(self):
+        self.objects = {}
+        self.uploads = {}
+        self.calls = []
+
+    def put_object(self, Bucket, Key, Body):
+        self.calls.append(("put_object", Key))
+        self.objects[Key] = bytes(Body)
+
+    def create_multipart_upload(self, Bucket, Key):
+        upload_id = f"upload-{len(self.uploads) + 1}"
+        self.uploads[upload_id] = {}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.uploads[UploadId][PartNumber] = Body
+        return {"ETag": f"etag-{PartNumber}"}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        parts = self.uploads.pop(UploadId)
+        self.objects[Key] = b"".join(parts[part["PartNumber"]] for part in MultipartUpload["Parts"])
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.calls.append(("abort_multipart_upload", Key))
+        self.uploads.pop(UploadId, None)
+
+    def get_object(self, Bucket, Key, Range):
+        self.calls.append(("get_object", Key, Range))
+        start, _, end = Range.removeprefix("bytes=").partition("-")
+        data = self.objects[Key]
+        return {"Body": io.BytesIO(data[int(start):int(end) + 1 if end else None])}
+
+    def copy(self, CopySource, Bucket, Key):
+        self.calls.append(("copy", CopySource["Key"], Key))
+        self.objects[Key] = self.objects[CopySource["Key"]]
+
+    def delete_object(self, Bucket, Key):
+        self.calls.append(("delete_object", Key))
+        self.objects.pop(Key, None)
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        return {}
+
+
+@pytest.fixture
+def s3_storage():
+    storage = S3Storage(bucket="attachments", region="us-east-1")
+    storage.client = StubS3Client()
+    return storage
+
+
+def test_s3_ranged_read_sends_range_header(s3_storage):
+    async def run():
+        await s3_storage.write("blobs/ab/file", _chunks(b"hello ", b"world"))
+        assert await _read(s3_storage, "blobs/ab/file", 2, 5) == b"llo w"
+        assert await _read(s3_storage, "blobs/ab/file", 6) == b"world"
+        assert await _read(s3_storage, "blobs/ab/file", 3, 0) == b""
+
+    asyncio.run(run())
+
+    ranges = [call[2] for call in s3_storage.client.calls if call[0] == "get_object"]
+    assert ranges == ["bytes=2-6", "bytes=6-"]
+
+
+def test_s3_move_copies_then_deletes(s3_storage):
+    async def run():
+        await s3_storage.write_bytes("tmp/upload", b"content")
+        await s3_storage.move("tmp/upload", "blobs/ab/final")
+        assert not await s3_storage.exists("tmp/upload")
+        assert await s3_storage.exists("blobs/ab/final")
+
+    asyncio.run(run())
+
+    calls = [call for call in s3_storage.client.calls if call[0] in ("copy", "delete_object")]
+    assert calls == [("copy", "tmp/upload", "blobs/ab/final"), ("delete_object", "tmp/upload")]
+
+
+def test_s3_large_write_uses_multipart_and_aborts_on_failure(s3_storage, monkeypatch):
+    monkeypatch.setattr(s3, "MULTIPART_CHUNK_SIZE", 4)
+
+    async def broken():
+        yield b"abcd"
+        yield b"ef"
+        raise ConnectionError("client went away")
+
+    async def run():
+        assert await s3_storage.write("blobs/ab/big", _chunks(b"abc", b"def", b"gh", b"i")) == 9
+        assert await _read(s3_storage, "blobs/ab/big") == b"abcdefghi"
+
+        with pytest.raises(ConnectionError):
+            await s3_storage.write("blobs/ab/broken", broken())
+        assert not await s3_storage.exists("blobs/ab/broken")
+
+    asyncio.run(run())
+
+    assert ("abort_multipart_upload", "blobs/ab/broken") in s3_storage.client.calls
+    assert s3_storage.client.uploads == {}
+
+
+
+@pytest.mark.skipif(not os.getenv("S3_TEST_ENDPOINT_URL"), reason="S3_TEST_ENDPOINT_URL ile bir MinIO adresi verilmedi")
+def test_s3_against_minio():
+    storage = S3Storage(
+        bucket=os.getenv("S3_TEST_BUCKET", "attachments-test"),
+        endpoint_url=os.getenv("S3_TEST_ENDPOINT_URL"),
+        access_key=os.getenv("S3_TEST_ACCESS_KEY", "minioadmin"),
+        secret_key=os.getenv("S3_TEST_SECRET_KEY", "minioadmin"),
+        region="us-east-1",
+    )
+
+    async def run():
+        await storage.write_bytes("tests/tmp", b"hello world")
+        assert await _read(storage, "tests/tmp", 6, 5) == b"world"
+        await storage.move("tests/tmp", "tests/final")
+        assert not await storage.exists("tests/tmp")
+        assert await _read(storage, "tests/final") == b"hello world"
+        await storage.delete("tests/final")
+
+    asyncio.run(run())
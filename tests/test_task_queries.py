@@ -0,0 +1,51 @@
+import asyncio
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.controllers import task_controller
+from app.model.task_model import TaskListFilterModel
+
+
+def _task_rows(count):
+    created = datetime(2024, 1, 1, 12, 0)
+    return [
+        (
+            task_id, "P1", f"Task {task_id}", "", created - timedelta(minutes=task_id), "Ada Lovelace",
+            date(2024, 1, 1), date(2024, 1, 31),
+            1, "Open", 1, "Low", 1, "Bug", ["Ada Lovelace"]
+        )
+        for task_id in range(1, count + 1)
+    ]
+
+
+@pytest.mark.parametrize("count", [1, 300])
+def test_get_tasks_query_count_is_constant(fake_db, count):
+    _, cur = fake_db(task_controller, [_task_rows(count), [], []])
+
+    filters = TaskListFilterModel(limit=task_controller.MAX_TASK_PAGE_SIZE)
+    result = asyncio.run(task_controller.get_tasks("u1", filters))
+
+    assert len(cur.statements) == 3
+    assert len(result["tasks"]) == min(count, task_controller.MAX_TASK_PAGE_SIZE)
+    assert (result["next_cursor"] is not None) == (count > task_controller.MAX_TASK_PAGE_SIZE)
+
+
+def test_get_tasks_skips_detail_queries_for_empty_page(fake_db):
+    _, cur = fake_db(task_controller, [[]])
+
+    result = asyncio.run(task_controller.get_tasks("u1"))
+
+    assert len(cur.statements) == 1
+    assert result == {"tasks": [], "next_cursor": None}
+
+
+def test_get_tasks_returns_false_on_query_error(fake_db):
+    _, cur = fake_db(task_controller)
+
+    async def failing_execute(query, params=None):
+        raise RuntimeError("relation does not exist")
+
+    cur.execute = failing_execute
+
+    assert asyncio.run(task_controller.get_tasks("u1")) is False
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from app.controllers import task_controller
+from app.model.task_model import EditSubtaskModel, EditTaskFullModel, EditUserModel
+
+CONSTANTS = {
+    "statuses_ids": {"Open": 1},
+    "priorities_ids": {"Low": 1},
+    "types_ids": {"Bug": 1},
+}
+
+
+@pytest.fixture(autouse=True)
+def no_side_effects(monkeypatch):
+    async def load_project_constants(cur, project_code, refresh=False):
+        return CONSTANTS
+
+    async def noop(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(task_controller, "load_project_constants", load_project_constants)
+    monkeypatch.setattr(task_controller, "invalidate_dashboards", noop)
+    monkeypatch.setattr(task_controller, "discard_blobs", noop)
+
+
+def _model(subtasks):
+    return EditTaskFullModel(
+        project_code="P1",
+        task_id="7",
+        title="Task",
+        description="",
+        startDate="2024-01-01",
+        endDate="2024-01-31",
+        user_code="u1",
+        status_definition="Open",
+        type_definition="Bug",
+        priority_definition="Low",
+        assigned_members=[EditUserModel("u1")],
+        subtasks_raw=subtasks,
+    )
+
+
+def _run(fake_db, existing, subtasks):
+    conn, cur = fake_db(task_controller, [
+        [],               # ekler
+        ("u1",),          # UPDATE tasks RETURNING created_by
+        [("u1",)],        # görev atamaları
+        existing,         # mevcut alt görevler
+    ])
+    assert asyncio.run(task_controller.update_task(_model(subtasks))) is True
+    assert conn.commits == 1
+    return cur
+
+
+def _statement(cur, fragment):
+    matches = [params for query, params in cur.statements if fragment in query]
+    assert len(matches) == 1, fragment
+    return matches[0]
+
+
+@pytest.mark.parametrize("count", [3, 60])
+def test_update_task_statement_count_is_constant(fake_db, count):
+    existing = [(subtask_id, f"Subtask {subtask_id}") for subtask_id in range(1, count + 1)]
+    member = [EditUserModel("u2")]
+    subtasks = []
+    for subtask_id, description in existing[1:]:
+        if subtask_id % 3 == 0:
+            subtasks.append(EditSubtaskModel(f"{description} (renamed)", member, subtask_id))
+        else:
+            subtasks.append(EditSubtaskModel(description, member, subtask_id))
+    subtasks.append(EditSubtaskModel("Brand new", member))
+
+    cur = _run(fake_db, existing, subtasks)
+
+    # Ekler, görev, atamalar, alt görev okuması ve silme/yeniden adlandırma/ekleme/atama eşitlemesi.
+    assert len(cur.statements) == 8
+    assert _statement(cur, "DELETE FROM task_detail\n")["ids"] == [1]
+    renamed_ids, renamed_descriptions = _statement(cur, "SET description = r.description")
+    assert renamed_ids == [subtask_id for subtask_id, _ in existing[1:] if subtask_id % 3 == 0]
+    assert all(description.endswith("(renamed)") for description in renamed_descriptions)
+    assert _statement(cur, "INSERT INTO task_detail (")[0] == ["Brand new"]
+    assert _statement(cur, "INSERT INTO task_detail_assignment (detail_task_id, assigned_user, timestamp)")["kept"] == \
+        [subtask_id for subtask_id, _ in existing[1:]]
+
+
+def test_update_task_matches_foreign_subtask_id_by_description(fake_db):
+    existing = [(subtask_id, f"Subtask {subtask_id}") for subtask_id in range(1, 51)]
+    # İstemci başka bir göreve ait id'ler gönderse de açıklama eşleşiyorsa alt görev korunur.
+    subtasks = [EditSubtaskModel(description, subtask_id=subtask_id + 1000) for subtask_id, description in existing]
+
+    cur = _run(fake_db, existing, subtasks)
+
+    assert len(cur.statements) == 5
+    assert not any("DELETE FROM task_detail\n" in query for query, _ in cur.statements)
+    assert not any("INSERT INTO task_detail (" in query for query, _ in cur.statements)
+    assert _statement(cur, "INSERT INTO task_detail_assignment (detail_task_id, assigned_user, timestamp)")["kept"] == \
+        [subtask_id for subtask_id, _ in existing]